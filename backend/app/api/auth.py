@@ -6,7 +6,8 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..services.auth_service import AuthService
 from ..schemas.user import UserCreate, UserResponse, Token
-from ..utils.security import create_access_token
+from ..config import settings
+from ..utils.security import create_access_token, user_token_claims
 
 router = APIRouter()
 
@@ -16,7 +17,7 @@ async def login_for_access_token(
     db: Session = Depends(get_db)
 ):
     auth_service = AuthService(db)
-    user = auth_service.authenticate_user(form_data.username, form_data.password)
+    user = await auth_service.authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -24,7 +25,8 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(subject=user.email)
+    claims = user_token_claims(user) if settings.ACCESS_TOKEN_CLAIMS else None
+    access_token = create_access_token(subject=user.email, claims=claims)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -35,8 +37,10 @@ async def register_user(
 ):
     auth_service = AuthService(db)
     try:
-        user = auth_service.create_user(user_in)
+        user = await auth_service.create_user(user_in)
         return user
+    except HTTPException:
+        raise
     except Exception as e:
         # Simplistic error handling
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,9 +1,11 @@
+from datetime import date
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..models import Client, User, Role
-from ..schemas.client import ClientCreate, ClientResponse, ClientUpdate
+from ..models import Client, User, Role, Product
+from ..schemas.client import ClientCreate, ClientResponse, ClientUpdate, ClientPriceListItem
+from ..services.quote_service import QuoteService
 from ..middleware.deps import get_current_user
 
 router = APIRouter()
@@ -84,6 +86,37 @@ def get_client(
         
     return client
 
+@router.get("/{client_id}/price-list", response_model=List[ClientPriceListItem])
+def get_client_price_list(
+    client_id: int,
+    as_of: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Preview the prices a client pays on a given date (defaults to today)."""
+    client = db.query(Client).filter(Client.id == client_id).first()
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found"
+        )
+    
+    # RBAC Check
+    if current_user.role.name == "sales" and client.sales_rep_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this client")
+    if current_user.role.name == "client" and client.id != current_user.client_id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this client")
+    
+    products = db.query(Product).filter(Product.is_active == True).order_by(Product.id).offset(skip).limit(limit).all()
+    prices = QuoteService(db).resolve_prices(client_id, [p.id for p in products], as_of=as_of)
+    
+    return [
+        {"product_id": p.id, "sku": p.sku, "name": p.name, "unit": p.unit, "price": prices.get(p.id, 0.0)}
+        for p in products
+    ]
+
 @router.put("/{client_id}", response_model=ClientResponse)
 def update_client(
     client_id: int,
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Response
+from sqlalchemy.orm import Session
+from ..database import get_db_runner, DbRunner
+from ..schemas.job import JobResponse
+from ..services.job_service import JobService, JOB_SUCCEEDED
+from ..middleware.deps import get_current_user
+from ..models.user import User
+
+router = APIRouter()
+
+
+def _get_visible_job(db: Session, job_id: int, current_user: User):
+    job = JobService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.created_by != current_user.id and current_user.role.name not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized to access this job")
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    def load(db: Session):
+        return JobResponse.model_validate(_get_visible_job(db, job_id, current_user))
+    
+    return await runner.run(load)
+
+
+@router.get("/{job_id}/download")
+async def download_job_result(
+    job_id: int,
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    def load(db: Session):
+        job = _get_visible_job(db, job_id, current_user)
+        if job.status != JOB_SUCCEEDED:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}")
+        if job.result_file is None:
+            raise HTTPException(status_code=404, detail="Job has no result file")
+        return Response(
+            content=job.result_file,
+            media_type=job.result_media_type or "application/octet-stream",
+            headers={"Content-Disposition": f"attachment; filename={job.result_filename or 'result'}"}
+        )
+    
+    return await runner.run(load)
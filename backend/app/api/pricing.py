@@ -0,0 +1,108 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
+from sqlalchemy.orm import Session
+from ..database import get_db, get_db_runner, DbRunner, SessionLocal
+from ..models import Client, User
+from ..schemas.pricing import BatchPriceUpdate, BatchPriceUpdateResult
+from ..services.price_list import PriceListService
+from ..services.pricing_service import PricingService
+from ..middleware.deps import get_current_user
+from ..utils.csv_stream import stream_csv
+from ..utils.xlsx_stream import stream_xlsx, XLSX_MEDIA_TYPE
+
+router = APIRouter()
+
+
+@router.post("/batch-update", response_model=BatchPriceUpdateResult)
+def batch_update_prices(
+    update_in: BatchPriceUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Reprice base tiers by a percentage or fixed amount from effective_from,
+    with low-price protection for client prices. Use dry_run to see the counts.
+    """
+    if current_user.role.name not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized to update prices")
+    
+    return PricingService(db).batch_update(update_in, current_user.id)
+
+
+@router.post("/client-prices/import")
+async def import_client_prices(
+    response: Response,
+    file: UploadFile = File(...),
+    background: bool = False,
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Load client prices from XLSX or CSV (client_id or client_name, sku, price,
+    effective_from, effective_to, is_protected). Intervals open on a row's
+    effective_from are closed the day before; changes are logged to price history.
+    """
+    if current_user.role.name not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized to import client prices")
+    
+    content = await file.read()
+    if background:
+        from ..services.job_service import JobService
+        from ..schemas.job import JobResponse
+        
+        def submit(db: Session):
+            job = JobService(db).submit("client_price_import", current_user.id, params={"filename": file.filename}, input_file=content)
+            return JobResponse.model_validate(job)
+        
+        job = await runner.run(submit)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return job
+    
+    return await runner.run(lambda db: PriceListService(db).import_client_prices(content, file.filename, current_user.id))
+
+
+@router.get("/client-prices/export")
+async def export_client_prices(
+    file_format: str = Query("xlsx", alias="format", pattern="^(csv|xlsx)$"),
+    client_id: Optional[int] = None,
+    as_of: Optional[date] = None,
+    include_history: bool = False,
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    """Client price list in the import layout; current prices unless include_history."""
+    from fastapi.responses import StreamingResponse
+    
+    client_ids = [client_id] if client_id is not None else None
+    
+    # RBAC: sales see their own clients, clients only themselves
+    if current_user.role.name == "sales":
+        def load_own(db: Session):
+            return [cid for (cid,) in db.query(Client.id).filter(Client.sales_rep_id == current_user.id)]
+        
+        own = await runner.run(load_own)
+        if client_id is not None and client_id not in own:
+            raise HTTPException(status_code=403, detail="Not authorized to view this client")
+        client_ids = client_ids or own
+    elif current_user.role.name == "client":
+        if client_id is not None and client_id != current_user.client_id:
+            raise HTTPException(status_code=403, detail="Not authorized to view this client")
+        client_ids = [current_user.client_id]
+    
+    def generate(writer):
+        # The stream outlives the request-scoped session, so it owns its own
+        export_db = SessionLocal()
+        try:
+            rows = PriceListService(export_db).iter_export_rows(client_ids=client_ids, as_of=as_of, include_history=include_history)
+            yield from writer(rows)
+        finally:
+            export_db.close()
+    
+    if file_format == "csv":
+        response = StreamingResponse(generate(stream_csv), media_type="text/csv")
+        response.headers["Content-Disposition"] = "attachment; filename=client_prices.csv"
+    else:
+        response = StreamingResponse(generate(lambda rows: stream_xlsx(rows, sheet_title="Client Prices")), media_type=XLSX_MEDIA_TYPE)
+        response.headers["Content-Disposition"] = "attachment; filename=client_prices.xlsx"
+    return response
@@ -1,197 +1,289 @@
+from datetime import date
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db_runner, DbRunner, SessionLocal
 from ..services.product_service import ProductService
-from ..schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from ..schemas.product import ProductCreate, ProductUpdate, ProductResponse, BomExplosionResponse
+from ..schemas.pricing import ProductPriceHistory
 from ..middleware.deps import get_current_user
 from ..models.user import User
+from ..utils.xlsx_stream import stream_xlsx, XLSX_MEDIA_TYPE
+from ..utils.artifact_cache import artifact_response, etag_matches, get_artifact, make_etag, not_modified
 
 router = APIRouter()
 
 @router.get("/", response_model=List[ProductResponse])
 async def list_products(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    as_of: Optional[date] = None,
+    runner: DbRunner = Depends(get_db_runner),
     current_user: User = Depends(get_current_user)
 ):
-    product_service = ProductService(db)
-    products = product_service.get_products(skip=skip, limit=limit)
-    
-    # Enrich with pricing info
-    from ..services.quote_service import QuoteService
-    from ..models.pricing import BasePrice
-    
-    quote_service = QuoteService(db)
-    
-    for p in products:
+    def load_page(db: Session):
+        product_service = ProductService(db)
+        
+        # Conditional GET: the page only changes with the catalog, the caller's
+        # price scope (a client's prices follow its tier) and the pricing date
+        client_tier = None
         if current_user.role.name == "client" and current_user.client_id:
-            p.current_price = quote_service._get_active_price(current_user.client_id, p.id)
-        elif current_user.role.name in ["admin", "super_admin", "sales"]:
-            # Fetch base prices for all tiers
-            base_prices = db.query(BasePrice).filter(
-                BasePrice.product_id == p.id,
-                BasePrice.effective_to.is_(None)
-            ).all()
-            p.tier_prices = {bp.tier: float(bp.price) for bp in base_prices}
+            from ..models.client import Client
             
-        # Populate components list for UI
-        if p.components:
-             # Manual mapping or use schema? Schema expects list.
-             # p.components is a list of ProductComponent objects.
-             # schema expects child_product_id, quantity, child_sku
-             comps = []
-             for c in p.components:
-                 comps.append({
-                     "child_product_id": c.child_product_id,
-                     "quantity": c.quantity,
-                     "child_sku": c.child.sku if c.child else "UNKNOWN"
-                 })
-             p.components_list = comps
-             
+            client_tier = db.query(Client.tier).filter(Client.id == current_user.client_id).scalar()
+        etag = make_etag(
+            product_service.catalog_version(), current_user.role.name, current_user.client_id, client_tier,
+            as_of or date.today(), skip, limit, weak=True
+        )
+        if etag_matches(request, etag):
+            return etag, None
+        
+        products = product_service.get_products(skip=skip, limit=limit)
+        product_ids = [p.id for p in products]
+        
+        # Prefetch plan: prices and components for the whole page in a fixed
+        # number of queries, independent of page size.
+        from ..services.quote_service import QuoteService
+        
+        quote_service = QuoteService(db)
+        
+        client_prices = {}
+        tier_prices = {}
+        if current_user.role.name == "client" and current_user.client_id:
+            client_prices = quote_service.resolve_prices(current_user.client_id, product_ids, as_of=as_of)
+        elif current_user.role.name in ["admin", "super_admin", "sales"]:
+            # Base prices for all tiers
+            tier_prices = quote_service.resolve_tier_prices(product_ids, as_of=as_of)
+        
+        component_lists = product_service.get_component_lists(product_ids)
+        
+        for p in products:
+            if current_user.role.name == "client" and current_user.client_id:
+                p.current_price = client_prices.get(p.id, 0.0)
+            elif current_user.role.name in ["admin", "super_admin", "sales"]:
+                p.tier_prices = tier_prices.get(p.id, {})
+                
+            # Populate components list for UI
+            if p.id in component_lists:
+                p.components_list = component_lists[p.id]
+        
+        return etag, [ProductResponse.model_validate(p) for p in products]
+    
+    etag, products = await runner.run(load_page)
+    cache_control = "private, no-cache"
+    if products is None:
+        return not_modified(etag, cache_control)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
     return products
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product: ProductCreate,
-    db: Session = Depends(get_db),
+    runner: DbRunner = Depends(get_db_runner),
     current_user: User = Depends(get_current_user)
 ):
     # TODO: Check if user is admin/sales
-    product_service = ProductService(db)
-    return product_service.create_product(product)
+    def create(db: Session):
+        return ProductResponse.model_validate(ProductService(db).create_product(product))
+    
+    return await runner.run(create)
 
 @router.get("/template/xlsx")
-async def get_product_template_xlsx():
-    # Generate Excel template
-    import io
-    from openpyxl import Workbook
-    from fastapi.responses import StreamingResponse
+async def get_product_template_xlsx(request: Request):
+    from ..services.product_import import build_product_template, PRODUCT_TEMPLATE_HEADERS, PRODUCT_TEMPLATE_EXAMPLE
     
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Product Template"
+    # Built once per process; the ETag follows the template's contents
+    artifact = get_artifact(
+        "product_template.xlsx", build_product_template, XLSX_MEDIA_TYPE,
+        filename="product_template.xlsx", version=(PRODUCT_TEMPLATE_HEADERS, PRODUCT_TEMPLATE_EXAMPLE)
+    )
+    return artifact_response(request, artifact)
+
+@router.get("/bom", response_model=List[BomExplosionResponse])
+async def explode_bom(
+    ids: str = Query(..., description="Comma-separated bundle product IDs"),
+    max_depth: int = Query(32, ge=1, le=64),
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        parent_ids = [int(pid) for pid in ids.split(",") if pid.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
     
-    headers = [
-        "sku", "name", "description", "category", "unit", "min_order_qty", "lingxing_product_id",
-        "package_length", "package_width", "package_height", "package_weight",
-        "components" # SKU:Qty;SKU:Qty
-    ]
-    ws.append(headers)
+    def load(db: Session):
+        return ProductService(db).explode_bom(parent_ids, max_depth=max_depth)
     
-    # Example row
-    ws.append([
-        "EXAMPLE-BUNDLE", "Example Bundle", "Includes 2 widgets", "Sets", "set", 1, "LX-B001",
-        20.0, 10.0, 5.0, 1.5,
-        "WIDGET-01:2;WIDGET-02:1"
-    ])
+    exploded = await runner.run(load)
+    return [{"product_id": pid, "lines": exploded[pid]} for pid in dict.fromkeys(parent_ids)]
+
+@router.get("/price-matrix")
+async def export_price_matrix(
+    file_format: str = Query("xlsx", alias="format", pattern="^(csv|xlsx)$"),
+    as_of: Optional[date] = None,
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    """What every client pays for every SKU (rows: products, columns: clients)."""
+    from fastapi.responses import StreamingResponse
+    from ..services.price_matrix import PriceMatrixService
+    
+    if current_user.role.name not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized to export the price matrix")
     
-    stream = io.BytesIO()
-    wb.save(stream)
-    stream.seek(0)
+    def load(db: Session):
+        # The whole matrix is loaded here; streaming it needs no session
+        matrix = PriceMatrixService(db, as_of=as_of)
+        matrix.load()
+        return matrix
     
-    response = StreamingResponse(iter([stream.getvalue()]), media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response.headers["Content-Disposition"] = "attachment; filename=product_template.xlsx"
+    matrix = await runner.run(load)
+    
+    if file_format == "csv":
+        response = StreamingResponse(matrix.stream_csv(), media_type="text/csv")
+        response.headers["Content-Disposition"] = "attachment; filename=price_matrix.csv"
+    else:
+        response = StreamingResponse(matrix.stream_xlsx(), media_type=XLSX_MEDIA_TYPE)
+        response.headers["Content-Disposition"] = "attachment; filename=price_matrix.xlsx"
     return response
 
+def _price_history(
+    product_ids: List[int],
+    start: Optional[date],
+    end: Optional[date],
+    bucket: Optional[str],
+    tier: Optional[str],
+    client_id: Optional[int],
+    include_clients: bool,
+    db: Session,
+    current_user: User
+) -> List[dict]:
+    from ..models.client import Client
+    from ..services.price_history import PriceHistoryService
+    
+    visible_to = None
+    if current_user.role.name == "client":
+        if not current_user.client_id:
+            raise HTTPException(status_code=403, detail="Not authorized to view price history")
+        client_tier = db.query(Client.tier).filter(Client.id == current_user.client_id).scalar()
+        visible_to = ([current_user.client_id], client_tier or "A")
+    elif current_user.role.name == "sales":
+        # Sales see every tier but only their own clients' prices
+        own = [cid for (cid,) in db.query(Client.id).filter(Client.sales_rep_id == current_user.id)]
+        if client_id is not None and client_id not in own:
+            raise HTTPException(status_code=403, detail="Not authorized to view this client")
+        visible_to = (own, None)
+    elif current_user.role.name not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized to view price history")
+    
+    return PriceHistoryService(db).get_series(
+        product_ids, start=start, end=end, bucket=bucket, tier=tier, client_id=client_id,
+        include_clients=include_clients, visible_to=visible_to
+    )
+
+@router.get("/price-history", response_model=List[ProductPriceHistory])
+async def get_products_price_history(
+    ids: str = Query(..., description="Comma-separated product IDs"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: Optional[str] = Query(None, pattern="^(day|week|month)$"),
+    tier: Optional[str] = None,
+    client_id: Optional[int] = None,
+    include_clients: bool = True,
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    """Price series of several products; see get_product_price_history."""
+    try:
+        product_ids = [int(pid) for pid in ids.split(",") if pid.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(product_ids) > 500:
+        raise HTTPException(status_code=400, detail="At most 500 products per request")
+    
+    def load(db: Session):
+        return _price_history(product_ids, start, end, bucket, tier, client_id, include_clients, db, current_user)
+    
+    return await runner.run(load)
+
+@router.get("/{product_id}/price-history", response_model=ProductPriceHistory)
+async def get_product_price_history(
+    product_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: Optional[str] = Query(None, pattern="^(day|week|month)$"),
+    tier: Optional[str] = None,
+    client_id: Optional[int] = None,
+    include_clients: bool = True,
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Price series per tier and per client for one product over [start, end].
+    With bucket=day|week|month the changes of each period are folded into
+    one point (last price, open, low, high, number of changes).
+    """
+    def load(db: Session):
+        if not ProductService(db).get_product(product_id):
+            raise HTTPException(status_code=404, detail="Product not found")
+        return _price_history([product_id], start, end, bucket, tier, client_id, include_clients, db, current_user)[0]
+    
+    return await runner.run(load)
+
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    runner: DbRunner = Depends(get_db_runner),
     current_user: User = Depends(get_current_user)
 ):
-    product_service = ProductService(db)
-    product = product_service.get_product(product_id)
+    def load(db: Session):
+        product = ProductService(db).get_product(product_id)
+        return ProductResponse.model_validate(product) if product else None
+    
+    product = await runner.run(load)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
     
 @router.get("/export/xlsx")
 async def export_products_xlsx(
-    db: Session = Depends(get_db),
+    response: Response,
+    as_of: Optional[date] = None,
+    background: bool = False,
+    runner: DbRunner = Depends(get_db_runner),
     current_user: User = Depends(get_current_user)
 ):
-    import io
-    from openpyxl import Workbook
     from fastapi.responses import StreamingResponse
-    from ..services.quote_service import QuoteService
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Products Export"
-    
-    headers = [
-        "sku", "name", "description", "category", "unit", "min_order_qty", "lingxing_product_id", 
-        "package_length", "package_width", "package_height", "package_weight",
-        "components"
-    ]
-    
-    is_client = current_user.role.name == "client" and current_user.client_id
-    if is_client:
-        headers.append("your_price")
-    else:
-        headers.extend(["price_x", "price_s", "price_a"])
-        
-    ws.append(headers)
-    
-    product_service = ProductService(db)
-    products = product_service.get_products(limit=10000) 
     
-    quote_service = QuoteService(db)
+    client_id = current_user.client_id if current_user.role.name == "client" else None
     
-    for product in products:
-        # Format components string: SKU:Qty;SKU:Qty
-        components_str = ""
-        if product.components:
-            comps = []
-            for c in product.components:
-                # Need child SKU. Accessing c.child.sku triggers lazy load
-                if c.child:
-                     comps.append(f"{c.child.sku}:{c.quantity}")
-            components_str = ";".join(comps)
-
-        row = [
-            product.sku,
-            product.name,
-            product.description or "",
-            product.category or "",
-            product.unit,
-            product.min_order_qty,
-            product.lingxing_product_id or "",
-            float(product.package_length) if product.package_length else None,
-            float(product.package_width) if product.package_width else None,
-            float(product.package_height) if product.package_height else None,
-            float(product.package_weight) if product.package_weight else None,
-            components_str
-        ]
+    if background:
+        # Built by the worker; fetch via GET /api/jobs/{id}/download
+        from ..services.job_service import JobService
+        from ..schemas.job import JobResponse
+        params = {"client_id": client_id, "as_of": as_of.isoformat() if as_of else None}
         
-        if is_client:
-            price = quote_service._get_active_price(current_user.client_id, product.id)
-            row.append(price)
-        else:
-            # Fetch base prices
-            from ..models.pricing import BasePrice
-            base_prices = db.query(BasePrice).filter(
-                BasePrice.product_id == product.id,
-                BasePrice.effective_to.is_(None)
-            ).all()
-            prices = {bp.tier: float(bp.price) for bp in base_prices}
-            
-            p_x = prices.get('X') or prices.get('C') or 0.0
-            p_s = prices.get('S') or prices.get('B') or 0.0
-            p_a = prices.get('A') or 0.0
-            
-            row.extend([p_x, p_s, p_a])
-            
-        ws.append(row)
+        def submit(db: Session):
+            return JobResponse.model_validate(JobService(db).submit("product_export", current_user.id, params=params))
         
-    stream = io.BytesIO()
-    wb.save(stream)
-    stream.seek(0)
+        job = await runner.run(submit)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return job
+    
+    def generate():
+        # The stream outlives the request-scoped session, so it owns its own
+        export_db = SessionLocal()
+        try:
+            rows = ProductService(export_db).iter_export_rows(client_id=client_id, as_of=as_of)
+            yield from stream_xlsx(rows, sheet_title="Products Export")
+        finally:
+            export_db.close()
     
-    response = StreamingResponse(iter([stream.getvalue()]), media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    response = StreamingResponse(generate(), media_type=XLSX_MEDIA_TYPE)
     response.headers["Content-Disposition"] = "attachment; filename=products_export.xlsx"
     return response
 
@@ -199,119 +291,46 @@ from fastapi import UploadFile, File
 
 @router.post("/upload/xlsx")
 async def upload_products_xlsx(
+    response: Response,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    background: bool = False,
+    dry_run: bool = False,
+    diff_format: str = Query("json", pattern="^(json|xlsx)$"),
+    runner: DbRunner = Depends(get_db_runner),
     current_user: User = Depends(get_current_user)
 ):
-    import io
-    from openpyxl import load_workbook
-    from ..models.product import Product, ProductComponent
+    """
+    Create or update products from a sheet. With dry_run nothing is written:
+    the response summarises new/changed/unchanged products and component
+    changes (diff_format=xlsx downloads the full diff sheet instead).
+    """
+    from fastapi.responses import StreamingResponse
+    from ..services.product_import import ProductImportService
     
     content = await file.read()
-    wb = load_workbook(filename=io.BytesIO(content), data_only=True)
-    ws = wb.active
-    
-    product_service = ProductService(db)
-    results = {"success": 0, "errors": [], "total": 0}
-    
-    rows = list(ws.rows)
-    if not rows:
-         return results
-
-    headers = [cell.value for cell in rows[0]]
-    header_map = {}
-    for idx, h in enumerate(headers):
-        if h:
-            header_map[str(h).lower()] = idx
-            
-    if "sku" not in header_map or "name" not in header_map:
-         results["errors"].append("Missing required columns: sku, name")
-         return results
-
-    # First pass: Create/Update all Products (Parents and Children must exist)
-    # To handle components safe, we might need 2 passes or just ensure they exist.
-    # We'll do single pass for Product creation, then handle components?
-    # Actually single pass is risky if Child appears AFTER Parent in file.
-    # Ideally 2 passes: 1. Create all SKUs. 2. Link components.
+    if background:
+        # Imported by the worker; the results (and diff sheet for dry runs) land on the job
+        from ..services.job_service import JobService
+        from ..schemas.job import JobResponse
+        kind = "product_import_preview" if dry_run else "product_import"
+        
+        def submit(db: Session):
+            job = JobService(db).submit(kind, current_user.id, params={"filename": file.filename}, input_file=content)
+            return JobResponse.model_validate(job)
+        
+        job = await runner.run(submit)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return job
     
-    product_data_list = []
-
-    for row_idx, row in enumerate(rows[1:], start=2):
-        results["total"] += 1
-        try:
-            def get_val(key):
-                idx = header_map.get(key)
-                if idx is not None and idx < len(row):
-                    return row[idx].value
-                return None
-
-            sku = get_val("sku")
-            name = get_val("name")
-            
-            if not sku or not name:
-                continue 
-            
-            product_in = ProductCreate(
-                sku=str(sku),
-                name=str(name),
-                description=str(get_val("description")) if get_val("description") else None,
-                category=str(get_val("category")) if get_val("category") else None,
-                unit=str(get_val("unit")) if get_val("unit") else "pcs",
-                min_order_qty=int(get_val("min_order_qty") or 1),
-                lingxing_product_id=str(get_val("lingxing_product_id")) if get_val("lingxing_product_id") else None,
-                package_length=float(get_val("package_length")) if get_val("package_length") else None,
-                package_width=float(get_val("package_width")) if get_val("package_width") else None,
-                package_height=float(get_val("package_height")) if get_val("package_height") else None,
-                package_weight=float(get_val("package_weight")) if get_val("package_weight") else None
+    if dry_run:
+        preview = await runner.run(lambda db: ProductImportService(db).preview_xlsx(content))
+        if diff_format == "xlsx":
+            diff = StreamingResponse(
+                stream_xlsx(ProductImportService.diff_sheet_rows(preview), sheet_title="Import Diff"),
+                media_type=XLSX_MEDIA_TYPE
             )
-            
-            existing = product_service.get_product_by_sku(product_in.sku)
-            if existing:
-                for key, value in product_in.model_dump(exclude_unset=True).items():
-                    setattr(existing, key, value)
-                db.add(existing)
-                # Store ID for component linking
-                product_data_list.append({"product": existing, "components_str": get_val("components"), "row": row_idx})
-            else:
-                new_product = product_service.create_product(product_in)
-                product_data_list.append({"product": new_product, "components_str": get_val("components"), "row": row_idx})
-                
-        except Exception as e:
-            results["errors"].append(f"Row {row_idx}: {str(e)}")
-            
-    db.flush() # Ensure IDs are available
+            diff.headers["Content-Disposition"] = "attachment; filename=product_import_diff.xlsx"
+            return diff
+        return ProductImportService.truncate_preview(preview)
     
-    # Second Pass: Link Components
-    for entry in product_data_list:
-        p = entry["product"]
-        comp_str = entry["components_str"]
-        if comp_str:
-            # Clear existing components?
-            # Strategy: Delete existing and re-add.
-            db.query(ProductComponent).filter(ProductComponent.parent_product_id == p.id).delete()
-            
-            # Parse: SKU:Qty;SKU:Qty
-            comps = str(comp_str).split(";")
-            for c_entry in comps:
-                if not c_entry.strip(): continue
-                parts = c_entry.split(":")
-                child_sku = parts[0].strip()
-                qty = 1
-                if len(parts) > 1:
-                    try:
-                        qty = int(parts[1])
-                    except:
-                        qty = 1
-                
-                # Find child
-                # Optimized: We could cache map SKU->ID from first pass, but query is safe enough.
-                child = product_service.get_product_by_sku(child_sku)
-                if child:
-                    link = ProductComponent(parent_product_id=p.id, child_product_id=child.id, quantity=qty)
-                    db.add(link)
-                else:
-                    results["errors"].append(f"Row {entry['row']}: Component SKU {child_sku} not found")
-
-    db.commit()
-    results["success"] = len(product_data_list)
-    return results
+    return await runner.run(lambda db: ProductImportService(db).import_xlsx(content))
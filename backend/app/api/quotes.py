@@ -1,10 +1,12 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..services.quote_service import QuoteService
-from ..schemas.quotation import QuotationCreate, QuotationResponse
+from ..database import get_db_runner, DbRunner
+from ..services.quote_service import QuoteService, encode_quotation_cursor
+from ..services.idempotency_service import IdempotencyService
+from ..schemas.quotation import QuotationCreate, QuotationResponse, QuotationBulkCreate, QuotationBulkResponse
 from ..middleware.deps import get_current_user
 from ..models.user import User
 
@@ -13,44 +15,108 @@ router = APIRouter()
 @router.post("/", response_model=QuotationResponse, status_code=status.HTTP_201_CREATED)
 async def create_quotation(
     quote_in: QuotationCreate,
-    db: Session = Depends(get_db),
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    runner: DbRunner = Depends(get_db_runner),
     current_user: User = Depends(get_current_user)
 ):
-    quote_service = QuoteService(db)
-    return quote_service.create_quotation(quote_in, current_user.id)
+    def create(db: Session):
+        quote_service = QuoteService(db)
+        if not idempotency_key:
+            return QuotationResponse.model_validate(quote_service.create_quotation(quote_in, current_user.id)), False
+        
+        # Retries with the same key return the original quotation
+        quote, replayed = IdempotencyService(db).execute(
+            user_id=current_user.id,
+            endpoint="quotes.create",
+            key=idempotency_key,
+            payload=quote_in.model_dump(mode="json"),
+            resource_type="quotation",
+            create=lambda: quote_service.add_quotation(quote_in, current_user.id),
+            load=quote_service.get_quotation
+        )
+        return QuotationResponse.model_validate(quote), replayed
+    
+    quote, replayed = await runner.run(create)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return quote
+
+@router.post("/bulk", response_model=QuotationBulkResponse)
+async def create_quotations_bulk(
+    bulk_in: QuotationBulkCreate,
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create many quotations; a quote that fails is reported in its result
+    (error) without stopping the others.
+    """
+    def create(db: Session):
+        return QuoteService(db).create_quotations_bulk(bulk_in.quotes, current_user.id)
+    
+    results = await runner.run(create)
+    failed = sum(1 for r in results if r.get("error"))
+    return {"created": len(results) - failed, "failed": failed, "results": results}
 
 @router.get("/", response_model=List[QuotationResponse])
 async def list_quotations(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    client_id: Optional[int] = None,
+    runner: DbRunner = Depends(get_db_runner),
     current_user: User = Depends(get_current_user)
 ):
-    quote_service = QuoteService(db)
-    
-    filter_client_id = None
+    """
+    Newest quotations first. Pass the X-Next-Cursor response header back as
+    ?cursor= to fetch the next page; the header is absent on the last page.
+    """
+    filter_client_id = client_id
     filter_sales_rep_id = None
     
     if current_user.role.name == "client":
         filter_client_id = current_user.client_id
     elif current_user.role.name == "sales":
         filter_sales_rep_id = current_user.id
-        
-    return quote_service.get_quotations(
-        skip=skip, 
-        limit=limit, 
-        client_id=filter_client_id, 
-        sales_rep_id=filter_sales_rep_id
-    )
+    
+    def load(db: Session):
+        try:
+            quotes = QuoteService(db).get_quotations(
+                skip=skip, 
+                limit=limit, 
+                client_id=filter_client_id, 
+                sales_rep_id=filter_sales_rep_id,
+                status=status_filter,
+                date_from=date_from,
+                date_to=date_to,
+                cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        next_cursor = encode_quotation_cursor(quotes[-1]) if len(quotes) == limit else None
+        return [QuotationResponse.model_validate(q) for q in quotes], next_cursor
+    
+    quotes, next_cursor = await runner.run(load)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return quotes
 
 @router.get("/{quote_id}", response_model=QuotationResponse)
 async def get_quotation(
     quote_id: int,
-    db: Session = Depends(get_db),
+    runner: DbRunner = Depends(get_db_runner),
     current_user: User = Depends(get_current_user)
 ):
-    quote_service = QuoteService(db)
-    quote = quote_service.get_quotation(quote_id)
+    def load(db: Session):
+        quote = QuoteService(db).get_quotation(quote_id)
+        return QuotationResponse.model_validate(quote) if quote else None
+    
+    quote = await runner.run(load)
     if not quote:
         raise HTTPException(status_code=404, detail="Quotation not found")
     return quote
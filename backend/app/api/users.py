@@ -1,7 +1,7 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..database import get_db
+from sqlalchemy.orm import Session, joinedload
+from ..database import get_db_runner, DbRunner
 from ..models.user import Role
 from ..schemas.user import UserResponse
 from ..middleware.deps import get_current_user
@@ -10,18 +10,52 @@ from ..models.user import User
 router = APIRouter()
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user: User = Depends(get_current_user)):
-    return current_user
+async def read_users_me(
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    # The principal may come from token claims; the profile comes from the database
+    def load(db: Session):
+        user = db.query(User).options(joinedload(User.role)).filter(User.id == current_user.id).first()
+        return UserResponse.model_validate(user) if user else None
+    
+    user = await runner.run(load)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+@router.post("/{user_id}/revoke-tokens", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_tokens(
+    user_id: int,
+    runner: DbRunner = Depends(get_db_runner),
+    current_user: User = Depends(get_current_user)
+):
+    """Invalidate the user's outstanding claims tokens (their own, or any user for admins)."""
+    from ..services.token_revocation import revoke_user_tokens
+    
+    if current_user.id != user_id and current_user.role.name not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized to revoke tokens")
+    
+    def revoke(db: Session):
+        if not db.query(User.id).filter(User.id == user_id).first():
+            raise HTTPException(status_code=404, detail="User not found")
+        revoke_user_tokens(db, user_id)
+    
+    await runner.run(revoke)
+
+
 @router.get("/", response_model=List[UserResponse])
 async def list_users(
     role: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    runner: DbRunner = Depends(get_db_runner),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(User)
-    if role:
-        query = query.join(Role).filter(Role.name == role)
-        
-    return query.offset(skip).limit(limit).all()
+    def load(db: Session):
+        query = db.query(User).options(joinedload(User.role))
+        if role:
+            query = query.join(Role).filter(Role.name == role)
+        return [UserResponse.model_validate(user) for user in query.offset(skip).limit(limit).all()]
+    
+    return await runner.run(load)
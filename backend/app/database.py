@@ -1,9 +1,16 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any, Callable, Dict, TypeVar
+from sqlalchemy import create_engine, exc, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from starlette.concurrency import run_in_threadpool
 from .config import settings
 
+T = TypeVar("T")
+
 # Create database engine
 
 # ... (中间可能还有其他代码) ...
@@ -18,12 +25,83 @@ database_url = os.getenv("POSTGRES_URL", settings.DATABASE_URL)
 if database_url and database_url.startswith("postgres://"):
     database_url = database_url.replace("postgres://", "postgresql://", 1)
 
+
+class PoolMetrics:
+    """Checkout counters of one engine's pool, kept across pool recreation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_seconds * 1000 / max(self.checkouts + self.timeouts, 1), 2),
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            }
+
+
+def _timed_pool(pool_class):
+    """
+    pool_class with checkout timing. The wait covers queueing for a free
+    connection plus opening one and the pre-ping, i.e. everything a request
+    spends before its first query.
+    """
+    metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = pool_class.connect(self)
+        except exc.TimeoutError:
+            metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        metrics.record(time.perf_counter() - started)
+        return connection
+
+    return type(f"Timed{pool_class.__name__}", (pool_class,), {"connect": connect, "metrics": metrics})
+
+
+def engine_options(url: str, queue_pool=QueuePool) -> Dict[str, Any]:
+    """create_engine/create_async_engine keyword arguments from the DB_POOL_* settings."""
+    options: Dict[str, Any] = {"echo": settings.DEBUG}
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        # In-memory SQLite shares one connection; there is no pool to size
+        return options
+    if settings.DB_POOL_MODE == "null":
+        # A fresh connection per checkout: nothing to ping or recycle
+        options["poolclass"] = _timed_pool(NullPool)
+        if url.startswith("postgresql+asyncpg"):
+            # PgBouncer-style transaction pooling can't keep prepared statements
+            options["connect_args"] = {"statement_cache_size": 0}
+        return options
+    options.update(
+        poolclass=_timed_pool(queue_pool),
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
 # 3. 创建数据库引擎 (注意这里传的是处理过的 database_url)
-engine = create_engine(
-    database_url,
-    pool_pre_ping=True,
-    echo=settings.DEBUG
-)
+engine = create_engine(database_url, **engine_options(database_url))
 
 # --- 替换结束 ---
 
@@ -41,3 +119,118 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async stack (settings.ASYNC_DATABASE): the same database through asyncpg
+# (aiosqlite for SQLite), so async handlers don't block the event loop.
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    driver = _ASYNC_DRIVERS.get(scheme.split("+", 1)[0], scheme)
+    if driver == "postgresql+asyncpg":
+        # asyncpg spells libpq's sslmode as ssl
+        rest = rest.replace("sslmode=", "ssl=")
+    return f"{driver}://{rest}"
+
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.ASYNC_DATABASE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+    
+    _async_url = async_database_url(database_url)
+    try:
+        async_engine = create_async_engine(_async_url, **engine_options(_async_url, AsyncAdaptedQueuePool))
+    except ImportError as e:
+        raise RuntimeError(
+            f"ASYNC_DATABASE=true needs the {_async_url.split('://', 1)[0]} driver ({e}); "
+            "install requirements.txt or set ASYNC_DATABASE=false"
+        ) from e
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    """Dependency for getting an AsyncSession (requires ASYNC_DATABASE)."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+class DbRunner:
+    """
+    Runs Session-based code (the services) from async handlers without
+    blocking the event loop. With ASYNC_DATABASE the function runs through
+    AsyncSession.run_sync on the async driver; otherwise in the threadpool
+    on a regular Session. Serialize inside the function: lazy loads after
+    it returns would need the session again.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn: Callable[[Session], T]) -> T:
+        if AsyncSessionLocal is not None:
+            return await self.session.run_sync(fn)
+        return await run_in_threadpool(fn, self.session)
+
+
+async def get_db_runner():
+    """Dependency for getting a DbRunner."""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield DbRunner(db)
+        return
+    db = SessionLocal()
+    try:
+        yield DbRunner(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Checked-out/overflow counts and checkout wait of each engine's pool."""
+    stats = {"mode": settings.DB_POOL_MODE}
+    for name, eng in (("sync", engine), ("async", async_engine)):
+        if eng is None:
+            continue
+        pool = eng.pool
+        entry = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+            )
+        metrics = getattr(pool, "metrics", None)
+        if metrics is not None:
+            entry.update(metrics.stats())
+        stats[name] = entry
+    return stats
+
+
+def _sync_round_trip() -> Dict[str, float]:
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        connected = time.perf_counter()
+        connection.execute(text("SELECT 1"))
+        finished = time.perf_counter()
+    return {"checkout_ms": round((connected - started) * 1000, 2), "round_trip_ms": round((finished - connected) * 1000, 2)}
+
+
+async def database_round_trip() -> Dict[str, float]:
+    """
+    Time a pool checkout and a SELECT 1 on the engine the async handlers
+    use, without blocking the event loop.
+    """
+    if async_engine is None:
+        return await run_in_threadpool(_sync_round_trip)
+    started = time.perf_counter()
+    async with async_engine.connect() as connection:
+        connected = time.perf_counter()
+        await connection.execute(text("SELECT 1"))
+        finished = time.perf_counter()
+    return {"checkout_ms": round((connected - started) * 1000, 2), "round_trip_ms": round((finished - connected) * 1000, 2)}
@@ -1,6 +1,12 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
+from .database import database_round_trip, pool_stats
+from .middleware.deps import get_current_admin
+from .services.price_cache import price_cache
+from .services.principal_cache import principal_cache
+from .utils.security import password_hasher
 
 app = FastAPI(
     title="SmartQuote API",
@@ -15,6 +21,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed"],
 )
 
 
@@ -29,19 +36,54 @@ async def root():
 
 
 @app.get("/health")
-async def health_check():
-    """Detailed health check."""
+async def health_check(response: Response):
+    """Readiness check: a SELECT 1 through the application's connection pool."""
+    try:
+        timing = await asyncio.wait_for(database_round_trip(), settings.DB_HEALTH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        response.status_code = 503
+        return {"status": "unhealthy", "database": "timeout", "api": "operational"}
+    except Exception as e:
+        response.status_code = 503
+        return {"status": "unhealthy", "database": "unavailable", "error": type(e).__name__, "api": "operational"}
     return {
         "status": "healthy",
         "database": "connected",
-        "api": "operational"
+        "api": "operational",
+        **timing
     }
 
 
-from .api import auth, users, products, quotes, clients
+@app.get("/health/db-pool", dependencies=[Depends(get_current_admin)])
+async def db_pool_stats():
+    """Connection pool usage and checkout wait, used to size DB_POOL_*."""
+    return pool_stats()
+
+
+@app.get("/health/price-cache", dependencies=[Depends(get_current_admin)])
+async def price_cache_stats():
+    """Price cache counters, used to size the cache per worker."""
+    return price_cache.stats()
+
+
+@app.get("/health/principal-cache", dependencies=[Depends(get_current_admin)])
+async def principal_cache_stats():
+    """Authenticated principal cache counters."""
+    return principal_cache.stats()
+
+
+@app.get("/health/password-hashing", dependencies=[Depends(get_current_admin)])
+async def password_hashing_stats():
+    """Password hashing pool: queue depth, rejections and average wait/hash time."""
+    return password_hasher.stats()
+
+
+from .api import auth, users, products, quotes, clients, jobs, pricing
 
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(products.router, prefix="/api/products", tags=["Products"])
 app.include_router(quotes.router, prefix="/api/quotes", tags=["Quotations"])
 app.include_router(clients.router, prefix="/api/clients", tags=["Clients"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(pricing.router, prefix="/api/pricing", tags=["Pricing"])
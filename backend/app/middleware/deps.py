@@ -2,20 +2,37 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from ..database import get_db
 from ..config import settings
 from ..models.user import User
+from ..services.principal_cache import Principal, principal_cache
+from ..services.token_revocation import revocation_list
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """
+    Resolve the bearer token to a read-only Principal (id, email, role,
+    client_id, ...). Claims tokens are authorized from their claims and the
+    in-memory revocation list; other tokens are cached per token after one
+    users query. Routes that need the ORM User must load it themselves.
+    A plain def: FastAPI runs it in the threadpool, so a cache miss or a
+    revocation list refresh never blocks the event loop.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    
+    principal = principal_cache.get(token)
+    if principal is not None:
+        if principal.token_version is not None and revocation_list.is_revoked(db, principal.id, principal.token_version):
+            raise credentials_exception
+        return principal
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
@@ -23,8 +40,26 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    user = db.query(User).filter(User.email == email).first()
+    
+    write_sequence = principal_cache.write_sequence()
+    expires_at = float(payload.get("exp", float("inf")))
+    if settings.ACCESS_TOKEN_CLAIMS and "uid" in payload and "tv" in payload:
+        principal = Principal.from_claims(payload)
+        if revocation_list.is_revoked(db, principal.id, principal.token_version):
+            raise credentials_exception
+        principal_cache.put(token, principal, expires_at=expires_at, write_sequence=write_sequence)
+        return principal
+    
+    user = db.query(User).options(joinedload(User.role)).filter(User.email == email).first()
     if user is None:
         raise credentials_exception
-    return user
+    
+    principal = Principal.from_user(user)
+    principal_cache.put(token, principal, expires_at=expires_at, write_sequence=write_sequence)
+    return principal
+
+async def get_current_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """get_current_user restricted to admin and super_admin."""
+    if current_user.role.name not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    return current_user
@@ -6,6 +6,9 @@ from .pricing import BasePrice, ClientPrice, PriceHistory
 from .inventory import Inventory
 from .quotation import Quotation, QuotationItem
 from .order import Order, OrderItem, Payment, StockLock
+from .idempotency import IdempotencyKey
+from .sequence import DocumentSequence
+from .job import Job
 
 __all__ = [
     "User",
@@ -23,4 +26,7 @@ __all__ = [
     "OrderItem",
     "Payment",
     "StockLock",
+    "IdempotencyKey",
+    "DocumentSequence",
+    "Job",
 ]
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency-Key claims for creation endpoints.
+    Stores a request fingerprint and a reference to the created resource
+    so retries replay the original result instead of creating duplicates.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    endpoint = Column(String(100), nullable=False)  # e.g. 'quotes.create'
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the canonical request body
+    resource_type = Column(String(50))  # e.g. 'quotation', 'order'
+    resource_id = Column(Integer)  # NULL while the original request is in progress
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'endpoint', 'key', name='uq_idempotency_key_user_endpoint_key'),
+    )
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, LargeBinary, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class Job(Base):
+    """
+    Durable background job (catalog imports/exports).
+    Queued by the API, claimed by `python -m app.worker` with
+    SELECT ... FOR UPDATE SKIP LOCKED, see services/job_service.py.
+    """
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # e.g. 'product_import', 'product_export'
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    params = Column(JSON)
+    input_file = Column(LargeBinary)  # uploaded file for imports
+    
+    # Progress
+    progress = Column(Integer, nullable=False, default=0)  # 0-100
+    message = Column(String(255))
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(100))
+    
+    # Outcome
+    result = Column(JSON)
+    result_file = Column(LargeBinary)
+    result_filename = Column(String(255))
+    result_media_type = Column(String(100))
+    error = Column(Text)
+    
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_jobs_status_id", "status", "id"),
+    )
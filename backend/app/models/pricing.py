@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Numeric, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -61,3 +61,8 @@ class PriceHistory(Base):
     # Relationships
     product = relationship("Product")
     changer = relationship("User", foreign_keys=[changed_by])
+    
+    __table_args__ = (
+        # Time-series reads per product over a changed_at range
+        Index("ix_price_history_product_id_changed_at", "product_id", "changed_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -25,6 +25,11 @@ class Quotation(Base):
     creator = relationship("User", foreign_keys=[created_by])
     items = relationship("QuotationItem", back_populates="quotation", cascade="all, delete-orphan")
     order = relationship("Order", back_populates="quotation", uselist=False)
+    
+    __table_args__ = (
+        # Keyset pagination over (created_at, id)
+        Index("ix_quotations_created_at_id", "created_at", "id"),
+    )
 
 
 class QuotationItem(Base):
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String
+from ..database import Base
+
+
+class DocumentSequence(Base):
+    """
+    Counter rows for document numbers on databases without native sequences
+    (PostgreSQL uses per-year sequences instead, see services/numbering.py).
+    """
+    __tablename__ = "document_sequences"
+    
+    name = Column(String(100), primary_key=True)  # e.g. 'pi_number_2026'
+    next_value = Column(Integer, nullable=False, default=1)
@@ -28,6 +28,8 @@ class User(Base):
     role_id = Column(Integer, ForeignKey("roles.id"))
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=True)
     is_active = Column(Boolean, default=True)
+    # Bumped to revoke claims tokens (and whenever the claims they carry change)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -38,3 +38,10 @@ class ClientResponse(ClientBase):
 
     class Config:
         from_attributes = True
+
+class ClientPriceListItem(BaseModel):
+    product_id: int
+    sku: str
+    name: str
+    unit: Optional[str] = None
+    price: float
@@ -0,0 +1,20 @@
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: str
+    progress: int
+    message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    result_filename: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
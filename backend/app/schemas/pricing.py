@@ -0,0 +1,57 @@
+from typing import Optional, List
+from pydantic import BaseModel
+from datetime import date, datetime
+from decimal import Decimal
+
+
+class BatchPriceUpdate(BaseModel):
+    """Reprice base tiers for a set of products, e.g. tier S +4% for a category."""
+    tiers: List[str] = ["X", "S", "A"]
+    category: Optional[str] = None
+    product_ids: Optional[List[int]] = None
+    percent: Optional[Decimal] = None  # 4 raises by 4%, -2.5 lowers by 2.5%
+    amount: Optional[Decimal] = None  # fixed change per unit
+    effective_from: Optional[date] = None  # defaults to today
+    reason: Optional[str] = None
+    dry_run: bool = False
+
+
+class BatchPriceUpdateResult(BaseModel):
+    dry_run: bool
+    effective_from: date
+    products_matched: int
+    base_prices_changed: int
+    base_prices_unchanged: int
+    base_prices_missing: int  # product/tier pairs without a base price on effective_from
+    base_prices_skipped: int  # the change would make the price zero or negative
+    client_prices_lowered: int  # above the new base, lowered to it
+    client_prices_kept: int  # already at or below the new base
+    client_prices_protected: int  # is_protected, left untouched
+    intervals_closed: int
+    history_rows: int
+
+
+class PricePoint(BaseModel):
+    """
+    One change, or with a bucket the changes in [at, next bucket): price is
+    the last price set, open the price before the first change and low/high
+    the range of prices set in the bucket.
+    """
+    at: datetime
+    price: float
+    open: Optional[float] = None
+    low: Optional[float] = None
+    high: Optional[float] = None
+    changes: int = 1
+    change_type: Optional[str] = None
+
+
+class PriceSeries(BaseModel):
+    tier: Optional[str] = None  # base price series
+    client_id: Optional[int] = None  # client price series
+    points: List[PricePoint]
+
+
+class ProductPriceHistory(BaseModel):
+    product_id: int
+    series: List[PriceSeries]
@@ -59,3 +59,18 @@ class ProductResponse(ProductBase):
 
     class Config:
         from_attributes = True
+
+
+class BomLineSchema(BaseModel):
+    product_id: int
+    sku: str
+    parent_product_id: int
+    quantity: int  # Per unit of the direct parent
+    total_quantity: int  # Rolled up per unit of the root bundle
+    depth: int
+    is_leaf: bool
+
+
+class BomExplosionResponse(BaseModel):
+    product_id: int
+    lines: List[BomLineSchema] = []
@@ -53,3 +53,21 @@ class QuotationResponse(QuotationBase):
 
     class Config:
         from_attributes = True
+
+
+class QuotationBulkCreate(BaseModel):
+    quotes: List[QuotationCreate]
+
+
+class QuotationBulkItemResult(BaseModel):
+    index: int  # Position in the submitted quotes list
+    quotation_id: Optional[int] = None
+    quotation_number: Optional[str] = None
+    total_amount: Optional[Decimal] = None
+    error: Optional[str] = None
+
+
+class QuotationBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[QuotationBulkItemResult]
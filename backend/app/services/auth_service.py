@@ -2,7 +2,7 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from ..models.user import User
 from ..schemas.user import UserCreate, UserUpdate
-from ..utils.security import get_password_hash, verify_password, create_access_token
+from ..utils.security import get_password_hash_async, verify_password_async, PasswordHashBusy
 
 
 class AuthService:
@@ -12,25 +12,39 @@ class AuthService:
     def get_user_by_email(self, email: str):
         return self.db.query(User).filter(User.email == email).first()
 
-    def authenticate_user(self, email: str, password: str):
+    async def _hash_call(self, coro):
+        try:
+            return await coro
+        except PasswordHashBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent sign-ins, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+    async def authenticate_user(self, email: str, password: str):
         user = self.get_user_by_email(email)
         if not user:
             return None
-        if not verify_password(password, user.password_hash):
+        password_hash = user.password_hash
+        # Don't hold a pooled connection while waiting for the hash pool
+        self.db.rollback()
+        if not await self._hash_call(verify_password_async(password, password_hash)):
             return None
         return user
 
-    def create_user(self, user_in: UserCreate):
+    async def create_user(self, user_in: UserCreate):
         user = self.get_user_by_email(user_in.email)
         if user:
             raise HTTPException(
                 status_code=400,
                 detail="Email already registered"
             )
+        self.db.rollback()  # release the connection while hashing
         
         db_user = User(
             email=user_in.email,
-            password_hash=get_password_hash(user_in.password),
+            password_hash=await self._hash_call(get_password_hash_async(user_in.password)),
             full_name=user_in.full_name,
             role_id=user_in.role_id,
             client_id=user_in.client_id,
@@ -0,0 +1,99 @@
+from typing import Dict, Iterable, List, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..models.product import ProductComponent
+
+
+def roll_up_prices(
+    product_ids: Iterable[int],
+    edges: Dict[int, List[Tuple[int, int]]],
+    explicit: Dict[int, float]
+) -> Dict[int, float]:
+    """
+    Price products from their direct components: an explicit price wins,
+    otherwise a bundle costs the sum of its components' prices * quantity
+    (0.0 when that sum is not positive). Expansion stops at any sub-bundle
+    with its own price, exactly like the per-product recursion it replaces.
+    """
+    memo: Dict[int, float] = {}
+
+    def price_of(node: int, path: frozenset) -> float:
+        if node in explicit:
+            return explicit[node]
+        if node in memo:
+            return memo[node]
+        if node not in edges or node in path:
+            return 0.0
+        total = sum(price_of(child_id, path | {node}) * quantity for child_id, quantity in edges[node])
+        memo[node] = total if total > 0 else 0.0
+        return memo[node]
+
+    return {product_id: price_of(product_id, frozenset()) for product_id in product_ids}
+
+
+class BomService:
+    """
+    Walks product_components for bundle pricing and cycle checks. A
+    sub-bundle with its own price is priced as a unit, so bundles are priced
+    from their direct component edges (get_component_edges and
+    roll_up_prices) rather than from a flattened leaf list.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_component_edges(self, parent_ids: Iterable[int]) -> Dict[int, List[Tuple[int, int]]]:
+        """
+        Return {bundle_id: [(child_id, quantity), ...]} for the given bundles
+        and every sub-bundle below them, with one recursive query.
+        """
+        parent_ids = list(set(parent_ids))
+        edges: Dict[int, List[Tuple[int, int]]] = {}
+        if not parent_ids:
+            return edges
+
+        pc = ProductComponent
+        # UNION (not UNION ALL) visits shared sub-bundles once and terminates on cycles
+        nodes = select(pc.parent_product_id.label("product_id")).where(
+            pc.parent_product_id.in_(parent_ids)
+        ).cte("bom_nodes", recursive=True)
+        nodes = nodes.union(
+            select(pc.child_product_id).join(nodes, pc.parent_product_id == nodes.c.product_id)
+        )
+        rows = self.db.execute(
+            select(pc.parent_product_id, pc.child_product_id, pc.quantity).where(
+                pc.parent_product_id.in_(select(nodes.c.product_id))
+            ).order_by(pc.id)
+        )
+        for parent_id, child_id, quantity in rows:
+            edges.setdefault(parent_id, []).append((child_id, quantity))
+        return edges
+
+    def find_cycles(self, new_components: Dict[int, List[int]]) -> Set[int]:
+        """
+        Return the parents in new_components whose proposed children would
+        create a cycle once applied on top of the existing component graph.
+        """
+        edges: Dict[int, Set[int]] = {}
+        for parent_id, child_id in self.db.query(
+            ProductComponent.parent_product_id, ProductComponent.child_product_id
+        ).all():
+            edges.setdefault(parent_id, set()).add(child_id)
+        for parent_id, child_ids in new_components.items():
+            edges[parent_id] = set(child_ids)
+
+        cyclic = set()
+        for start in new_components:
+            # Iterative DFS: does any path from start's children lead back to start?
+            stack = list(edges.get(start, ()))
+            visited = set()
+            while stack:
+                node = stack.pop()
+                if node == start:
+                    cyclic.add(start)
+                    break
+                if node in visited:
+                    continue
+                visited.add(node)
+                stack.extend(edges.get(node, ()))
+        return cyclic
@@ -0,0 +1,108 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.idempotency import IdempotencyKey
+
+
+class IdempotencyService:
+    """
+    Honors the Idempotency-Key header on creation endpoints.
+
+    The claim, the created resource and its id are committed in one
+    transaction, so a failure or crash at any point leaves no claim behind
+    and the client can simply retry. A concurrent request with the same key
+    blocks on the unique constraint until the first one finishes and then
+    replays its result. Retries with the same key and body replay the stored
+    resource; a different body is rejected.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def fingerprint(payload: Any) -> str:
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def execute(
+        self,
+        user_id: int,
+        endpoint: str,
+        key: str,
+        payload: Any,
+        resource_type: str,
+        create: Callable[[], Any],
+        load: Callable[[int], Any]
+    ) -> Tuple[Any, bool]:
+        """
+        Run create() at most once per (user, endpoint, key) and commit.
+        Returns (result, replayed). create() must flush (not commit) and
+        return an ORM object with an id; load(resource_id) fetches it again
+        on replay.
+        """
+        request_hash = self.fingerprint(payload)
+        record = self._claim(user_id, endpoint, key, request_hash)
+        if record.resource_id is not None:
+            return load(record.resource_id), True
+
+        try:
+            result = create()
+            record.resource_type = resource_type
+            record.resource_id = result.id
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self.db.refresh(result)
+        return result, False
+
+    def _claim(self, user_id: int, endpoint: str, key: str, request_hash: str, retry: bool = True) -> IdempotencyKey:
+        """
+        Insert the claim without committing it, or return the completed
+        record of an earlier request with the same key.
+        """
+        now = datetime.now(timezone.utc)
+        self.purge_expired(now)
+
+        record = IdempotencyKey(
+            user_id=user_id,
+            endpoint=endpoint,
+            key=key,
+            request_hash=request_hash,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        )
+        self.db.add(record)
+        try:
+            self.db.flush()
+            return record
+        except IntegrityError:
+            self.db.rollback()
+
+        existing = self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.endpoint == endpoint,
+            IdempotencyKey.key == key
+        ).first()
+        if existing is None and retry:
+            # The other request rolled back between our insert and lookup; retry once
+            return self._claim(user_id, endpoint, key, request_hash, retry=False)
+        if existing is not None and existing.request_hash != request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        if existing is None or existing.resource_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        return existing
+
+    def purge_expired(self, now: Optional[datetime] = None):
+        now = now or datetime.now(timezone.utc)
+        self.db.query(IdempotencyKey).filter(IdempotencyKey.expires_at < now).delete(synchronize_session=False)
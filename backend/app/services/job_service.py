@@ -0,0 +1,289 @@
+"""
+Durable background jobs backed by the jobs table.
+
+The API submits a job and returns its id; `python -m app.worker` claims
+queued jobs with SELECT ... FOR UPDATE SKIP LOCKED, runs the handler for the
+job kind in its own session and stores the result (and result file) on the
+row. While a handler runs, a heartbeat thread refreshes heartbeat_at (and
+the latest reported progress) from its own session, so only a job whose
+worker died goes stale and is requeued. The outcome is only recorded while
+the job is still running under the claiming worker.
+"""
+import io
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.job import Job
+from ..models.product import Product
+from ..utils.xlsx_stream import stream_xlsx, XLSX_MEDIA_TYPE
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Minimum seconds between persisted progress updates
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+
+class JobOutcome(NamedTuple):
+    result: Optional[dict] = None
+    file: Optional[bytes] = None
+    filename: Optional[str] = None
+    media_type: Optional[str] = None
+
+
+# handler(db, job, report) -> JobOutcome; report(progress_percent, message=None)
+JobHandler = Callable[[Session, Job, Callable[..., None]], JobOutcome]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def submit(self, kind: str, user_id: int, params: Optional[dict] = None, input_file: Optional[bytes] = None) -> Job:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(kind=kind, status=JOB_QUEUED, params=params or {}, input_file=input_file, created_by=user_id)
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get_job(self, job_id: int) -> Optional[Job]:
+        return self.db.query(Job).filter(Job.id == job_id).first()
+
+    def claim_next(self, worker_id: str) -> Optional[Job]:
+        """Claim the oldest queued job, skipping rows other workers have locked."""
+        job_id = self.db.query(Job.id).filter(Job.status == JOB_QUEUED).order_by(Job.id).with_for_update(
+            skip_locked=True
+        ).limit(1).scalar()
+        if job_id is None:
+            self.db.rollback()
+            return None
+
+        now = _now()
+        # The status predicate keeps the claim exclusive on databases without row locks (SQLite)
+        claimed = self.db.query(Job).filter(Job.id == job_id, Job.status == JOB_QUEUED).update({
+            Job.status: JOB_RUNNING,
+            Job.worker_id: worker_id,
+            Job.attempts: Job.attempts + 1,
+            Job.progress: 0,
+            Job.started_at: now,
+            Job.heartbeat_at: now,
+        }, synchronize_session=False)
+        self.db.commit()
+        return self.get_job(job_id) if claimed else None
+
+    def _running(self, job_id: int, worker_id: Optional[str]):
+        query = self.db.query(Job).filter(Job.id == job_id, Job.status == JOB_RUNNING)
+        if worker_id is not None:
+            query = query.filter(Job.worker_id == worker_id)
+        return query
+
+    def heartbeat(self, job_id: int, progress: Optional[int] = None, message: Optional[str] = None,
+                  worker_id: Optional[str] = None) -> bool:
+        values = {Job.heartbeat_at: _now()}
+        if progress is not None:
+            values[Job.progress] = max(0, min(100, int(progress)))
+        if message is not None:
+            values[Job.message] = message[:255]
+        updated = self._running(job_id, worker_id).update(values, synchronize_session=False)
+        self.db.commit()
+        return bool(updated)
+
+    def complete(self, job_id: int, outcome: JobOutcome, worker_id: Optional[str] = None) -> bool:
+        """Record the outcome unless the job was requeued or taken over meanwhile."""
+        updated = self._running(job_id, worker_id).update({
+            Job.status: JOB_SUCCEEDED,
+            Job.progress: 100,
+            Job.result: outcome.result,
+            Job.result_file: outcome.file,
+            Job.result_filename: outcome.filename,
+            Job.result_media_type: outcome.media_type,
+            Job.input_file: None,
+            Job.finished_at: _now(),
+        }, synchronize_session=False)
+        self.db.commit()
+        return bool(updated)
+
+    def fail(self, job_id: int, error: str, worker_id: Optional[str] = None) -> bool:
+        updated = self._running(job_id, worker_id).update({
+            Job.status: JOB_FAILED,
+            Job.error: error,
+            Job.finished_at: _now(),
+        }, synchronize_session=False)
+        self.db.commit()
+        return bool(updated)
+
+    def requeue_stale(self, stale_after_seconds: int, max_attempts: int) -> int:
+        """Requeue running jobs whose worker stopped heartbeating; fail them after max_attempts."""
+        cutoff = _now() - timedelta(seconds=stale_after_seconds)
+        stale = self.db.query(Job).filter(Job.status == JOB_RUNNING, Job.heartbeat_at < cutoff)
+        requeued = stale.filter(Job.attempts < max_attempts).update({
+            Job.status: JOB_QUEUED,
+            Job.worker_id: None,
+            Job.message: "Requeued after the worker stopped responding",
+        }, synchronize_session=False)
+        stale.update({
+            Job.status: JOB_FAILED,
+            Job.error: "Worker stopped responding",
+            Job.finished_at: _now(),
+        }, synchronize_session=False)
+        self.db.commit()
+        return requeued
+
+    def run(self, job: Job):
+        """Execute a claimed job in a separate session and record the outcome."""
+        handler = JOB_HANDLERS[job.kind]
+        heartbeat = _Heartbeat(job.id, job.worker_id, settings.JOB_HEARTBEAT_INTERVAL_SECONDS)
+        heartbeat.start()
+        work_db = SessionLocal()
+        try:
+            outcome = handler(work_db, job, heartbeat.report)
+        except Exception as e:
+            work_db.rollback()
+            heartbeat.stop()
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            recorded = self.fail(job.id, str(e) or e.__class__.__name__, worker_id=job.worker_id)
+        else:
+            heartbeat.stop()
+            recorded = self.complete(job.id, outcome, worker_id=job.worker_id)
+        finally:
+            work_db.close()
+        if not recorded:
+            logger.warning("Job %s was requeued or taken over by another worker; outcome discarded", job.id)
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Refreshes a running job's heartbeat_at every `interval` seconds, whatever
+    phase the handler is in, and persists the latest progress passed to
+    report() at most every PROGRESS_INTERVAL_SECONDS. Writes go through a
+    session of their own; one that fails (SQLite stays locked while the
+    handler holds a write transaction) is retried on the next tick.
+    """
+
+    def __init__(self, job_id: int, worker_id: Optional[str], interval: float):
+        super().__init__(name=f"job-{job_id}-heartbeat", daemon=True)
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._pending: Optional[tuple] = None  # (progress, message) not yet persisted
+        self._last_beat = time.monotonic()  # claim_next has just set heartbeat_at
+
+    def report(self, progress: int, message: Optional[str] = None):
+        with self._lock:
+            self._pending = (progress, message)
+
+    def stop(self):
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        while not self._stopped.wait(min(PROGRESS_INTERVAL_SECONDS, self.interval)):
+            with self._lock:
+                pending, self._pending = self._pending, None
+            if pending is None and time.monotonic() - self._last_beat < self.interval:
+                continue
+            db = SessionLocal()
+            try:
+                JobService(db).heartbeat(self.job_id, *(pending or ()), worker_id=self.worker_id)
+                self._last_beat = time.monotonic()
+            except Exception:
+                db.rollback()
+                logger.warning("Heartbeat of job %s failed; retrying", self.job_id, exc_info=True)
+                with self._lock:
+                    self._pending = self._pending or pending
+            finally:
+                db.close()
+
+
+def _run_product_import(db: Session, job: Job, report) -> JobOutcome:
+    from .product_import import ProductImportService
+
+    def on_chunk(done: int, total: Optional[int]):
+        # Leave the last 10% for component linking and the BOM refresh
+        percent = done * 90 // total if total else 0
+        report(min(percent, 90), f"Imported {done} rows")
+
+    results = ProductImportService(db).import_xlsx(job.input_file, progress=on_chunk)
+    return JobOutcome(result=results)
+
+
+def _run_product_import_preview(db: Session, job: Job, report) -> JobOutcome:
+    from .product_import import ProductImportService
+
+    def on_chunk(done: int, total: Optional[int]):
+        report(min(done * 90 // total, 90) if total else 0, f"Checked {done} rows")
+
+    preview = ProductImportService(db).preview_xlsx(job.input_file, progress=on_chunk)
+    diff_sheet = b"".join(stream_xlsx(ProductImportService.diff_sheet_rows(preview), sheet_title="Import Diff"))
+    return JobOutcome(
+        result=ProductImportService.truncate_preview(preview),
+        file=diff_sheet,
+        filename="product_import_diff.xlsx",
+        media_type=XLSX_MEDIA_TYPE
+    )
+
+
+def _run_client_price_import(db: Session, job: Job, report) -> JobOutcome:
+    from .price_list import PriceListService
+
+    params = job.params or {}
+    results = PriceListService(db).import_client_prices(
+        job.input_file, params.get("filename"), job.created_by,
+        progress=lambda done: report(0, f"Applied {done} rows")
+    )
+    return JobOutcome(result=results)
+
+
+def _run_product_export(db: Session, job: Job, report) -> JobOutcome:
+    from .product_service import ProductService
+
+    params = job.params or {}
+    as_of = date.fromisoformat(params["as_of"]) if params.get("as_of") else None
+    total = db.query(Product.id).count()
+    exported = [0]
+
+    def counted(rows):
+        for row in rows:
+            yield row
+            exported[0] += 1
+            if exported[0] % 1000 == 0:
+                report(exported[0] * 100 // max(total, 1), f"Exported {exported[0]} rows")
+
+    buffer = io.BytesIO()
+    rows = ProductService(db).iter_export_rows(client_id=params.get("client_id"), as_of=as_of)
+    for chunk in stream_xlsx(counted(rows), sheet_title="Products Export"):
+        buffer.write(chunk)
+    return JobOutcome(
+        result={"rows": max(exported[0] - 1, 0)},
+        file=buffer.getvalue(),
+        filename="products_export.xlsx",
+        media_type=XLSX_MEDIA_TYPE
+    )
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    "product_import": _run_product_import,
+    "product_import_preview": _run_product_import_preview,
+    "product_export": _run_product_export,
+    "client_price_import": _run_client_price_import,
+}
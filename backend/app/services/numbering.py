@@ -0,0 +1,113 @@
+"""
+Document number allocation for quotations (PI-YYYY-NNNN) and orders (SO-YYYY-NNNN).
+
+On PostgreSQL each worker reserves a block of numbers from a per-year
+sequence and hands them out from memory, so concurrent quote creation only
+touches the database once per block instead of serializing on a MAX()+1
+row. Numbers are unique and increase within a worker but are NOT gap-free:
+sequences are not transactional, so a rolled-back document and the unused
+rest of an exiting worker's block leave gaps. Strictly gap-free numbering
+needs a counter row locked until the document commits, which is exactly
+the single-row contention the blocks remove.
+
+Other databases (SQLite in development) have a single writer anyway; there
+the number is taken from a counter row inside the caller's transaction, one
+at a time, and is gap-free because a rollback returns it.
+
+Both paths run on the caller's own connection, so allocating a number never
+waits for a second connection from the pool.
+"""
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.sequence import DocumentSequence
+
+
+class DocumentNumberAllocator:
+    def __init__(self, prefix: str, block_size: int = 20):
+        self.prefix = prefix
+        self.block_size = block_size
+        self._blocks: Dict[int, List[List[int]]] = {}  # year -> [[next value, last value], ...] in order
+        self._increments: Dict[str, int] = {}  # PostgreSQL sequence -> its INCREMENT BY
+        self._lock = threading.Lock()
+
+    def next_number(self, db: Session, year: Optional[int] = None) -> str:
+        year = year or date.today().year
+        if db.get_bind().dialect.name == "postgresql":
+            value = self._next_from_blocks(db, year)
+        else:
+            value = self._next_from_table(db, self._sequence_name(year))
+        return f"{self.prefix}-{year}-{value:04d}"
+
+    def _sequence_name(self, year: int) -> str:
+        return f"{self.prefix.lower()}_number_{year}"
+
+    def _next_from_blocks(self, db: Session, year: int) -> int:
+        while True:
+            with self._lock:
+                blocks = self._blocks.setdefault(year, [])
+                while blocks and blocks[0][0] > blocks[0][1]:
+                    blocks.pop(0)
+                if blocks:
+                    value = blocks[0][0]
+                    blocks[0][0] += 1
+                    return value
+            # Reserve outside the lock so other threads keep drawing from
+            # blocks refilled meanwhile; a spare block is kept, not dropped
+            first, last = self._reserve_block(db, year)
+            with self._lock:
+                self._blocks[year].append([first, last])
+                self._blocks[year].sort()
+
+    def _reserve_block(self, db: Session, year: int) -> Tuple[int, int]:
+        """Reserve [first, last] with nextval(), which is never rolled back."""
+        seq = f"{self._sequence_name(year)}_seq"
+        block_size = self._increments.get(seq)
+        if block_size is None:
+            block_size = self._increments[seq] = self._create_sequence(db, seq)
+        first = db.execute(text(f"SELECT nextval('{seq}')")).scalar_one()
+        return first, first + block_size - 1
+
+    def _create_sequence(self, db: Session, seq: str) -> int:
+        """
+        Create the year's sequence (once per process and year) and return its
+        increment. Runs in autocommit so the sequence survives a rollback of
+        the caller's transaction.
+        """
+        with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {seq} INCREMENT BY {int(self.block_size)} START 1"))
+            # Honor the increment the sequence was created with, even if the setting changed since
+            return conn.execute(
+                text("SELECT increment_by FROM pg_sequences WHERE sequencename = :seq"), {"seq": seq}
+            ).scalar_one()
+
+    def _next_from_table(self, db: Session, name: str, retry: bool = True) -> int:
+        updated = db.execute(
+            update(DocumentSequence)
+            .where(DocumentSequence.name == name)
+            .values(next_value=DocumentSequence.next_value + 1)
+        )
+        if updated.rowcount == 0:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(DocumentSequence).values(name=name, next_value=2))
+                return 1
+            except IntegrityError:
+                if not retry:
+                    raise
+                # Another transaction created the row first
+                return self._next_from_table(db, name, retry=False)
+        next_value = db.execute(
+            select(DocumentSequence.next_value).where(DocumentSequence.name == name)
+        ).scalar_one()
+        return next_value - 1
+
+
+quotation_numbers = DocumentNumberAllocator("PI", block_size=settings.DOCUMENT_NUMBER_BLOCK_SIZE)
+order_numbers = DocumentNumberAllocator("SO", block_size=settings.DOCUMENT_NUMBER_BLOCK_SIZE)
@@ -0,0 +1,167 @@
+"""
+In-process cache of BasePrice / ClientPrice effective intervals.
+
+Entries are keyed by ("tier", tier, product_id) or ("client", client_id, product_id)
+and hold every effective interval for that key, so a cached entry answers
+"price at date D" correctly across midnight rollovers without re-querying.
+Writes through the ORM invalidate the affected keys; the TTL bounds staleness
+for writes made by other workers.
+"""
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.pricing import BasePrice, ClientPrice
+
+# (effective_from, effective_to, price)
+PriceInterval = Tuple[date, Optional[date], float]
+
+
+class PriceSeries:
+    """
+    Effective-interval history for one key, sorted by effective_from.
+    price_at() binary-searches the start dates, then steps back only past
+    intervals that already ended (overlapping history is rare).
+    """
+    __slots__ = ("starts", "ends", "prices")
+
+    def __init__(self, intervals: Iterable[PriceInterval] = ()):
+        intervals = sorted(intervals, key=lambda interval: interval[0])
+        self.starts = [interval[0] for interval in intervals]
+        self.ends = [interval[1] for interval in intervals]
+        self.prices = [interval[2] for interval in intervals]
+
+    def price_at(self, as_of: date) -> Optional[float]:
+        """Return the price effective on as_of, latest effective_from winning."""
+        idx = bisect_right(self.starts, as_of) - 1
+        while idx >= 0:
+            effective_to = self.ends[idx]
+            if effective_to is None or effective_to >= as_of:
+                return self.prices[idx]
+            idx -= 1
+        return None
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class PriceCache:
+    """Bounded LRU cache of price series with hit/miss/eviction counters."""
+
+    def __init__(self, max_entries: int = 100000, ttl_seconds: int = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, PriceSeries]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[PriceSeries]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, series: PriceSeries):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), series)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+price_cache = PriceCache(
+    max_entries=settings.PRICE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRICE_CACHE_TTL_SECONDS
+)
+
+
+def tier_key(tier: str, product_id: int):
+    return ("tier", tier, product_id)
+
+
+def client_key(client_id: int, product_id: int):
+    return ("client", client_id, product_id)
+
+
+def _keys_for(target) -> set:
+    """Cache keys touched by a row, including its pre-update values."""
+    state = inspect(target)
+    if isinstance(target, BasePrice):
+        scope_attr, make_key = "tier", tier_key
+    else:
+        scope_attr, make_key = "client_id", client_key
+
+    scopes = {getattr(target, scope_attr)}
+    product_ids = {target.product_id}
+    scopes.update(state.attrs[scope_attr].history.deleted or ())
+    product_ids.update(state.attrs.product_id.history.deleted or ())
+    return {make_key(scope, product_id) for scope in scopes for product_id in product_ids}
+
+
+def invalidate_on_commit(session: Optional[Session], keys: Iterable[Hashable]):
+    """
+    Invalidate keys now and again once the session commits, so a concurrent
+    reader cannot re-cache the pre-commit state. Bulk INSERT/UPDATE statements
+    bypass the mapper events below and must call this themselves.
+    """
+    keys = set(keys)
+    for key in keys:
+        price_cache.invalidate(key)
+    if session is not None:
+        session.info.setdefault("price_cache_keys", set()).update(keys)
+
+
+def _on_price_write(mapper, connection, target):
+    invalidate_on_commit(Session.object_session(target), _keys_for(target))
+
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session):
+    for key in session.info.pop("price_cache_keys", ()):
+        price_cache.invalidate(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_rollback(session):
+    session.info.pop("price_cache_keys", None)
+
+
+for _model in (BasePrice, ClientPrice):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _on_price_write)
@@ -0,0 +1,115 @@
+"""
+Price history time series with server-side downsampling.
+
+Rows are read in (product_id, changed_at) order, which the
+ix_price_history_product_id_changed_at index serves directly, and folded
+into per-bucket change points while streaming, so years of history for a
+product cost one index range scan and O(buckets) memory.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_, and_, select
+from sqlalchemy.orm import Session
+
+from ..models.pricing import PriceHistory
+
+BUCKETS = ("day", "week", "month")
+
+
+def _bucket_start(changed_at: datetime, bucket: str) -> datetime:
+    day = changed_at.date()
+    if bucket == "week":
+        day -= timedelta(days=day.weekday())
+    elif bucket == "month":
+        day = day.replace(day=1)
+    return datetime.combine(day, time.min, tzinfo=changed_at.tzinfo)
+
+
+class PriceHistoryService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_series(
+        self,
+        product_ids: Iterable[int],
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        bucket: Optional[str] = None,
+        tier: Optional[str] = None,
+        client_id: Optional[int] = None,
+        include_clients: bool = True,
+        visible_to: Optional[Tuple[List[int], Optional[str]]] = None
+    ) -> List[dict]:
+        """
+        Price series per product, one per tier and per client, over
+        [start, end]. bucket (day/week/month) folds the changes of each
+        period into one point. visible_to=(client_ids, tier) limits the
+        result to the prices of those clients and to that tier (every
+        tier when None): a client sees its own prices and its tier, a
+        sales rep the prices of their clients.
+        """
+        product_ids = list(dict.fromkeys(product_ids))
+        if bucket is not None and bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+
+        stmt = select(
+            PriceHistory.product_id, PriceHistory.tier, PriceHistory.client_id,
+            PriceHistory.old_price, PriceHistory.new_price, PriceHistory.change_type, PriceHistory.changed_at
+        ).where(PriceHistory.product_id.in_(product_ids), PriceHistory.new_price.isnot(None))
+        if start is not None:
+            stmt = stmt.where(PriceHistory.changed_at >= datetime.combine(start, time.min))
+        if end is not None:
+            stmt = stmt.where(PriceHistory.changed_at < datetime.combine(end + timedelta(days=1), time.min))
+        if tier is not None:
+            stmt = stmt.where(or_(PriceHistory.tier == tier, PriceHistory.client_id.isnot(None)))
+        if client_id is not None:
+            stmt = stmt.where(or_(PriceHistory.client_id == client_id, PriceHistory.client_id.is_(None)))
+        if not include_clients:
+            stmt = stmt.where(PriceHistory.client_id.is_(None))
+        if visible_to is not None:
+            own_clients, own_tier = visible_to
+            tier_rows = PriceHistory.client_id.is_(None)
+            if own_tier is not None:
+                tier_rows = and_(tier_rows, PriceHistory.tier == own_tier)
+            stmt = stmt.where(or_(PriceHistory.client_id.in_(own_clients), tier_rows))
+        stmt = stmt.order_by(PriceHistory.product_id, PriceHistory.changed_at, PriceHistory.id).execution_options(
+            yield_per=5000
+        )
+
+        series: Dict[int, Dict[Tuple[Optional[str], Optional[int]], List[dict]]] = {pid: {} for pid in product_ids}
+        for row in self.db.execute(stmt):
+            key = (None, row.client_id) if row.client_id is not None else (row.tier, None)
+            points = series[row.product_id].setdefault(key, [])
+            price = float(row.new_price)
+            old_price = float(row.old_price) if row.old_price is not None else None
+
+            if bucket is None:
+                points.append({"at": row.changed_at, "price": price, "open": old_price, "changes": 1, "change_type": row.change_type})
+                continue
+
+            at = _bucket_start(row.changed_at, bucket)
+            last = points[-1] if points else None
+            if last is not None and last["at"] == at:
+                last["price"] = price
+                last["low"] = min(last["low"], price)
+                last["high"] = max(last["high"], price)
+                last["changes"] += 1
+                if last["change_type"] != row.change_type:
+                    last["change_type"] = None
+            else:
+                points.append({
+                    "at": at, "price": price, "open": old_price, "low": price, "high": price,
+                    "changes": 1, "change_type": row.change_type
+                })
+
+        return [
+            {
+                "product_id": product_id,
+                "series": [
+                    {"tier": key[0], "client_id": key[1], "points": points}
+                    for key, points in sorted(by_key.items(), key=lambda item: (item[0][1] is not None, item[0][0] or "", item[0][1] or 0))
+                ],
+            }
+            for product_id, by_key in series.items()
+        ]
@@ -0,0 +1,92 @@
+"""
+Set-wise maintenance of effective-dated price intervals (BasePrice, ClientPrice).
+
+Callers load the intervals of every key they touch as dicts (persisted rows
+carry "id"), plan their changes in memory with IntervalChanges.apply, and
+write them with a few set-based UPDATEs and one multi-row INSERT.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+
+def price_at(intervals: List[dict], as_of: date) -> Optional[dict]:
+    """Interval effective on as_of, latest effective_from winning."""
+    best = None
+    for interval in intervals:
+        if interval["effective_from"] <= as_of and (interval["effective_to"] is None or interval["effective_to"] >= as_of):
+            if best is None or interval["effective_from"] > best["effective_from"]:
+                best = interval
+    return best
+
+
+class IntervalChanges:
+    """Pending interval writes for one price model."""
+
+    def __init__(self):
+        self.updates: Dict[int, dict] = {}
+        self.inserts: List[dict] = []
+        self.closed = 0
+
+    def apply(self, intervals: List[dict], start: date, values: dict, new_row: dict,
+              effective_to: Optional[date] = None) -> str:
+        """
+        Set values (price and any other columns) for one key from start on.
+
+        An interval starting on the same day is updated in place; otherwise a
+        new interval (new_row + values) is created and the interval open on
+        start is closed the day before. Without effective_to the interval runs
+        up to the next one already scheduled. intervals is updated in place.
+        Returns "created", "updated" or "unchanged".
+        """
+        if effective_to is None:
+            later = [interval["effective_from"] for interval in intervals if interval["effective_from"] > start]
+            effective_to = min(later) - timedelta(days=1) if later else None
+
+        same_start = next((interval for interval in intervals if interval["effective_from"] == start), None)
+        if same_start is not None:
+            updated = dict(values, effective_to=effective_to)
+            if all(same_start.get(key) == value for key, value in updated.items()):
+                return "unchanged"
+            self._change(same_start, updated)
+            return "updated"
+
+        for interval in intervals:
+            if interval["effective_from"] < start and (interval["effective_to"] is None or interval["effective_to"] >= start):
+                self._change(interval, {"effective_to": start - timedelta(days=1)})
+                if "id" in interval:
+                    self.closed += 1
+        row = dict(new_row, **values, effective_from=start, effective_to=effective_to)
+        intervals.append(row)
+        self.inserts.append(row)
+        return "created"
+
+    def _change(self, interval: dict, values: dict):
+        interval.update(values)
+        if "id" in interval:
+            self.updates.setdefault(interval["id"], {"id": interval["id"]}).update(values)
+
+    def write(self, db: Session, model, chunk_size: int = 5000):
+        """
+        Intervals receiving the same values (typically closed the same day)
+        are updated with one UPDATE ... WHERE id IN per chunk, the rest by
+        primary key. Core statements skip the ORM's per-row bookkeeping.
+        """
+        table = model.__table__
+        groups = defaultdict(list)
+        for row in self.updates.values():
+            groups[tuple(sorted((key, value) for key, value in row.items() if key != "id"))].append(row["id"])
+        by_primary_key = []
+        for values, ids in groups.items():
+            if len(ids) == 1:
+                by_primary_key.append(self.updates[ids[0]])
+                continue
+            for start in range(0, len(ids), chunk_size):
+                db.execute(update(table).where(table.c.id.in_(ids[start:start + chunk_size])).values(dict(values)))
+        if by_primary_key:
+            db.execute(update(model), by_primary_key)
+        if self.inserts:
+            db.execute(insert(table), self.inserts)
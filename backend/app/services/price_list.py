@@ -0,0 +1,302 @@
+"""
+Bulk import/export of client price lists (XLSX or CSV).
+
+Rows are streamed from the file and applied in chunks: SKUs and clients are
+resolved with one query each, the existing intervals of the chunk's
+(client, product) pairs are loaded together, and new intervals, closed
+intervals and PriceHistory rows are written with multi-row statements.
+"""
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..models.client import Client
+from ..models.pricing import ClientPrice, PriceHistory
+from ..models.product import Product
+from .price_cache import client_key, invalidate_on_commit
+from .price_intervals import IntervalChanges, price_at
+
+CENT = Decimal("0.01")
+
+PRICE_LIST_COLUMNS = [
+    "client_id", "client_name", "sku", "product_name", "price", "effective_from", "effective_to", "is_protected"
+]
+
+_TRUE_VALUES = {"1", "true", "yes", "y", "x"}
+_FALSE_VALUES = {"0", "false", "no", "n"}
+
+# (row number, parsed values)
+PriceRow = Tuple[int, dict]
+
+
+def _iter_sheet(content: bytes, filename: Optional[str]) -> Iterator[tuple]:
+    """Rows of a CSV or XLSX upload (first sheet), header included."""
+    if (filename or "").lower().endswith(".csv"):
+        yield from csv.reader(io.TextIOWrapper(io.BytesIO(content), encoding="utf-8-sig", newline=""))
+        return
+    wb = load_workbook(filename=io.BytesIO(content), read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _parse_date(value, field: str) -> Optional[date]:
+    if _blank(value):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        raise ValueError(f"Invalid {field} date: {value}")
+
+
+def _parse_bool(value) -> Optional[bool]:
+    if _blank(value):
+        return None
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid is_protected value: {value}")
+
+
+def _parse_price(value) -> Decimal:
+    try:
+        price = Decimal(str(value).strip()).quantize(CENT, rounding=ROUND_HALF_UP)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid price: {value}")
+    if not price.is_finite() or price <= 0:
+        raise ValueError(f"Invalid price: {value}")
+    return price
+
+
+class PriceListService:
+    def __init__(self, db: Session, chunk_size: int = 1000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def import_client_prices(
+        self,
+        content: bytes,
+        filename: Optional[str],
+        user_id: Optional[int],
+        progress: Optional[Callable[[int], None]] = None
+    ) -> dict:
+        """
+        Apply a client price list and commit.
+
+        Each row sets a client's price for a SKU from effective_from (default
+        today). A row with the same start date as an existing interval updates
+        it; otherwise a new interval is created and the interval open on that
+        date is closed the day before. Errors are reported per row.
+        """
+        results = {"success": 0, "errors": [], "total": 0, "created": 0, "updated": 0, "closed": 0, "unchanged": 0}
+        rows = _iter_sheet(content, filename)
+        headers = next(rows, None)
+        if headers is None:
+            return results
+
+        header_map = {str(h).strip().lower(): idx for idx, h in enumerate(headers) if not _blank(h)}
+        if "sku" not in header_map or "price" not in header_map or not ({"client_id", "client_name"} & header_map.keys()):
+            results["errors"].append("Missing required columns: client_id or client_name, sku, price")
+            return results
+
+        reason = f"Price list import: {filename}" if filename else "Price list import"
+        chunk: List[PriceRow] = []
+        for row_idx, row in enumerate(rows, start=2):
+            if all(_blank(value) for value in row):
+                continue
+            results["total"] += 1
+            try:
+                chunk.append((row_idx, self._parse_row(header_map, row)))
+            except ValueError as e:
+                results["errors"].append(f"Row {row_idx}: {str(e)}")
+                continue
+            if len(chunk) >= self.chunk_size:
+                self._apply_chunk(chunk, user_id, reason, results)
+                chunk = []
+                if progress:
+                    progress(results["total"])
+        if chunk:
+            self._apply_chunk(chunk, user_id, reason, results)
+
+        self.db.commit()
+        return results
+
+    @staticmethod
+    def _parse_row(header_map: Dict[str, int], row: tuple) -> dict:
+        def get_val(key):
+            idx = header_map.get(key)
+            if idx is not None and idx < len(row):
+                return row[idx]
+            return None
+
+        client_id = get_val("client_id")
+        client_name = get_val("client_name")
+        sku = get_val("sku")
+        if _blank(sku):
+            raise ValueError("Missing sku")
+        if _blank(client_id) and _blank(client_name):
+            raise ValueError("Missing client_id or client_name")
+        if _blank(get_val("price")):
+            raise ValueError("Missing price")
+        try:
+            client_id = None if _blank(client_id) else int(float(client_id))
+        except ValueError:
+            raise ValueError(f"Invalid client_id: {client_id}")
+
+        effective_from = _parse_date(get_val("effective_from"), "effective_from") or date.today()
+        effective_to = _parse_date(get_val("effective_to"), "effective_to")
+        if effective_to is not None and effective_to < effective_from:
+            raise ValueError("effective_to is before effective_from")
+
+        return {
+            "client_id": client_id,
+            "client_name": None if _blank(client_name) else str(client_name).strip(),
+            "sku": str(sku).strip(),
+            "price": _parse_price(get_val("price")),
+            "effective_from": effective_from,
+            "effective_to": effective_to,
+            "is_protected": _parse_bool(get_val("is_protected")),
+        }
+
+    def _apply_chunk(self, chunk: List[PriceRow], user_id: Optional[int], reason: str, results: dict):
+        product_ids = dict(self.db.execute(
+            select(Product.sku, Product.id).where(Product.sku.in_({values["sku"] for _, values in chunk}))
+        ).all())
+        names = {values["client_name"] for _, values in chunk if values["client_id"] is None}
+        client_ids_by_name = dict(self.db.execute(
+            select(Client.company_name, Client.id).where(Client.company_name.in_(names))
+        ).all()) if names else {}
+        ids = {values["client_id"] for _, values in chunk if values["client_id"] is not None}
+        known_clients = set(self.db.execute(select(Client.id).where(Client.id.in_(ids))).scalars()) if ids else set()
+        known_clients.update(client_ids_by_name.values())
+
+        resolved = []
+        for row_idx, values in chunk:
+            client_id = values["client_id"] if values["client_id"] is not None else client_ids_by_name.get(values["client_name"])
+            if client_id not in known_clients:
+                results["errors"].append(f"Row {row_idx}: Client {values['client_id'] or values['client_name']} not found")
+                continue
+            product_id = product_ids.get(values["sku"])
+            if product_id is None:
+                results["errors"].append(f"Row {row_idx}: SKU {values['sku']} not found")
+                continue
+            resolved.append((row_idx, client_id, product_id, values))
+        if not resolved:
+            return
+
+        # Existing intervals of every (client, product) pair in the chunk, in one query
+        pairs = {(client_id, product_id) for _, client_id, product_id, _ in resolved}
+        intervals: Dict[Tuple[int, int], List[dict]] = {pair: [] for pair in pairs}
+        for row in self.db.execute(select(
+            ClientPrice.id, ClientPrice.client_id, ClientPrice.product_id, ClientPrice.price,
+            ClientPrice.effective_from, ClientPrice.effective_to, ClientPrice.is_protected
+        ).where(tuple_(ClientPrice.client_id, ClientPrice.product_id).in_(pairs))):
+            intervals[(row.client_id, row.product_id)].append(row._asdict())
+
+        counts = {"success": 0, "created": 0, "updated": 0, "unchanged": 0}
+        changes = IntervalChanges()
+        history: List[dict] = []
+
+        # Earlier start dates first; rows for the same start date keep file order (last wins)
+        for row_idx, client_id, product_id, values in sorted(resolved, key=lambda item: (item[3]["effective_from"], item[0])):
+            pair_intervals = intervals[(client_id, product_id)]
+            current = price_at(pair_intervals, values["effective_from"])
+            updated = {"price": values["price"]}
+            if values["is_protected"] is not None:
+                updated["is_protected"] = values["is_protected"]
+            # Without an is_protected column a new interval keeps the protection of the one it supersedes
+            inherited = bool(current["is_protected"]) if current else False
+            outcome = changes.apply(
+                pair_intervals, values["effective_from"], updated,
+                new_row={"client_id": client_id, "product_id": product_id, "is_protected": inherited, "created_by": user_id},
+                effective_to=values["effective_to"]
+            )
+            counts[outcome] += 1
+            counts["success"] += 1
+
+            old_price = current["price"] if current else None
+            if outcome != "unchanged" and old_price != values["price"]:
+                history.append({
+                    "product_id": product_id,
+                    "client_id": client_id,
+                    "tier": None,
+                    "old_price": old_price,
+                    "new_price": values["price"],
+                    "change_type": "client_override",
+                    "reason": reason,
+                    "changed_by": user_id,
+                })
+
+        try:
+            with self.db.begin_nested():
+                changes.write(self.db, ClientPrice)
+                if history:
+                    self.db.execute(insert(PriceHistory), history)
+        except SQLAlchemyError as e:
+            first_row, last_row = min(item[0] for item in resolved), max(item[0] for item in resolved)
+            results["errors"].append(f"Rows {first_row}-{last_row}: {getattr(e, 'orig', e)}")
+            return
+
+        counts["closed"] = changes.closed
+        # Core INSERT/UPDATE statements do not fire the price cache's mapper events
+        invalidate_on_commit(self.db, (client_key(client_id, product_id) for client_id, product_id in pairs))
+        for key, value in counts.items():
+            results[key] += value
+
+    def iter_export_rows(
+        self,
+        client_ids: Optional[Iterable[int]] = None,
+        as_of: Optional[date] = None,
+        include_history: bool = False
+    ) -> Iterator[list]:
+        """
+        Yield the client price list (header first) in the import's column layout.
+        Only intervals effective on as_of (default today) unless include_history.
+        """
+        yield PRICE_LIST_COLUMNS
+
+        stmt = select(
+            ClientPrice.client_id, Client.company_name, Product.sku, Product.name, ClientPrice.price,
+            ClientPrice.effective_from, ClientPrice.effective_to, ClientPrice.is_protected
+        ).join(Client, Client.id == ClientPrice.client_id).join(Product, Product.id == ClientPrice.product_id)
+        if client_ids is not None:
+            stmt = stmt.where(ClientPrice.client_id.in_(list(client_ids)))
+        if not include_history:
+            as_of = as_of or date.today()
+            stmt = stmt.where(
+                ClientPrice.effective_from <= as_of,
+                (ClientPrice.effective_to.is_(None) | (ClientPrice.effective_to >= as_of))
+            )
+        stmt = stmt.order_by(ClientPrice.client_id, Product.sku, ClientPrice.effective_from).execution_options(yield_per=1000)
+
+        for row in self.db.execute(stmt):
+            yield [
+                row.client_id,
+                row.company_name,
+                row.sku,
+                row.name,
+                float(row.price),
+                row.effective_from,
+                row.effective_to,
+                bool(row.is_protected),
+            ]
@@ -0,0 +1,203 @@
+"""
+Vectorized client x product price matrix for pricing reviews.
+
+base_prices, client_prices, clients.tier and product_components are loaded
+into NumPy arrays once; the priority rules (client override > tier base >
+bundle sum of components, a priced sub-bundle counting as a unit) are then
+resolved with array operations, one bundle level at a time, and the matrix
+is produced in product chunks so memory stays bounded.
+"""
+import csv
+import io
+from datetime import date
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..models.client import Client
+from ..models.pricing import BasePrice, ClientPrice
+from ..models.product import Product, ProductComponent
+from ..utils.xlsx_stream import stream_xlsx
+
+
+def _last_per_key(keys: np.ndarray) -> np.ndarray:
+    """Indices of the last occurrence of each key (rows are ordered by effective_from)."""
+    _, first_in_reversed = np.unique(keys[::-1], return_index=True)
+    return len(keys) - 1 - first_in_reversed
+
+
+class PriceMatrixService:
+    def __init__(self, db: Session, as_of: Optional[date] = None):
+        self.db = db
+        self.as_of = as_of or date.today()
+        self._loaded = False
+
+    def load(self):
+        as_of = self.as_of
+
+        client_rows = self.db.query(Client.id, Client.company_name, Client.tier).order_by(Client.id).all()
+        self.client_ids = np.array([row[0] for row in client_rows], dtype=np.int64)
+        self.client_names = [row[1] for row in client_rows]
+        client_tiers = [row[2] or "A" for row in client_rows]  # Default to A if not set
+
+        product_rows = self.db.query(Product.id, Product.sku, Product.name).order_by(Product.id).all()
+        self.product_ids = np.array([row[0] for row in product_rows], dtype=np.int64)
+        self.product_skus = [row[1] for row in product_rows]
+        self.product_names = [row[2] for row in product_rows]
+
+        base_rows = self.db.query(BasePrice.product_id, BasePrice.tier, BasePrice.price).filter(
+            BasePrice.effective_from <= as_of,
+            (BasePrice.effective_to.is_(None) | (BasePrice.effective_to >= as_of))
+        ).order_by(BasePrice.effective_from).all()
+
+        self.tiers = sorted(set(client_tiers) | {row[1] for row in base_rows})
+        tier_index = {tier: idx for idx, tier in enumerate(self.tiers)}
+        self.client_tier = np.array([tier_index[tier] for tier in client_tiers], dtype=np.int64)
+
+        # Tier base prices: (products x tiers), NaN where no price is set
+        n_products, n_tiers = len(self.product_ids), len(self.tiers)
+        tier_prices = np.full((n_products, n_tiers), np.nan)
+        if base_rows:
+            b_product = self._product_index([row[0] for row in base_rows])
+            b_tier = np.array([tier_index[row[1]] for row in base_rows], dtype=np.int64)
+            b_price = np.array([float(row[2]) for row in base_rows])
+            last = _last_per_key(b_product * n_tiers + b_tier)
+            tier_prices[b_product[last], b_tier[last]] = b_price[last]
+
+        # Direct component edges: bundle index, child index, quantity
+        edge_rows = self.db.query(
+            ProductComponent.parent_product_id, ProductComponent.child_product_id, ProductComponent.quantity
+        ).all()
+        e_parent = self._product_index([row[0] for row in edge_rows])
+        e_child = self._product_index([row[1] for row in edge_rows])
+        e_qty = np.array([row[2] for row in edge_rows], dtype=np.float64)
+        level = self._bundle_levels(e_parent, e_child, n_products)
+
+        # Bundles without a tier price fall back to the sum of their components,
+        # resolved bottom-up so a sub-bundle's own price stops the expansion
+        is_bundle = np.zeros(n_products, dtype=bool)
+        is_bundle[e_parent] = True
+        uses_bundle = np.isnan(tier_prices) & is_bundle[:, None]
+        resolved = np.nan_to_num(tier_prices)
+        for depth in range(1, int(level.max(initial=0)) + 1):
+            at_level = level[e_parent] == depth
+            bundle_sum = np.zeros((n_products, n_tiers))
+            np.add.at(bundle_sum, e_parent[at_level], resolved[e_child[at_level]] * e_qty[at_level, None])
+            resolved = np.where(uses_bundle & (level == depth)[:, None], bundle_sum, resolved)
+        self.resolved_tier_prices = resolved
+
+        # Client overrides: (client index, product index, price), last effective row wins
+        override_rows = self.db.query(ClientPrice.client_id, ClientPrice.product_id, ClientPrice.price).filter(
+            ClientPrice.effective_from <= as_of,
+            (ClientPrice.effective_to.is_(None) | (ClientPrice.effective_to >= as_of))
+        ).order_by(ClientPrice.effective_from).all()
+        o_client = np.searchsorted(self.client_ids, np.array([row[0] for row in override_rows], dtype=np.int64))
+        o_product = self._product_index([row[1] for row in override_rows])
+        o_price = np.array([float(row[2]) for row in override_rows])
+        if len(override_rows):
+            last = _last_per_key(o_product * max(len(self.client_ids), 1) + o_client)
+            o_client, o_product, o_price = o_client[last], o_product[last], o_price[last]
+
+        # An override shifts every ancestor priced by fallback for that client's
+        # tier: delta = qty * child delta, pushed up one bundle level at a time.
+        # It stops at ancestors with their own tier price or client override.
+        n_clients = max(len(self.client_ids), 1)
+        overridden = np.zeros((n_products, n_clients), dtype=bool)
+        overridden[o_product, o_client] = True
+        order = np.argsort(e_child, kind="stable")
+        s_child, s_parent, s_qty = e_child[order], e_parent[order], e_qty[order]
+
+        p_node = o_product
+        p_client = o_client
+        p_value = o_price - resolved[o_product, self.client_tier[o_client]]
+        deltas = ([], [], [])
+        for depth in range(0, int(level.max(initial=0))):
+            at_level = level[p_node] == depth
+            node, client, value = p_node[at_level], p_client[at_level], p_value[at_level]
+            left = np.searchsorted(s_child, node, side="left")
+            counts = np.searchsorted(s_child, node, side="right") - left
+            offsets = np.repeat(left - (np.cumsum(counts) - counts), counts) + np.arange(int(counts.sum()))
+            d_bundle = s_parent[offsets]
+            d_client = np.repeat(client, counts)
+            d_value = s_qty[offsets] * np.repeat(value, counts)
+            keep = uses_bundle[d_bundle, self.client_tier[d_client]] & ~overridden[d_bundle, d_client]
+            d_bundle, d_client, d_value = d_bundle[keep], d_client[keep], d_value[keep]
+            for acc, part in zip(deltas, (d_bundle, d_client, d_value)):
+                acc.append(part)
+            p_node = np.concatenate([p_node[~at_level], d_bundle])
+            p_client = np.concatenate([p_client[~at_level], d_client])
+            p_value = np.concatenate([p_value[~at_level], d_value])
+
+        d_bundle, d_client, d_value = (
+            np.concatenate(parts) if parts else np.array([], dtype=dtype)
+            for parts, dtype in zip(deltas, (np.int64, np.int64, np.float64))
+        )
+        self._deltas = self._sorted_by_product(d_bundle, d_client, d_value)
+        self._overrides = self._sorted_by_product(o_product, o_client, o_price)
+        self._loaded = True
+
+    @staticmethod
+    def _bundle_levels(e_parent: np.ndarray, e_child: np.ndarray, n_products: int) -> np.ndarray:
+        """0 for plain products, otherwise 1 + the highest level among a bundle's components."""
+        level = np.zeros(n_products, dtype=np.int64)
+        for _ in range(n_products):
+            updated = level.copy()
+            np.maximum.at(updated, e_parent, level[e_child] + 1)
+            if np.array_equal(updated, level):
+                break
+            level = updated
+        return level
+
+    def _product_index(self, product_ids: List[int]) -> np.ndarray:
+        return np.searchsorted(self.product_ids, np.array(product_ids, dtype=np.int64))
+
+    @staticmethod
+    def _sorted_by_product(products: np.ndarray, clients: np.ndarray, values: np.ndarray):
+        order = np.argsort(products, kind="stable")
+        return products[order], clients[order], values[order]
+
+    def iter_chunks(self, chunk_size: int = 1000) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (first product index, prices[products_in_chunk x clients])."""
+        if not self._loaded:
+            self.load()
+
+        d_product, d_client, d_value = self._deltas
+        o_product, o_client, o_price = self._overrides
+        for lo in range(0, len(self.product_ids), chunk_size):
+            hi = min(lo + chunk_size, len(self.product_ids))
+            matrix = self.resolved_tier_prices[lo:hi][:, self.client_tier]
+
+            a, b = np.searchsorted(d_product, [lo, hi])
+            np.add.at(matrix, (d_product[a:b] - lo, d_client[a:b]), d_value[a:b])
+            np.maximum(matrix, 0.0, out=matrix)
+
+            a, b = np.searchsorted(o_product, [lo, hi])
+            matrix[o_product[a:b] - lo, o_client[a:b]] = o_price[a:b]
+            yield lo, np.round(matrix, 2)
+
+    def header(self) -> List[str]:
+        if not self._loaded:
+            self.load()
+        return ["sku", "name"] + self.client_names
+
+    def stream_csv(self, chunk_size: int = 1000) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.header())
+        for lo, matrix in self.iter_chunks(chunk_size):
+            for offset, row in enumerate(matrix.tolist()):
+                writer.writerow([self.product_skus[lo + offset], self.product_names[lo + offset]] + row)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode("utf-8")
+
+    def stream_xlsx(self, chunk_size: int = 1000) -> Iterator[bytes]:
+        def rows():
+            yield self.header()
+            for lo, matrix in self.iter_chunks(chunk_size):
+                for offset, row in enumerate(matrix.tolist()):
+                    yield [self.product_skus[lo + offset], self.product_names[lo + offset]] + row
+
+        return stream_xlsx(rows(), sheet_title="Price Matrix")
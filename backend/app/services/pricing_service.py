@@ -0,0 +1,188 @@
+"""
+Batch repricing of base tiers with low-price protection.
+
+All affected intervals are loaded with a few set queries, the new prices are
+computed in memory and every write (closed intervals, new intervals, price
+history) goes out as bulk statements in a single transaction.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from ..models.client import Client
+from ..models.pricing import BasePrice, ClientPrice, PriceHistory
+from ..models.product import Product
+from ..schemas.pricing import BatchPriceUpdate
+from .price_cache import client_key, invalidate_on_commit, tier_key
+from .price_intervals import IntervalChanges, price_at
+
+CENT = Decimal("0.01")
+PRICE_TIERS = ("X", "S", "A")
+
+
+def _batches(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class PricingService:
+    def __init__(self, db: Session, chunk_size: int = 5000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _reprice(price: Decimal, percent: Optional[Decimal], amount: Optional[Decimal]) -> Decimal:
+        if percent is not None:
+            new_price = price * (1 + percent / 100)
+        else:
+            new_price = price + amount
+        return new_price.quantize(CENT, rounding=ROUND_HALF_UP)
+
+    def batch_update(self, update_in: BatchPriceUpdate, user_id: int) -> dict:
+        """
+        Reprice the base prices of the selected tiers from effective_from and
+        apply low-price protection to client prices of clients in those tiers:
+        protected prices are never changed, other client prices are lowered to
+        the new base only when they are above it. Commits once unless dry_run.
+        """
+        if (update_in.percent is None) == (update_in.amount is None):
+            raise HTTPException(status_code=400, detail="Specify exactly one of percent or amount")
+        tiers = sorted({tier.upper() for tier in update_in.tiers})
+        if not tiers or any(tier not in PRICE_TIERS for tier in tiers):
+            raise HTTPException(status_code=400, detail=f"Tiers must be among {', '.join(PRICE_TIERS)}")
+
+        effective_from = update_in.effective_from or date.today()
+        reason = update_in.reason or f"Batch update {'%s%%' % update_in.percent if update_in.percent is not None else update_in.amount}"
+
+        query = self.db.query(Product.id)
+        if update_in.category:
+            query = query.filter(Product.category == update_in.category)
+        if update_in.product_ids is not None:
+            query = query.filter(Product.id.in_(update_in.product_ids))
+        product_ids = [pid for (pid,) in query.order_by(Product.id)]
+
+        result = {
+            "dry_run": update_in.dry_run,
+            "effective_from": effective_from,
+            "products_matched": len(product_ids),
+            "base_prices_changed": 0,
+            "base_prices_unchanged": 0,
+            "base_prices_missing": 0,
+            "base_prices_skipped": 0,
+            "client_prices_lowered": 0,
+            "client_prices_kept": 0,
+            "client_prices_protected": 0,
+            "intervals_closed": 0,
+            "history_rows": 0,
+        }
+        history: List[dict] = []
+
+        def log(product_id: int, client_id: Optional[int], tier: Optional[str], old_price: Decimal, new_price: Decimal):
+            history.append({
+                "product_id": product_id,
+                "client_id": client_id,
+                "tier": tier,
+                "old_price": old_price,
+                "new_price": new_price,
+                "change_type": "batch_update",
+                "reason": reason,
+                "changed_by": user_id,
+            })
+
+        # Base prices: intervals open on or after effective_from for the selected products and tiers
+        base_intervals: Dict[Tuple[int, str], List[dict]] = defaultdict(list)
+        for batch in _batches(product_ids, self.chunk_size):
+            rows = self.db.execute(select(
+                BasePrice.id, BasePrice.product_id, BasePrice.tier, BasePrice.price,
+                BasePrice.effective_from, BasePrice.effective_to
+            ).where(
+                BasePrice.product_id.in_(batch),
+                BasePrice.tier.in_(tiers),
+                or_(BasePrice.effective_to.is_(None), BasePrice.effective_to >= effective_from)
+            ))
+            columns = list(rows.keys())
+            for row in rows:
+                base_intervals[(row.product_id, row.tier)].append(dict(zip(columns, row)))
+
+        base_changes = IntervalChanges()
+        new_base: Dict[Tuple[int, str], Decimal] = {}
+        priced = 0
+        for (product_id, tier), intervals in base_intervals.items():
+            current = price_at(intervals, effective_from)
+            if current is None:
+                continue
+            priced += 1
+            new_price = self._reprice(current["price"], update_in.percent, update_in.amount)
+            if new_price <= 0:
+                result["base_prices_skipped"] += 1
+                continue
+            outcome = base_changes.apply(
+                intervals, effective_from, {"price": new_price},
+                new_row={"product_id": product_id, "tier": tier, "created_by": user_id}
+            )
+            if outcome == "unchanged":
+                result["base_prices_unchanged"] += 1
+                continue
+            result["base_prices_changed"] += 1
+            new_base[(product_id, tier)] = new_price
+            log(product_id, None, tier, current["price"], new_price)
+        result["base_prices_missing"] = len(product_ids) * len(tiers) - priced
+
+        # Client prices of clients in the repriced tiers (no tier means A)
+        client_tier = func.coalesce(Client.tier, "A")
+        client_intervals: Dict[Tuple[int, int], List[dict]] = defaultdict(list)
+        tier_of_client: Dict[int, str] = {}
+        repriced_products = sorted({product_id for product_id, _ in new_base})
+        for batch in _batches(repriced_products, self.chunk_size):
+            rows = self.db.execute(select(
+                ClientPrice.id, ClientPrice.client_id, ClientPrice.product_id, ClientPrice.price,
+                ClientPrice.effective_from, ClientPrice.effective_to, ClientPrice.is_protected,
+                client_tier.label("client_tier")
+            ).join(Client, Client.id == ClientPrice.client_id).where(
+                ClientPrice.product_id.in_(batch),
+                client_tier.in_(tiers),
+                or_(ClientPrice.effective_to.is_(None), ClientPrice.effective_to >= effective_from)
+            ))
+            columns = list(rows.keys())
+            for row in rows:
+                interval = dict(zip(columns, row))
+                tier_of_client[row.client_id] = interval.pop("client_tier")
+                client_intervals[(row.client_id, row.product_id)].append(interval)
+
+        client_changes = IntervalChanges()
+        for (client_id, product_id), intervals in client_intervals.items():
+            base_price = new_base.get((product_id, tier_of_client[client_id]))
+            current = price_at(intervals, effective_from)
+            if base_price is None or current is None:
+                continue
+            if current["is_protected"]:
+                result["client_prices_protected"] += 1
+            elif current["price"] <= base_price:
+                result["client_prices_kept"] += 1
+            else:
+                client_changes.apply(
+                    intervals, effective_from, {"price": base_price},
+                    new_row={"client_id": client_id, "product_id": product_id, "is_protected": False, "created_by": user_id}
+                )
+                result["client_prices_lowered"] += 1
+                log(product_id, client_id, None, current["price"], base_price)
+
+        result["intervals_closed"] = base_changes.closed + client_changes.closed
+        result["history_rows"] = len(history)
+        if update_in.dry_run:
+            return result
+
+        base_changes.write(self.db, BasePrice)
+        client_changes.write(self.db, ClientPrice)
+        if history:
+            self.db.execute(insert(PriceHistory.__table__), history)
+        # Core INSERT/UPDATE statements do not fire the price cache's mapper events
+        invalidate_on_commit(self.db, [tier_key(tier, product_id) for product_id, tier in base_intervals])
+        invalidate_on_commit(self.db, [client_key(client_id, product_id) for client_id, product_id in client_intervals])
+        self.db.commit()
+        return result
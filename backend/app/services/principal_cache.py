@@ -0,0 +1,196 @@
+"""
+In-process cache of authenticated principals.
+
+get_current_user resolves a bearer token to an immutable Principal (user
+columns plus role) and caches it by token until the token expires or the
+TTL passes, so authenticated requests skip the users/roles queries.
+Each entry remembers the version of its user and the role generation it
+was stored at; ORM writes to a user bump that user's version and writes
+to roles bump the generation, which retires the entries without scanning
+the cache. The TTL bounds staleness for writes made by other workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.user import Role, User
+
+
+@dataclass(frozen=True)
+class RoleSnapshot:
+    id: int
+    name: str
+    description: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only stand-in for User with the attributes routes rely on."""
+    id: int
+    email: str
+    full_name: Optional[str] = None
+    role_id: Optional[int] = None
+    client_id: Optional[int] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    role: Optional[RoleSnapshot] = None
+    token_version: Optional[int] = None  # set for principals built from token claims
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        role = RoleSnapshot(user.role.id, user.role.name, user.role.description) if user.role else None
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            role_id=user.role_id,
+            client_id=user.client_id,
+            is_active=user.is_active,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            role=role,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "Principal":
+        role = RoleSnapshot(payload["rid"], payload["role"]) if payload.get("role") else None
+        return cls(
+            id=payload["uid"],
+            email=payload["sub"],
+            role_id=payload.get("rid"),
+            client_id=payload.get("cid"),
+            role=role,
+            token_version=payload["tv"],
+        )
+
+
+class _Entry(NamedTuple):
+    stored_at: float
+    expires_at: float
+    version: Tuple[int, int]  # (user version, role generation)
+    principal: Principal
+
+
+class PrincipalCache:
+    """Bounded LRU of principals by token with hit/miss/eviction counters."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._user_versions: Dict[int, int] = {}
+        self._role_generation = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def write_sequence(self) -> int:
+        """Read before loading the user; put() skips the fill if a user or role changed meanwhile."""
+        with self._lock:
+            return self._writes
+
+    def _version(self, user_id: int) -> Tuple[int, int]:
+        return self._user_versions.get(user_id, 0), self._role_generation
+
+    def get(self, token: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and (
+                time.monotonic() - entry.stored_at > self.ttl_seconds
+                or time.time() >= entry.expires_at
+                or entry.version != self._version(entry.principal.id)
+            ):
+                del self._entries[token]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry.principal
+
+    def put(self, token: str, principal: Principal, expires_at: float, write_sequence: int):
+        with self._lock:
+            if write_sequence != self._writes:
+                return
+            self._entries[token] = _Entry(time.monotonic(), expires_at, self._version(principal.id), principal)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_users(self, user_ids: Iterable[int]):
+        with self._lock:
+            for user_id in user_ids:
+                self._user_versions[user_id] = self._user_versions.get(user_id, 0) + 1
+            self._writes += 1
+
+    def invalidate_roles(self):
+        with self._lock:
+            self._role_generation += 1
+            self._writes += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+def _on_user_write(mapper, connection, target):
+    principal_cache.invalidate_users([target.id])
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("principal_users", set()).add(target.id)
+
+
+def _on_role_write(mapper, connection, target):
+    principal_cache.invalidate_roles()
+    session = Session.object_session(target)
+    if session is not None:
+        session.info["principal_roles"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session):
+    # Again after commit, so a concurrent reader cannot re-cache the pre-commit row
+    user_ids = session.info.pop("principal_users", None)
+    if user_ids:
+        principal_cache.invalidate_users(user_ids)
+    if session.info.pop("principal_roles", False):
+        principal_cache.invalidate_roles()
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_rollback(session):
+    session.info.pop("principal_users", None)
+    session.info.pop("principal_roles", None)
+
+
+for _event_name in ("after_update", "after_delete"):
+    event.listen(User, _event_name, _on_user_write)
+    event.listen(Role, _event_name, _on_role_write)
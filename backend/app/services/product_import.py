@@ -0,0 +1,423 @@
+"""
+Set-based product catalog import from XLSX.
+
+The sheet is read in openpyxl read-only mode and processed in chunks: each
+chunk is validated row by row, then written with a batched INSERT ... ON CONFLICT
+(sku) DO UPDATE (on other dialects: one lookup, a bulk INSERT and a bulk
+UPDATE per chunk). Once every product exists, component lists are resolved
+through a single SKU -> id map and product_components is rewritten set-wise.
+"""
+import io
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import Workbook, load_workbook
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from ..models.product import Product, ProductComponent
+from ..schemas.product import ProductCreate
+from .bom_service import BomService
+from .product_service import ProductService
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# (row number, product values, components string)
+ParsedRow = Tuple[int, dict, Optional[str]]
+# progress(rows_done, rows_estimated)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+# Product columns written by the import and compared by the dry run
+_DIFF_FIELDS = (
+    "name", "description", "category", "unit", "min_order_qty", "lingxing_product_id",
+    "package_length", "package_width", "package_height", "package_weight",
+)
+_NUMERIC_FIELDS = {"package_length", "package_width", "package_height", "package_weight"}
+
+# Change lines returned inline by a dry run; the diff sheet carries all of them
+PREVIEW_CHANGE_LIMIT = 1000
+
+PRODUCT_TEMPLATE_HEADERS = (
+    "sku", "name", "description", "category", "unit", "min_order_qty", "lingxing_product_id",
+    "package_length", "package_width", "package_height", "package_weight",
+    "components"  # SKU:Qty;SKU:Qty
+)
+PRODUCT_TEMPLATE_EXAMPLE = (
+    "EXAMPLE-BUNDLE", "Example Bundle", "Includes 2 widgets", "Sets", "set", 1, "LX-B001",
+    20.0, 10.0, 5.0, 1.5,
+    "WIDGET-01:2;WIDGET-02:1"
+)
+
+
+def build_product_template() -> bytes:
+    """Blank import workbook: the header row and one example row."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Product Template"
+    ws.append(PRODUCT_TEMPLATE_HEADERS)
+    ws.append(PRODUCT_TEMPLATE_EXAMPLE)
+    stream = io.BytesIO()
+    wb.save(stream)
+    return stream.getvalue()
+
+
+def _batches(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _display(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _same_value(field: str, current, new) -> bool:
+    if field in _NUMERIC_FIELDS:
+        # Numeric(10, 2) columns: compare at the stored precision
+        if current is None or new is None:
+            return current is None and new is None
+        return round(float(current), 2) == round(float(new), 2)
+    if isinstance(current, str) or isinstance(new, str):
+        # Empty strings and NULL are written interchangeably
+        return (current or None) == (new or None)
+    return current == new
+
+
+def _format_components(quantities: Dict[str, int]) -> str:
+    return ";".join(f"{sku}:{qty}" for sku, qty in quantities.items())
+
+
+def _change_line(row_idx: int, sku: str, change: str, field: str, current, new) -> dict:
+    return {"row": row_idx, "sku": sku, "change": change, "field": field, "current": current, "new": new}
+
+
+class ProductImportService:
+    def __init__(self, db: Session, chunk_size: int = 1000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def import_xlsx(self, content: bytes, progress: Optional[ProgressCallback] = None) -> dict:
+        """
+        Create or update products from an uploaded sheet and commit.
+        Returns {"success", "errors", "total"}; errors are reported per row.
+        progress(rows_done, rows_estimated) is called after every chunk.
+        """
+        results = {"success": 0, "errors": [], "total": 0}
+        # Latest non-empty components string per SKU: sku -> (row number, components)
+        components: Dict[str, Tuple[int, str]] = {}
+        sku_ids: Dict[str, int] = {}
+
+        chunk: List[ParsedRow] = []
+        for entry in self._iter_rows(content, results, progress):
+            chunk.append(entry)
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk, sku_ids, components, results)
+                chunk = []
+        if chunk:
+            self._write_chunk(chunk, sku_ids, components, results)
+
+        self._link_components(components, sku_ids, results)
+        self.db.commit()
+        return results
+
+    def preview_xlsx(self, content: bytes, progress: Optional[ProgressCallback] = None) -> dict:
+        """
+        Dry run of import_xlsx: report what the upload would change without writing.
+
+        Existing products and components are loaded for the file's SKUs in
+        chunked set queries and compared in memory. Returns the summary
+        counts, the per-row errors the import would report, and one change
+        line per changed field ({"row", "sku", "change", "field", "current", "new"}).
+        """
+        results = {"success": 0, "errors": [], "total": 0}
+        latest: Dict[str, ParsedRow] = {}
+        components: Dict[str, Tuple[int, str]] = {}
+        for entry in self._iter_rows(content, results, progress):
+            row_idx, values, components_str = entry
+            latest[values["sku"]] = entry
+            if components_str:
+                components[values["sku"]] = (row_idx, components_str)
+
+        existing: Dict[str, dict] = {}
+        diff_columns = [Product.id, Product.sku] + [getattr(Product, field) for field in _DIFF_FIELDS]
+        for batch in _batches(list(latest), self.chunk_size):
+            for row in self.db.execute(select(*diff_columns).where(Product.sku.in_(batch))):
+                existing[row.sku] = row._asdict()
+
+        component_changes = self._diff_components(components, latest, existing, results)
+
+        summary = {"new": 0, "changed": 0, "unchanged": 0, "components_changed": len(component_changes), "errors": 0}
+        changes: List[dict] = []
+        for sku, (row_idx, values, _) in sorted(latest.items(), key=lambda item: item[1][0]):
+            current = existing.get(sku)
+            if current is None:
+                summary["new"] += 1
+                changes.append(_change_line(row_idx, sku, "new", "name", None, values["name"]))
+            else:
+                field_changes = [
+                    _change_line(row_idx, sku, "changed", field, _display(current[field]), values[field])
+                    for field in _DIFF_FIELDS
+                    if not _same_value(field, current[field], values[field])
+                ]
+                summary["changed" if field_changes or sku in component_changes else "unchanged"] += 1
+                changes.extend(field_changes)
+            if sku in component_changes:
+                old, new = component_changes[sku]
+                changes.append(_change_line(row_idx, sku, "new" if current is None else "changed", "components", old, new))
+
+        summary["errors"] = len(results["errors"])
+        return {
+            "dry_run": True,
+            "total": results["total"],
+            "summary": summary,
+            "errors": results["errors"],
+            "changes": changes,
+        }
+
+    @staticmethod
+    def truncate_preview(preview: dict, limit: int = PREVIEW_CHANGE_LIMIT) -> dict:
+        """Copy of a preview with at most limit change lines, for JSON responses."""
+        return dict(preview, changes=preview["changes"][:limit], changes_truncated=len(preview["changes"]) > limit)
+
+    @staticmethod
+    def diff_sheet_rows(preview: dict) -> Iterator[list]:
+        """Rows of the downloadable diff sheet for a preview_xlsx() result."""
+        yield ["row", "sku", "change", "field", "current", "new"]
+        for line in preview["changes"]:
+            yield [line["row"], line["sku"], line["change"], line["field"], line["current"], line["new"]]
+        for error in preview["errors"]:
+            yield [None, None, "error", None, None, error]
+
+    def _iter_rows(self, content: bytes, results: dict, progress: Optional[ProgressCallback] = None) -> Iterator[ParsedRow]:
+        """Stream valid rows of the sheet, counting rows and collecting parse errors in results."""
+        wb = load_workbook(filename=io.BytesIO(content), read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            # From the sheet's dimension record; may be missing in files not written by Excel
+            estimated_rows = ws.max_row - 1 if ws.max_row else None
+            rows = ws.iter_rows(values_only=True)
+            headers = next(rows, None)
+            if headers is None:
+                return
+
+            header_map = {str(h).lower(): idx for idx, h in enumerate(headers) if h}
+            if "sku" not in header_map or "name" not in header_map:
+                results["errors"].append("Missing required columns: sku, name")
+                return
+
+            for row_idx, row in enumerate(rows, start=2):
+                results["total"] += 1
+                if progress and results["total"] % self.chunk_size == 0:
+                    progress(results["total"], estimated_rows)
+                try:
+                    parsed = self._parse_row(header_map, row)
+                except Exception as e:
+                    results["errors"].append(f"Row {row_idx}: {str(e)}")
+                    continue
+                if parsed is not None:
+                    yield (row_idx,) + parsed
+        finally:
+            wb.close()
+
+    @staticmethod
+    def _parse_row(header_map: Dict[str, int], row: tuple) -> Optional[Tuple[dict, Optional[str]]]:
+        def get_val(key):
+            idx = header_map.get(key)
+            if idx is not None and idx < len(row):
+                return row[idx]
+            return None
+
+        sku = get_val("sku")
+        name = get_val("name")
+        if not sku or not name:
+            return None
+
+        product_in = ProductCreate(
+            sku=str(sku),
+            name=str(name),
+            description=str(get_val("description")) if get_val("description") else None,
+            category=str(get_val("category")) if get_val("category") else None,
+            unit=str(get_val("unit")) if get_val("unit") else "pcs",
+            min_order_qty=int(get_val("min_order_qty") or 1),
+            lingxing_product_id=str(get_val("lingxing_product_id")) if get_val("lingxing_product_id") else None,
+            package_length=float(get_val("package_length")) if get_val("package_length") else None,
+            package_width=float(get_val("package_width")) if get_val("package_width") else None,
+            package_height=float(get_val("package_height")) if get_val("package_height") else None,
+            package_weight=float(get_val("package_weight")) if get_val("package_weight") else None
+        )
+        components_str = get_val("components")
+        # is_active is not an import column: new rows get the default, existing rows keep theirs
+        return product_in.model_dump(exclude={"is_active"}), (str(components_str) if components_str else None)
+
+    def _write_chunk(self, chunk: List[ParsedRow], sku_ids: Dict[str, int],
+                     components: Dict[str, Tuple[int, str]], results: dict):
+        """Upsert one chunk; if the statement fails, retry row by row to report the bad rows."""
+        try:
+            with self.db.begin_nested():
+                sku_ids.update(self._upsert([values for _, values, _ in chunk]))
+            accepted = chunk
+        except SQLAlchemyError:
+            accepted = []
+            for entry in chunk:
+                try:
+                    with self.db.begin_nested():
+                        sku_ids.update(self._upsert([entry[1]]))
+                    accepted.append(entry)
+                except SQLAlchemyError as e:
+                    results["errors"].append(f"Row {entry[0]}: {getattr(e, 'orig', e)}")
+
+        for row_idx, values, components_str in accepted:
+            results["success"] += 1
+            if components_str:
+                components[values["sku"]] = (row_idx, components_str)
+
+    def _upsert(self, rows: List[dict]) -> Dict[str, int]:
+        """INSERT ... ON CONFLICT (sku) DO UPDATE; returns {sku: id}."""
+        # A statement may not touch the same row twice: the last row for a SKU wins
+        latest = list({values["sku"]: values for values in rows}.values())
+        dialect = self.db.get_bind().dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            return self._upsert_generic(latest)
+
+        stmt = _UPSERT_INSERTS[dialect](Product)
+        update_columns = {key: stmt.excluded[key] for key in latest[0] if key != "sku"}
+        update_columns["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.sku], set_=update_columns
+        ).returning(Product.sku, Product.id)
+        # executemany form: the statement compiles once and the driver batches it into multi-row VALUES
+        return dict(self.db.execute(stmt, latest).all())
+
+    def _upsert_generic(self, latest: List[dict]) -> Dict[str, int]:
+        """
+        Upsert for dialects without ON CONFLICT: look up the chunk's SKUs,
+        then one executemany INSERT for new SKUs and one bulk UPDATE by
+        primary key for existing ones.
+        """
+        skus = [values["sku"] for values in latest]
+        existing = dict(self.db.execute(select(Product.sku, Product.id).where(Product.sku.in_(skus))).all())
+        new_rows = [values for values in latest if values["sku"] not in existing]
+        if new_rows:
+            self.db.execute(insert(Product), new_rows)
+        updates = [dict(values, id=existing[values["sku"]]) for values in latest if values["sku"] in existing]
+        if updates:
+            self.db.execute(update(Product), updates)
+        if not new_rows:
+            return existing
+        return dict(self.db.execute(select(Product.sku, Product.id).where(Product.sku.in_(skus))).all())
+
+    def _link_components(self, components: Dict[str, Tuple[int, str]], sku_ids: Dict[str, int], results: dict):
+        """Replace the direct components of every imported row that lists them."""
+        if not components:
+            return
+
+        parsed = {sku: self._parse_components(components_str) for sku, (_, components_str) in components.items()}
+
+        # Child SKUs that are not part of this file are looked up once
+        sku_ids.update(self._lookup_skus({child_sku for links in parsed.values() for child_sku, _ in links} - sku_ids.keys()))
+
+        new_components: Dict[int, List[Tuple[int, int]]] = {}
+        component_rows: Dict[int, int] = {}
+        for sku, (row_idx, _) in sorted(components.items(), key=lambda item: item[1][0]):
+            quantities: Dict[int, int] = {}
+            for child_sku, qty in parsed[sku]:
+                child_id = sku_ids.get(child_sku)
+                if child_id is None:
+                    results["errors"].append(f"Row {row_idx}: Component SKU {child_sku} not found")
+                    continue
+                # The same child listed twice adds up instead of violating uq_product_component_parent_child
+                quantities[child_id] = quantities.get(child_id, 0) + qty
+            new_components[sku_ids[sku]] = list(quantities.items())
+            component_rows[sku_ids[sku]] = row_idx
+
+        # Reject bundles that would (directly or transitively) contain themselves
+        cyclic = BomService(self.db).find_cycles({pid: [child_id for child_id, _ in links] for pid, links in new_components.items()})
+        for pid in sorted(cyclic, key=component_rows.get):
+            results["errors"].append(f"Row {component_rows[pid]}: Components would create a bundle cycle")
+            del new_components[pid]
+
+        parent_ids = list(new_components)
+        for batch in _batches(parent_ids, self.chunk_size):
+            self.db.execute(delete(ProductComponent).where(ProductComponent.parent_product_id.in_(batch)))
+        link_rows = [
+            {"parent_product_id": pid, "child_product_id": child_id, "quantity": qty}
+            for pid, links in new_components.items()
+            for child_id, qty in links
+        ]
+        if link_rows:
+            self.db.execute(insert(ProductComponent), link_rows)
+
+    def _diff_components(self, components: Dict[str, Tuple[int, str]], latest: Dict[str, ParsedRow],
+                         existing: Dict[str, dict], results: dict) -> Dict[str, Tuple[str, str]]:
+        """
+        Compare the component lists the import would write with the current ones.
+        Returns {sku: (current, new)} for bundles whose components would change
+        and adds the errors the import would report to results.
+        """
+        if not components:
+            return {}
+
+        parsed = {sku: self._parse_components(components_str) for sku, (_, components_str) in components.items()}
+        child_skus = {child_sku for links in parsed.values() for child_sku, _ in links}
+        # Products created by this file get placeholder ids so the cycle check can see them
+        sku_ids = {sku: -idx for idx, sku in enumerate(latest, start=1)}
+        sku_ids.update({sku: row["id"] for sku, row in existing.items()})
+        sku_ids.update(self._lookup_skus(child_skus - sku_ids.keys()))
+
+        current_lists: Dict[str, Dict[str, int]] = {}
+        bundle_ids = {existing[sku]["id"]: sku for sku in components if sku in existing}
+        for batch in _batches(list(bundle_ids), self.chunk_size):
+            for parent_id, lines in ProductService(self.db).get_component_lists(batch).items():
+                quantities = current_lists.setdefault(bundle_ids[parent_id], {})
+                for line in lines:
+                    quantities[line["child_sku"]] = quantities.get(line["child_sku"], 0) + line["quantity"]
+
+        new_lists: Dict[str, Dict[str, int]] = {}
+        proposed: Dict[int, List[int]] = {}
+        rows_by_id: Dict[int, int] = {}
+        for sku, (row_idx, _) in sorted(components.items(), key=lambda item: item[1][0]):
+            quantities: Dict[str, int] = {}
+            for child_sku, qty in parsed[sku]:
+                if child_sku not in sku_ids:
+                    results["errors"].append(f"Row {row_idx}: Component SKU {child_sku} not found")
+                    continue
+                quantities[child_sku] = quantities.get(child_sku, 0) + qty
+            new_lists[sku] = quantities
+            proposed[sku_ids[sku]] = [sku_ids[child_sku] for child_sku in quantities]
+            rows_by_id[sku_ids[sku]] = row_idx
+
+        id_skus = {pid: sku for sku, pid in sku_ids.items()}
+        for pid in sorted(BomService(self.db).find_cycles(proposed), key=rows_by_id.get):
+            results["errors"].append(f"Row {rows_by_id[pid]}: Components would create a bundle cycle")
+            del new_lists[id_skus[pid]]
+
+        return {
+            sku: (_format_components(current_lists.get(sku, {})), _format_components(quantities))
+            for sku, quantities in new_lists.items()
+            if quantities != current_lists.get(sku, {})
+        }
+
+    @staticmethod
+    def _parse_components(components_str: str) -> List[Tuple[str, int]]:
+        """Parse: SKU:Qty;SKU:Qty (quantity defaults to 1)."""
+        links = []
+        for c_entry in components_str.split(";"):
+            if not c_entry.strip():
+                continue
+            parts = c_entry.split(":")
+            qty = 1
+            if len(parts) > 1:
+                try:
+                    qty = int(parts[1])
+                except ValueError:
+                    qty = 1
+            links.append((parts[0].strip(), qty))
+        return links
+
+    def _lookup_skus(self, skus) -> Dict[str, int]:
+        found: Dict[str, int] = {}
+        for batch in _batches(sorted(skus), self.chunk_size):
+            found.update(self.db.execute(select(Product.sku, Product.id).where(Product.sku.in_(batch))).all())
+        return found
@@ -1,5 +1,8 @@
-from sqlalchemy.orm import Session
-from ..models.product import Product
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import exists, func, literal, select
+from sqlalchemy.orm import Session, aliased
+from ..models.product import Product, ProductComponent
 from ..schemas.product import ProductCreate, ProductUpdate
 
 class ProductService:
@@ -7,7 +10,53 @@ class ProductService:
         self.db = db
 
     def get_products(self, skip: int = 0, limit: int = 100):
-        return self.db.query(Product).offset(skip).limit(limit).all()
+        return self.db.query(Product).order_by(Product.id).offset(skip).limit(limit).all()
+
+    def catalog_version(self) -> tuple:
+        """
+        Cheap fingerprint of everything list_products renders, for ETags:
+        products (count, last updated_at), components, and prices. Price
+        writes always add an interval or a price history row, so the max ids
+        move even when an interval's price is updated in place.
+        """
+        from ..models.pricing import BasePrice, ClientPrice, PriceHistory
+        
+        row = self.db.execute(select(
+            select(func.count(Product.id)).scalar_subquery(),
+            select(func.max(Product.updated_at)).scalar_subquery(),
+            select(func.count(ProductComponent.id)).scalar_subquery(),
+            select(func.max(ProductComponent.id)).scalar_subquery(),
+            select(func.max(BasePrice.id)).scalar_subquery(),
+            select(func.max(ClientPrice.id)).scalar_subquery(),
+            select(func.max(ClientPrice.updated_at)).scalar_subquery(),
+            select(func.max(PriceHistory.id)).scalar_subquery(),
+        )).one()
+        return tuple(str(value) for value in row)
+
+    def get_component_lists(self, product_ids: Iterable[int]) -> Dict[int, List[dict]]:
+        """
+        Direct components with child SKUs for many products in one query,
+        instead of lazy-loading product.components and each component.child.
+        """
+        product_ids = list(set(product_ids))
+        components: Dict[int, List[dict]] = {}
+        if not product_ids:
+            return components
+        rows = self.db.query(
+            ProductComponent.parent_product_id,
+            ProductComponent.child_product_id,
+            ProductComponent.quantity,
+            Product.sku
+        ).join(Product, Product.id == ProductComponent.child_product_id).filter(
+            ProductComponent.parent_product_id.in_(product_ids)
+        ).order_by(ProductComponent.id).all()
+        for parent_id, child_id, quantity, child_sku in rows:
+            components.setdefault(parent_id, []).append({
+                "child_product_id": child_id,
+                "quantity": quantity,
+                "child_sku": child_sku
+            })
+        return components
 
     def get_product(self, product_id: int):
         return self.db.query(Product).filter(Product.id == product_id).first()
@@ -35,3 +84,130 @@ class ProductService:
         self.db.commit()
         self.db.refresh(db_product)
         return db_product
+
+    def explode_bom(self, parent_ids: Iterable[int], max_depth: int = 32) -> Dict[int, List[dict]]:
+        """
+        Explode the component tree of many bundles with one recursive query.
+
+        Returns {parent_id: [line, ...]} where each line carries the component,
+        its direct parent, the per-parent quantity, the quantity rolled up to
+        one unit of the root bundle, and its depth below the root. max_depth
+        stops runaway recursion if the component graph contains a cycle.
+        """
+        parent_ids = list(set(parent_ids))
+        exploded: Dict[int, List[dict]] = {pid: [] for pid in parent_ids}
+        if not parent_ids:
+            return exploded
+
+        pc = ProductComponent
+        tree = select(
+            pc.parent_product_id.label("root_id"),
+            pc.parent_product_id.label("parent_id"),
+            pc.child_product_id.label("child_id"),
+            pc.quantity.label("quantity"),
+            pc.quantity.label("total_quantity"),
+            literal(1).label("depth")
+        ).where(pc.parent_product_id.in_(parent_ids)).cte("bom_tree", recursive=True)
+
+        tree = tree.union_all(
+            select(
+                tree.c.root_id,
+                pc.parent_product_id,
+                pc.child_product_id,
+                pc.quantity,
+                tree.c.total_quantity * pc.quantity,
+                tree.c.depth + 1
+            ).join(pc, pc.parent_product_id == tree.c.child_id).where(tree.c.depth < max_depth)
+        )
+
+        grandchild = aliased(ProductComponent)
+        stmt = select(
+            tree.c.root_id,
+            tree.c.parent_id,
+            tree.c.child_id,
+            Product.sku,
+            tree.c.quantity,
+            tree.c.total_quantity,
+            tree.c.depth,
+            ~exists().where(grandchild.parent_product_id == tree.c.child_id)
+        ).join(Product, Product.id == tree.c.child_id).order_by(tree.c.root_id, tree.c.depth, tree.c.parent_id, tree.c.child_id)
+
+        for root_id, parent_id, child_id, sku, quantity, total_quantity, depth, is_leaf in self.db.execute(stmt):
+            exploded[root_id].append({
+                "product_id": child_id,
+                "sku": sku,
+                "parent_product_id": parent_id,
+                "quantity": quantity,
+                "total_quantity": total_quantity,
+                "depth": depth,
+                "is_leaf": bool(is_leaf)
+            })
+        return exploded
+
+    def iter_export_rows(self, client_id: Optional[int] = None, as_of: Optional[date] = None, chunk_size: int = 1000) -> Iterator[list]:
+        """
+        Yield the catalog export rows (header first) without a row cap.
+
+        Products are read as plain column rows through a server-side cursor
+        in chunks of chunk_size; prices and components are loaded per chunk,
+        so memory does not grow with catalog size. With client_id the export
+        carries that client's price, otherwise the X/S/A tier prices.
+        """
+        from .quote_service import QuoteService
+
+        headers = [
+            "sku", "name", "description", "category", "unit", "min_order_qty", "lingxing_product_id",
+            "package_length", "package_width", "package_height", "package_weight",
+            "components"
+        ]
+        if client_id:
+            headers.append("your_price")
+        else:
+            headers.extend(["price_x", "price_s", "price_a"])
+        yield headers
+
+        quote_service = QuoteService(self.db)
+        stmt = select(
+            Product.id, Product.sku, Product.name, Product.description, Product.category, Product.unit,
+            Product.min_order_qty, Product.lingxing_product_id, Product.package_length,
+            Product.package_width, Product.package_height, Product.package_weight
+        ).order_by(Product.id).execution_options(yield_per=chunk_size)
+
+        for chunk in self.db.execute(stmt).partitions():
+            product_ids = [product.id for product in chunk]
+            component_lists = self.get_component_lists(product_ids)
+            if client_id:
+                client_prices = quote_service.resolve_prices(client_id, product_ids, as_of=as_of)
+            else:
+                tier_prices = quote_service.resolve_tier_prices(product_ids, as_of=as_of)
+
+            for product in chunk:
+                # Format components string: SKU:Qty;SKU:Qty
+                components_str = ";".join(
+                    f"{c['child_sku']}:{c['quantity']}" for c in component_lists.get(product.id, [])
+                )
+                row = [
+                    product.sku,
+                    product.name,
+                    product.description or "",
+                    product.category or "",
+                    product.unit,
+                    product.min_order_qty,
+                    product.lingxing_product_id or "",
+                    float(product.package_length) if product.package_length else None,
+                    float(product.package_width) if product.package_width else None,
+                    float(product.package_height) if product.package_height else None,
+                    float(product.package_weight) if product.package_weight else None,
+                    components_str
+                ]
+
+                if client_id:
+                    row.append(client_prices.get(product.id, 0.0))
+                else:
+                    prices = tier_prices.get(product.id, {})
+                    p_x = prices.get('X') or prices.get('C') or 0.0
+                    p_s = prices.get('S') or prices.get('B') or 0.0
+                    p_a = prices.get('A') or 0.0
+                    row.extend([p_x, p_s, p_a])
+
+                yield row
@@ -1,82 +1,214 @@
-from datetime import date
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+import base64
+import binascii
+from datetime import date, datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, desc, func, insert, literal, tuple_
 from ..models.quotation import Quotation, QuotationItem
 from ..models.product import Product
 from ..models.pricing import BasePrice, ClientPrice
 from ..models.client import Client
-from ..schemas.quotation import QuotationCreate, QuotationUpdate
-from typing import Optional
+from ..schemas.quotation import QuotationCreate, QuotationItemCreate, QuotationUpdate
+from .bom_service import BomService, roll_up_prices
+from .numbering import quotation_numbers
+from .price_cache import PriceSeries, client_key, price_cache, tier_key
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CENT = Decimal("0.01")
+
+
+def encode_quotation_cursor(quotation: Quotation) -> str:
+    """Opaque keyset cursor pointing at (created_at, id) of the last row served."""
+    raw = f"{quotation.created_at.isoformat()}|{quotation.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_quotation_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        created_at, quotation_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(quotation_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
 
 
 class QuoteService:
     def __init__(self, db: Session):
         self.db = db
 
-    def _get_active_price(self, client_id: int, product_id: int) -> float:
+    def _get_active_price(self, client_id: int, product_id: int, as_of: Optional[date] = None) -> float:
+        """
+        Calculate the active price for a single product and client.
+        Thin wrapper around resolve_prices() for callers pricing one item.
         """
-        Calculate the active price for a product and client.
+        return self.resolve_prices(client_id, [product_id], as_of=as_of).get(product_id, 0.0)
+
+    def resolve_prices(self, client_id: int, product_ids: Iterable[int], as_of: Optional[date] = None) -> Dict[int, float]:
+        """
+        Resolve active prices for many products of one client at once.
         Priority:
         1. Client-specific price (ClientPrice)
         2. Tier-based base price (BasePrice)
+        3. Sum of bundle component prices * quantity, where a sub-bundle
+           with its own price counts as a unit
+
+        The component tree of all unpriced bundles is loaded with one
+        recursive query, so the number of queries is constant regardless of
+        len(product_ids) or bundle depth.
         """
-        today = date.today()
-        
-        # 1. Check for client-specific price
-        client_price = self.db.query(ClientPrice).filter(
-            ClientPrice.client_id == client_id,
-            ClientPrice.product_id == product_id,
-            ClientPrice.effective_from <= today,
-            (ClientPrice.effective_to.is_(None) | (ClientPrice.effective_to >= today))
-        ).order_by(desc(ClientPrice.effective_from)).first()
-        
-        if client_price:
-            return float(client_price.price)
-            
-        # 2. Check for base price based on client tier
+        as_of = as_of or date.today()
+        product_ids = list(dict.fromkeys(product_ids))
+        if not product_ids:
+            return {}
+
         client = self.db.query(Client).filter(Client.id == client_id).first()
         if not client:
-            return 0.0 # Should probably raise error
+            return {pid: 0.0 for pid in product_ids}  # Should probably raise error
+
+        tier = client.tier or "A"  # Default to A if not set
+
+        prices = self._load_explicit_prices(client_id, tier, product_ids, as_of)
+
+        # Bundles without an explicit price fall back to their components
+        unpriced = [pid for pid in product_ids if pid not in prices]
+        edges = BomService(self.db).get_component_edges(unpriced)
+        components = {child_id for children in edges.values() for child_id, _ in children}
+        component_prices = self._load_explicit_prices(client_id, tier, components - set(product_ids), as_of)
+        component_prices.update(prices)
+
+        prices.update(roll_up_prices(unpriced, edges, component_prices))
+        return prices
+
+    def _load_explicit_prices(self, client_id: int, tier: str, product_ids: Iterable[int], as_of: date) -> Dict[int, float]:
+        """Client override wins over tier base price; products with neither are omitted."""
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+        prices = self._load_active_base_prices(tier, product_ids, as_of)
+        prices.update(self._load_active_client_prices(client_id, product_ids, as_of))
+        return prices
+
+    def _load_active_client_prices(self, client_id: int, product_ids: Iterable[int], as_of: date) -> Dict[int, float]:
+        series = self._load_price_series(
+            ClientPrice, ClientPrice.client_id, client_id, product_ids,
+            lambda product_id: client_key(client_id, product_id)
+        )
+        return self._prices_at(series, as_of)
+
+    def _load_active_base_prices(self, tier: str, product_ids: Iterable[int], as_of: date) -> Dict[int, float]:
+        series = self._load_price_series(
+            BasePrice, BasePrice.tier, tier, product_ids,
+            lambda product_id: tier_key(tier, product_id)
+        )
+        return self._prices_at(series, as_of)
+
+    def _load_price_series(self, model, scope_column, scope_value, product_ids: Iterable[int], make_key) -> Dict[int, PriceSeries]:
+        """
+        Return the full effective-interval history per product, served from
+        the price cache and loading all misses in a single query.
+        """
+        series: Dict[int, PriceSeries] = {}
+        missing = []
+        for product_id in product_ids:
+            cached = price_cache.get(make_key(product_id))
+            if cached is None:
+                missing.append(product_id)
+            else:
+                series[product_id] = cached
+
+        if missing:
+            loaded: Dict[int, list] = {product_id: [] for product_id in missing}
+            rows = self.db.query(model.product_id, model.effective_from, model.effective_to, model.price).filter(
+                scope_column == scope_value,
+                model.product_id.in_(missing)
+            ).all()
+            for product_id, effective_from, effective_to, price in rows:
+                loaded[product_id].append((effective_from, effective_to, float(price)))
+            for product_id, intervals in loaded.items():
+                series[product_id] = PriceSeries(intervals)
+                price_cache.put(make_key(product_id), series[product_id])
+
+        return series
+
+    @staticmethod
+    def _prices_at(series: Dict[int, PriceSeries], as_of: date) -> Dict[int, float]:
+        prices = {}
+        for product_id, intervals in series.items():
+            price = intervals.price_at(as_of)
+            if price is not None:
+                prices[product_id] = price
+        return prices
+
+    def resolve_tier_prices(self, product_ids: Iterable[int], as_of: Optional[date] = None) -> Dict[int, Dict[str, float]]:
+        """
+        Base price per tier for each product at as_of, e.g. {12: {"X": 9.5, "S": 9.0}}.
+        All tiers are loaded in one query and the series are fed to the price cache.
+        """
+        as_of = as_of or date.today()
+        product_ids = list(dict.fromkeys(product_ids))
+        if not product_ids:
+            return {}
+
+        loaded: Dict[tuple, list] = {}
+        rows = self.db.query(
+            BasePrice.product_id, BasePrice.tier, BasePrice.effective_from, BasePrice.effective_to, BasePrice.price
+        ).filter(BasePrice.product_id.in_(product_ids)).all()
+        for product_id, tier, effective_from, effective_to, price in rows:
+            loaded.setdefault((tier, product_id), []).append((effective_from, effective_to, float(price)))
+
+        tier_prices: Dict[int, Dict[str, float]] = {product_id: {} for product_id in product_ids}
+        for (tier, product_id), intervals in loaded.items():
+            series = PriceSeries(intervals)
+            price_cache.put(tier_key(tier, product_id), series)
+            price = series.price_at(as_of)
+            if price is not None:
+                tier_prices[product_id][tier] = price
+        return tier_prices
+
+    @staticmethod
+    def _build_item_rows(quotation_id: int, items: List[QuotationItemCreate], prices: Dict[int, float]) -> Tuple[List[dict], Decimal]:
+        """
+        Build QuotationItem rows and the exact Decimal quotation total.
+
+        A submitted unit_price > 0 is trusted (sales may quote their own price);
+        otherwise the resolved price is used.
+        """
+        rows = []
+        total_amount = Decimal(0)
+        for item_in in items:
+            unit_price = item_in.unit_price
+            if unit_price <= 0:
+                unit_price = Decimal(str(prices.get(item_in.product_id, 0.0)))
+            unit_price = unit_price.quantize(CENT, rounding=ROUND_HALF_UP)
             
-        tier = client.tier or "A" # Default to A if not set
-        
-        base_price = self.db.query(BasePrice).filter(
-            BasePrice.product_id == product_id,
-            BasePrice.tier == tier,
-            BasePrice.effective_from <= today,
-            (BasePrice.effective_to.is_(None) | (BasePrice.effective_to >= today))
-        ).order_by(desc(BasePrice.effective_from)).first()
-        
-        if base_price:
-            return float(base_price.price)
+            rows.append({
+                "quotation_id": quotation_id,
+                "product_id": item_in.product_id,
+                "quantity": item_in.quantity,
+                "unit_price": unit_price,
+                "discount_percent": item_in.discount_percent,
+                "notes": item_in.notes
+            })
             
-        # 3. Fallback: Check for bundle components
-        # If no explicit price, sum up component prices * quantity
-        if product_id:
-             # Need to fetch product to check components
-             # Optimization: Join components eagerly? 
-             # For now, lazy load is fine as depth is usually 1.
-             product = self.db.query(Product).filter(Product.id == product_id).first()
-             if product and product.components:
-                 bundle_price = 0.0
-                 for component in product.components:
-                     # Recursive call for each child
-                     child_price = self._get_active_price(client_id, component.child_product_id)
-                     bundle_price += child_price * component.quantity
-                 
-                 if bundle_price > 0:
-                     return bundle_price
+            # Line total: quantity * unit_price * (1 - discount_percent / 100)
+            total_amount += item_in.quantity * unit_price * (1 - item_in.discount_percent / 100)
             
-        return 0.0
+        return rows, total_amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+    def _next_quotation_number(self) -> str:
+        return quotation_numbers.next_number(self.db)
 
     def create_quotation(self, quote_in: QuotationCreate, user_id: int) -> Quotation:
+        db_quote = self.add_quotation(quote_in, user_id)
+        self.db.commit()
+        self.db.refresh(db_quote)
+        return db_quote
+
+    def add_quotation(self, quote_in: QuotationCreate, user_id: int) -> Quotation:
+        """Insert a quotation and its items and flush, leaving the commit to the caller."""
         # Create quote record
-        # Generate generic quote number for now (should be better logic)
-        import uuid
-        quote_number = f"Q-{uuid.uuid4().hex[:8].upper()}"
-        
         db_quote = Quotation(
-            quotation_number=quote_number,
+            quotation_number=self._next_quotation_number(),
             client_id=quote_in.client_id,
             valid_until=quote_in.valid_until,
             notes=quote_in.notes,
@@ -87,47 +219,185 @@ class QuoteService:
         self.db.add(db_quote)
         self.db.flush() # Flush to get ID
         
-        total_amount = 0.0
+        # Price every line that needs it in one batch
+        prices = self.resolve_prices(
+            quote_in.client_id,
+            [item.product_id for item in quote_in.items if item.unit_price <= 0]
+        )
         
-        for item_in in quote_in.items:
-            # Calculate price
-            unit_price = self._get_active_price(quote_in.client_id, item_in.product_id)
-            
-            # Override if provided (business decision: do we allow sales to override?)
-            # For now, let's assume the service calculates it, 
-            # but if the schema allows passing price, we might use it. 
-            # The schema QuotationItemCreate actually asks for unit_price. 
-            # If the user provides it, we use it. If 0/null, we fetch it?
-            # Creating schema required unit_price.
-            # Let's assume the frontend might ask for a price check first, OR 
-            # we respect the submitted price but validate it.
-            # For this implementation, I will trust the submitted price if > 0, else calculate.
-            
-            final_unit_price = float(item_in.unit_price)
-            if final_unit_price <= 0:
-                final_unit_price = unit_price
-            
-            db_item = QuotationItem(
-                quotation_id=db_quote.id,
-                product_id=item_in.product_id,
-                quantity=item_in.quantity,
-                unit_price=final_unit_price,
-                discount_percent=item_in.discount_percent,
-                notes=item_in.notes
-            )
-            self.db.add(db_item)
-            
-            # Calculate line total
-            line_total = float(item_in.quantity) * final_unit_price * (1 - float(item_in.discount_percent) / 100)
-            total_amount += line_total
+        item_rows, total_amount = self._build_item_rows(db_quote.id, quote_in.items, prices)
+        
+        # Single multi-row INSERT for all lines
+        if item_rows:
+            self.db.execute(insert(QuotationItem), item_rows)
             
         db_quote.total_amount = total_amount
-        self.db.commit()
-        self.db.refresh(db_quote)
+        self.db.flush()
         return db_quote
 
-    def get_quotations(self, skip: int = 0, limit: int = 100, client_id: Optional[int] = None, sales_rep_id: Optional[int] = None):
-        query = self.db.query(Quotation)
+    def create_quotations_bulk(self, quotes: List[QuotationCreate], user_id: int, batch_size: int = 100) -> List[dict]:
+        """
+        Create many quotations at once.
+
+        Prices for all quotes are resolved together (see resolve_prices_bulk)
+        and quotes are inserted in transactions of batch_size. A failing batch
+        is rolled back and reported per quote; other batches still commit.
+        Returns one result dict per submitted quote, in order.
+        """
+        results = [{"index": idx} for idx in range(len(quotes))]
+
+        client_ids = {quote_in.client_id for quote_in in quotes}
+        known_clients = {
+            client_id for (client_id,) in self.db.query(Client.id).filter(Client.id.in_(client_ids))
+        }
+
+        wanted: Dict[int, set] = {}
+        valid = []
+        for idx, quote_in in enumerate(quotes):
+            if quote_in.client_id not in known_clients:
+                results[idx]["error"] = f"Client {quote_in.client_id} not found"
+                continue
+            valid.append(idx)
+            wanted.setdefault(quote_in.client_id, set()).update(
+                item.product_id for item in quote_in.items if item.unit_price <= 0
+            )
+
+        prices = self.resolve_prices_bulk(wanted)
+
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            try:
+                db_quotes = []
+                for idx in batch:
+                    quote_in = quotes[idx]
+                    db_quotes.append(Quotation(
+                        quotation_number=self._next_quotation_number(),
+                        client_id=quote_in.client_id,
+                        valid_until=quote_in.valid_until,
+                        notes=quote_in.notes,
+                        currency=quote_in.currency,
+                        created_by=user_id,
+                        status="draft"
+                    ))
+                self.db.add_all(db_quotes)
+                self.db.flush()  # Flush to get IDs
+
+                item_rows = []
+                for idx, db_quote in zip(batch, db_quotes):
+                    quote_in = quotes[idx]
+                    rows, db_quote.total_amount = self._build_item_rows(
+                        db_quote.id, quote_in.items, prices.get(quote_in.client_id, {})
+                    )
+                    item_rows.extend(rows)
+                if item_rows:
+                    self.db.execute(insert(QuotationItem), item_rows)
+
+                # Read before commit expires the instances
+                created = [
+                    {"quotation_id": q.id, "quotation_number": q.quotation_number, "total_amount": q.total_amount}
+                    for q in db_quotes
+                ]
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                for idx in batch:
+                    results[idx]["error"] = str(e)
+                continue
+
+            for idx, result in zip(batch, created):
+                results[idx].update(result)
+
+        return results
+
+    def resolve_prices_bulk(self, wanted: Dict[int, Iterable[int]], as_of: Optional[date] = None) -> Dict[int, Dict[int, float]]:
+        """
+        Resolve prices for many clients at once: {client_id: {product_id: price}}.
+        Tier base prices are looked up once per tier and shared by every client
+        in that tier; client overrides are loaded with one query per pass.
+        """
+        as_of = as_of or date.today()
+        wanted = {client_id: set(product_ids) for client_id, product_ids in wanted.items()}
+        if not wanted:
+            return {}
+
+        tiers = {
+            client_id: tier or "A"  # Default to A if not set
+            for client_id, tier in self.db.query(Client.id, Client.tier).filter(Client.id.in_(wanted.keys()))
+        }
+
+        def explicit_prices(requested: Dict[int, set]) -> Dict[int, Dict[int, float]]:
+            by_tier: Dict[str, set] = {}
+            for client_id, product_ids in requested.items():
+                if client_id in tiers:
+                    by_tier.setdefault(tiers[client_id], set()).update(product_ids)
+            tier_prices = {
+                tier: self._load_active_base_prices(tier, product_ids, as_of)
+                for tier, product_ids in by_tier.items() if product_ids
+            }
+
+            overrides: Dict[Tuple[int, int], float] = {}
+            all_products = set().union(*requested.values())
+            if all_products:
+                rows = self.db.query(ClientPrice.client_id, ClientPrice.product_id, ClientPrice.price).filter(
+                    ClientPrice.client_id.in_(requested.keys()),
+                    ClientPrice.product_id.in_(all_products),
+                    ClientPrice.effective_from <= as_of,
+                    (ClientPrice.effective_to.is_(None) | (ClientPrice.effective_to >= as_of))
+                ).order_by(ClientPrice.effective_from).all()
+                for client_id, product_id, price in rows:
+                    overrides[(client_id, product_id)] = float(price)
+
+            resolved = {}
+            for client_id, product_ids in requested.items():
+                base = tier_prices.get(tiers.get(client_id), {})
+                prices = {}
+                for product_id in product_ids:
+                    if (client_id, product_id) in overrides:
+                        prices[product_id] = overrides[(client_id, product_id)]
+                    elif product_id in base:
+                        prices[product_id] = base[product_id]
+                resolved[client_id] = prices
+            return resolved
+
+        prices = explicit_prices(wanted)
+
+        # Bundles without an explicit price fall back to their components
+        unpriced = {
+            client_id: {pid for pid in product_ids if pid not in prices[client_id]}
+            for client_id, product_ids in wanted.items()
+        }
+        edges = BomService(self.db).get_component_edges(set().union(*unpriced.values()))
+        components = {child_id for children in edges.values() for child_id, _ in children}
+        component_prices = explicit_prices({
+            client_id: components - wanted[client_id] for client_id in unpriced if unpriced[client_id]
+        })
+
+        for client_id, product_ids in unpriced.items():
+            if product_ids:
+                explicit = {**component_prices[client_id], **prices[client_id]}
+                prices[client_id].update(roll_up_prices(product_ids, edges, explicit))
+
+        return prices
+
+    def get_quotations(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        client_id: Optional[int] = None,
+        sales_rep_id: Optional[int] = None,
+        status: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        cursor: Optional[str] = None
+    ) -> List[Quotation]:
+        """
+        List quotations newest first, ordered by (created_at, id).
+        With a cursor (see encode_quotation_cursor) the page starts right after
+        the cursor row using a keyset condition, so deep pages cost the same
+        as the first one; skip is ignored in that case. Items are eager-loaded
+        in one extra query.
+        """
+        query = self.db.query(Quotation).options(selectinload(Quotation.items))
         
         if client_id:
             query = query.filter(Quotation.client_id == client_id)
@@ -135,7 +405,32 @@ class QuoteService:
         if sales_rep_id:
             query = query.join(Client).filter(Client.sales_rep_id == sales_rep_id)
             
-        return query.offset(skip).limit(limit).all()
+        if status:
+            query = query.filter(Quotation.status == status)
+        if date_from:
+            query = query.filter(Quotation.created_at >= date_from)
+        if date_to:
+            query = query.filter(Quotation.created_at < date_to + timedelta(days=1))
+            
+        created_column = Quotation.created_at
+        is_sqlite = self.db.get_bind().dialect.name == "sqlite"
+        if is_sqlite:
+            # SQLite compares timestamps as text: CURRENT_TIMESTAMP stores
+            # "YYYY-MM-DD HH:MM:SS" while bound datetimes carry ".ffffff", so
+            # the cursor row would sort before its own cursor. Compare (and
+            # order) on julianday() instead.
+            created_column = func.julianday(Quotation.created_at)
+        query = query.order_by(created_column.desc(), Quotation.id.desc())
+        
+        if cursor:
+            created_at, quotation_id = decode_quotation_cursor(cursor)
+            if is_sqlite:
+                created_at = func.julianday(literal(created_at, Quotation.created_at.type))
+            query = query.filter(tuple_(created_column, Quotation.id) < tuple_(created_at, quotation_id))
+        else:
+            query = query.offset(skip)
+            
+        return query.limit(limit).all()
 
     def get_quotation(self, quotation_id: int):
         return self.db.query(Quotation).filter(Quotation.id == quotation_id).first()
@@ -0,0 +1,112 @@
+"""
+In-memory revocation list for claims tokens.
+
+A claims token (settings.ACCESS_TOKEN_CLAIMS) is valid while its "tv"
+claim equals the user's token_version, so a deleted user's tokens are
+revoked. Every user is listed as {user_id: token_version} (two integers
+per user); each process reloads the list every
+TOKEN_REVOCATION_REFRESH_SECONDS and right after committing a bump
+itself. An id missing from the list (a user registered since) is looked
+up once and remembered until the next reload. token_version is bumped by
+revoke_user_tokens() and automatically when a user's email, role, client
+or active flag changes, or their role is renamed, since tokens carry
+those claims; deleting a user reloads the list.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.user import Role, User
+
+# Changes to these make the claims in outstanding tokens stale
+_CLAIM_ATTRIBUTES = ("email", "role_id", "client_id", "is_active")
+
+
+class TokenRevocationList:
+    def __init__(self, refresh_seconds: int = 30):
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[int, Optional[int]] = {}  # None: no such user
+        self._loaded_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def is_revoked(self, db: Session, user_id: int, token_version: int) -> bool:
+        if time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self.refresh(db)
+        with self._lock:
+            known = user_id in self._versions
+            version = self._versions.get(user_id)
+        if not known:
+            version = self._lookup(db, user_id)
+        return version is None or token_version != version
+
+    def refresh(self, db: Session):
+        versions = {
+            user_id: token_version or 0
+            for user_id, token_version in db.execute(select(User.id, User.token_version))
+        }
+        with self._lock:
+            self._versions = versions
+            self._loaded_at = time.monotonic()
+
+    def _lookup(self, db: Session, user_id: int) -> Optional[int]:
+        row = db.execute(select(User.token_version).where(User.id == user_id)).first()
+        version = None if row is None else (row.token_version or 0)
+        with self._lock:
+            self._versions[user_id] = version
+        return version
+
+    def mark_stale(self):
+        with self._lock:
+            self._loaded_at = float("-inf")
+
+    def __len__(self):
+        return len(self._versions)
+
+
+revocation_list = TokenRevocationList(refresh_seconds=settings.TOKEN_REVOCATION_REFRESH_SECONDS)
+
+
+def revoke_user_tokens(db: Session, user_id: int):
+    """Invalidate every claims token issued to the user so far; commits."""
+    db.execute(update(User).where(User.id == user_id).values(token_version=User.token_version + 1))
+    db.info["token_versions_changed"] = True
+    db.commit()
+
+
+@event.listens_for(User, "before_update")
+def _bump_on_claim_change(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _CLAIM_ATTRIBUTES):
+        target.token_version = User.token_version + 1
+        Session.object_session(target).info["token_versions_changed"] = True
+
+
+@event.listens_for(Role, "after_update")
+def _bump_on_role_rename(mapper, connection, target):
+    if not inspect(target).attrs.name.history.has_changes():
+        return
+    connection.execute(
+        update(User.__table__).where(User.__table__.c.role_id == target.id)
+        .values(token_version=User.__table__.c.token_version + 1)
+    )
+    Session.object_session(target).info["token_versions_changed"] = True
+
+
+@event.listens_for(User, "after_delete")
+def _revoke_on_delete(mapper, connection, target):
+    Session.object_session(target).info["token_versions_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session):
+    if session.info.pop("token_versions_changed", False):
+        revocation_list.mark_stale()
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_rollback(session):
+    session.info.pop("token_versions_changed", None)
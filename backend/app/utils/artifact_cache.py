@@ -0,0 +1,76 @@
+"""
+Per-process cache of generated static files (templates, blank forms) and
+conditional GET helpers.
+
+An artifact is built on first request and served from memory afterwards
+with an ETag and Cache-Control, answering If-None-Match with 304. Passing
+a version (the inputs the file is generated from) gives every process the
+same ETag even though generated zip files embed timestamps.
+"""
+import hashlib
+import threading
+from typing import Callable, Dict, Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+
+class Artifact(NamedTuple):
+    content: bytes
+    media_type: str
+    etag: str
+    filename: Optional[str] = None
+
+
+_artifacts: Dict[str, Artifact] = {}
+_lock = threading.Lock()
+
+
+def make_etag(*parts: Hashable, weak: bool = False) -> str:
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def get_artifact(
+    name: str,
+    build: Callable[[], bytes],
+    media_type: str,
+    filename: Optional[str] = None,
+    version: Optional[Hashable] = None
+) -> Artifact:
+    """Return the cached artifact, building it once per process."""
+    artifact = _artifacts.get(name)
+    if artifact is not None:
+        return artifact
+    with _lock:
+        artifact = _artifacts.get(name)
+        if artifact is None:
+            content = build()
+            etag = make_etag(name, version) if version is not None else f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+            artifact = Artifact(content, media_type, etag, filename)
+            _artifacts[name] = artifact
+    return artifact
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check with weak comparison (RFC 9110 13.1.2)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def artifact_response(request: Request, artifact: Artifact, max_age: int = 3600) -> Response:
+    cache_control = f"public, max-age={max_age}"
+    if etag_matches(request, artifact.etag):
+        return not_modified(artifact.etag, cache_control)
+    headers = {"ETag": artifact.etag, "Cache-Control": cache_control}
+    if artifact.filename:
+        headers["Content-Disposition"] = f"attachment; filename={artifact.filename}"
+    return Response(content=artifact.content, media_type=artifact.media_type, headers=headers)
@@ -0,0 +1,18 @@
+"""Streaming CSV writer for large exports."""
+import csv
+import io
+from datetime import date
+from typing import Iterable, Iterator, Sequence
+
+
+def stream_csv(rows: Iterable[Sequence], flush_every: int = 500) -> Iterator[bytes]:
+    """Yield UTF-8 CSV bytes every flush_every rows (dates as ISO strings)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([value.isoformat() if isinstance(value, date) else value for value in row])
+        if count % flush_every == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
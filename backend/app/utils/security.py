@@ -1,5 +1,10 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Any, Callable, Dict, Optional, Union
 from jose import jwt
 from passlib.context import CryptContext
 from ..config import settings
@@ -15,12 +20,111 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+class PasswordHashBusy(Exception):
+    """The password hashing queue is full."""
+
+
+class PasswordHashExecutor:
+    """
+    Bounded thread pool for argon2 so async handlers never hash on the event
+    loop. argon2-cffi releases the GIL, so max_workers hashes run in
+    parallel; at most max_queue more wait, beyond that calls fail fast with
+    PasswordHashBusy instead of piling up memory-hungry work.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: int = 256):
+        max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.pending = 0  # queued + running
+        self.running = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHashBusy()
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        submitted = time.monotonic()
+
+        def timed():
+            started = time.monotonic()
+            with self._lock:
+                self.running += 1
+                self.wait_seconds += started - submitted
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.hash_seconds += time.monotonic() - started
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            done = max(self.completed, 1)
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "queued": self.pending - self.running,
+                "peak_pending": self.peak_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_seconds * 1000 / done, 2),
+                "avg_hash_ms": round(self.hash_seconds * 1000 / done, 2),
+            }
+
+
+password_hasher = PasswordHashExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
+
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None
+) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"sub": str(subject), "exp": expire}
+    to_encode = dict(claims or {}, sub=str(subject), exp=expire)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+
+def user_token_claims(user) -> Dict[str, Any]:
+    """Claims that let get_current_user authorize without a database lookup."""
+    return {
+        "uid": user.id,
+        "rid": user.role_id,
+        "role": user.role.name if user.role else None,
+        "cid": user.client_id,
+        "tv": user.token_version or 0,
+    }
@@ -0,0 +1,63 @@
+"""
+Background job worker.
+
+    python -m app.worker          # poll forever
+    python -m app.worker --once   # drain the queue and exit
+
+Run as many workers as needed; jobs are claimed with SKIP LOCKED so each
+job runs once. Database errors (a restart, a dropped connection) are logged
+and retried with exponential backoff instead of stopping the worker.
+"""
+import argparse
+import logging
+import os
+import socket
+import time
+
+from .config import settings
+from .database import SessionLocal
+from .services.job_service import JobService
+
+logger = logging.getLogger("app.worker")
+
+MAX_BACKOFF_SECONDS = 60.0
+
+
+def run_worker(once: bool = False):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Worker %s started", worker_id)
+    failures = 0
+    while True:
+        job = None
+        db = SessionLocal()
+        try:
+            service = JobService(db)
+            requeued = service.requeue_stale(settings.JOB_STALE_AFTER_SECONDS, settings.JOB_MAX_ATTEMPTS)
+            if requeued:
+                logger.warning("Requeued %s stale job(s)", requeued)
+            job = service.claim_next(worker_id)
+            if job is not None:
+                logger.info("Running job %s (%s)", job.id, job.kind)
+                service.run(job)
+        except Exception:
+            failures += 1
+            backoff = min(settings.JOB_POLL_INTERVAL_SECONDS * 2 ** failures, MAX_BACKOFF_SECONDS)
+            logger.exception("Worker loop failed; retrying in %.1fs", backoff)
+            time.sleep(backoff)
+            continue
+        finally:
+            db.close()
+        failures = 0
+
+        if job is None:
+            if once:
+                return
+            time.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SmartQuote background job worker")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run_worker(once=args.once)
@@ -0,0 +1,127 @@
+"""
+Peak memory and time-to-first-byte of the product catalog XLSX export.
+
+Fills a scratch SQLite database with --products priced products, then runs
+each writer in its own process so peak RSS is measured separately:
+
+    python bench_catalog_export.py --products 200000
+
+"stream" is the current export (ProductService.iter_export_rows fed to
+utils.xlsx_stream); "workbook" writes the same rows into an in-memory
+openpyxl Workbook saved to a BytesIO, as the export did before, so its
+first byte is only available once the whole file is built.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200000)
+    parser.add_argument("--mode", choices=["stream", "workbook"], help=argparse.SUPPRESS)
+    parser.add_argument("--database-url", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+args = parse_args()
+if args.database_url is None:
+    args.database_url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ.pop("POSTGRES_URL", None)
+os.environ["DATABASE_URL"] = args.database_url
+os.environ["DEBUG"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import insert
+
+from app.database import Base, SessionLocal, engine
+from app.models import BasePrice, Product
+from app.services.product_service import ProductService
+from app.utils.xlsx_stream import stream_xlsx
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def seed(n_products, batch=20000):
+    Base.metadata.create_all(bind=engine)
+    start = date.today() - timedelta(days=30)
+    with SessionLocal() as db:
+        for lo in range(0, n_products, batch):
+            db.execute(insert(Product), [
+                {"sku": f"SKU-{idx:07d}", "name": f"Product {idx}", "category": "Bench", "unit": "pcs",
+                 "package_length": 10, "package_width": 20, "package_height": 5, "package_weight": 1.25}
+                for idx in range(lo, min(lo + batch, n_products))
+            ])
+        product_ids = [row.id for row in db.query(Product.id)]
+        for lo in range(0, len(product_ids), batch):
+            db.execute(insert(BasePrice), [
+                {"product_id": pid, "tier": tier, "price": 9.99, "effective_from": start}
+                for pid in product_ids[lo:lo + batch] for tier in ("X", "S", "A")
+            ])
+        db.commit()
+
+
+def run(mode):
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    with SessionLocal() as db:
+        rows = ProductService(db).iter_export_rows()
+        if mode == "stream":
+            for chunk in stream_xlsx(rows, sheet_title="Products Export"):
+                if first_byte is None and chunk:
+                    first_byte = time.perf_counter() - started
+                size += len(chunk)
+        else:
+            from openpyxl import Workbook
+
+            wb = Workbook()
+            ws = wb.active
+            ws.title = "Products Export"
+            for row in rows:
+                ws.append(row)
+            buffer = io.BytesIO()
+            wb.save(buffer)
+            first_byte = time.perf_counter() - started
+            size = len(buffer.getvalue())
+    print(json.dumps({
+        "mode": mode,
+        "ttfb_s": round(first_byte, 3),
+        "total_s": round(time.perf_counter() - started, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+        "bytes": size,
+    }))
+
+
+def main():
+    if args.mode:
+        run(args.mode)
+        return
+    seed(args.products)
+    print(f"{args.products} products")
+    print(f"{'mode':<10} {'ttfb s':>8} {'total s':>8} {'peak RSS MB':>12} {'growth MB':>10} {'bytes':>12}")
+    for mode in ("stream", "workbook"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--database-url", args.database_url],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:<10} {result['ttfb_s']:>8} {result['total_s']:>8} {result['peak_rss_mb']:>12} "
+            f"{result['rss_growth_mb']:>10} {result['bytes']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Throughput of API endpoints under concurrent load.
+
+Start the API (uvicorn app.main:app, one worker) in the setup to compare,
+e.g. with ASYNC_DATABASE=false and then true, and run from the backend
+directory (the cold-token run signs tokens with the app's SECRET_KEY):
+
+    python bench_db_throughput.py --email admin@example.com --password secret
+
+Keeps --concurrency requests in flight for --seconds against each --path,
+then against POST /api/quotes/ (a write: one quotation per request) and
+against --cold-path with a fresh token per request (every request misses
+the principal cache and authenticates against the database). Prints
+requests/s and latency percentiles per run.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+import httpx
+
+DEFAULT_PATHS = ["/api/products/?limit=50", "/api/quotes/?limit=50", "/api/users/me"]
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def worker(send, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await send()
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.TimeoutException:
+            errors.append("timeout")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def measure(label, send, args):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(send, deadline, latencies, errors) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<36} {len(latencies) / elapsed:8.1f} req/s  "
+        f"p50={percentile(latencies, 50):7.1f}ms p99={percentile(latencies, 99):7.1f}ms "
+        f"errors={len(errors)}"
+    )
+
+
+async def first_id(client, path, headers):
+    rows = (await client.get(path, headers=headers)).json()
+    if not rows:
+        raise SystemExit(f"{path} returned nothing; seed the database first")
+    return rows[0]["id"]
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 5)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        token = (await client.post(
+            "/api/auth/login", data={"username": args.email, "password": args.password}
+        )).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await client.get(args.paths[0], headers=headers)  # warm up caches and pools
+
+        for path in args.paths:
+            await measure(f"GET {path}", lambda path=path: client.get(path, headers=headers), args)
+
+        if args.write:
+            quote = {
+                "client_id": await first_id(client, "/api/clients/?limit=1", headers),
+                "items": [{
+                    "product_id": await first_id(client, "/api/products/?limit=1", headers),
+                    "quantity": 1,
+                    "unit_price": "10.00",
+                }],
+            }
+            await measure("POST /api/quotes/", lambda: client.post("/api/quotes/", json=quote, headers=headers), args)
+
+        if args.cold_token:
+            from app.utils.security import create_access_token
+
+            # A unique claim makes every token new to the principal cache
+            counter = itertools.count()
+
+            def cold_get():
+                cold = create_access_token(subject=args.email, claims={"jti": next(counter)})
+                return client.get(args.cold_path, headers={"Authorization": f"Bearer {cold}"})
+
+            await measure(f"GET {args.cold_path} (cold token)", cold_get, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--write", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--cold-token", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--cold-path", default="/api/users/me")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""
+Latency of an unrelated endpoint during a burst of logins.
+
+Start the API (uvicorn app.main:app), then:
+
+    python bench_login_burst.py --email admin@example.com --password secret
+
+The pool counters are read from /health/password-hashing, which needs an
+admin account.
+
+Probes --probe-path every --probe-interval seconds, first alone and then
+while --logins concurrent logins run, and prints p50/p95/p99 for both
+phases plus the password hashing pool counters.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def summary(name, latencies_ms):
+    print(
+        f"{name:<12} n={len(latencies_ms):<5} "
+        f"p50={percentile(latencies_ms, 50):7.1f}ms p95={percentile(latencies_ms, 95):7.1f}ms "
+        f"p99={percentile(latencies_ms, 99):7.1f}ms max={max(latencies_ms, default=float('nan')):7.1f}ms"
+    )
+
+
+async def probe(client, path, interval, stop):
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login(client, email, password):
+    started = time.perf_counter()
+    response = await client.post("/api/auth/login", data={"username": email, "password": password})
+    return response.status_code, (time.perf_counter() - started) * 1000
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.logins + 10)
+    async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limits) as client:
+        stop = asyncio.Event()
+        baseline = asyncio.create_task(probe(client, args.probe_path, args.probe_interval, stop))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        summary("baseline", await baseline)
+
+        stop = asyncio.Event()
+        during = asyncio.create_task(probe(client, args.probe_path, args.probe_interval, stop))
+        started = time.perf_counter()
+        results = await asyncio.gather(*(login(client, args.email, args.password) for _ in range(args.logins)))
+        burst_seconds = time.perf_counter() - started
+        stop.set()
+        summary("during burst", await during)
+
+        codes = statistics.multimode([code for code, _ in results])
+        summary("logins", [ms for _, ms in results])
+        print(f"burst: {args.logins} logins in {burst_seconds:.2f}s, status codes {sorted(set(code for code, _ in results))} (most common {codes})")
+        token = (await client.post("/api/auth/login", data={"username": args.email, "password": args.password})).json()
+        headers = {"Authorization": f"Bearer {token.get('access_token')}"}
+        print("password hashing:", (await client.get("/health/password-hashing", headers=headers)).json())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--probe-path", default="/health")
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    parser.add_argument("--baseline-seconds", type=float, default=3.0)
+    asyncio.run(main(parser.parse_args()))
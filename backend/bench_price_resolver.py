@@ -0,0 +1,114 @@
+"""
+Query count and latency of the batch price resolver.
+
+Fills a scratch database (a temporary SQLite file unless --database-url
+points at an empty database) with a catalog where every tenth product is a
+bundle, then prices 100/1k/10k products for one client:
+
+    python bench_price_resolver.py --sizes 100 1000 10000
+
+"per product" calls _get_active_price once per product, the access pattern
+list_products and the XLSX export had before; "batch" is one
+resolve_prices() call. The price cache is cleared before every run.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--per-product-limit", type=int, default=10000, help="skip the per-product run above this size")
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ.pop("POSTGRES_URL", None)
+os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["DEBUG"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event, insert
+
+from app.database import Base, SessionLocal, engine
+from app.models import BasePrice, Client, ClientPrice, Product, ProductComponent
+from app.services.price_cache import price_cache
+from app.services.quote_service import QuoteService
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._on_execute)
+
+
+def seed(db, n_products):
+    rng = random.Random(1)
+    start = date.today() - timedelta(days=30)
+    client = Client(company_name="Bench client", tier="S")
+    db.add(client)
+    db.flush()
+    db.execute(insert(Product), [{"sku": f"B{idx}", "name": f"Bench {idx}"} for idx in range(n_products)])
+    product_ids = [row.id for row in db.query(Product.id).order_by(Product.id)]
+
+    bundles = set(product_ids[::10][1:])
+    components = []
+    for parent_id in bundles:
+        for child_id in rng.sample([pid for pid in product_ids if pid < parent_id and pid not in bundles][:200], 3):
+            components.append({"parent_product_id": parent_id, "child_product_id": child_id, "quantity": rng.randint(1, 4)})
+    db.execute(insert(ProductComponent), components)
+    db.execute(insert(BasePrice), [
+        {"product_id": pid, "tier": tier, "price": rng.randint(100, 10000) / 100, "effective_from": start}
+        for pid in product_ids if pid not in bundles for tier in ("X", "S", "A")
+    ])
+    db.execute(insert(ClientPrice), [
+        {"client_id": client.id, "product_id": pid, "price": rng.randint(100, 10000) / 100, "effective_from": start}
+        for pid in rng.sample(product_ids, n_products // 20)
+    ])
+    db.commit()
+    return client.id, product_ids
+
+
+def measure(fn):
+    price_cache.clear()
+    with QueryCounter() as counter:
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+    return counter.count, elapsed * 1000
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    client_id, product_ids = seed(db, max(args.sizes))
+    service = QuoteService(db)
+
+    print(f"{'products':>8}  {'mode':<12} {'queries':>8} {'ms':>10}")
+    for size in args.sizes:
+        ids = product_ids[:size]
+        queries, ms = measure(lambda: service.resolve_prices(client_id, ids))
+        print(f"{size:>8}  {'batch':<12} {queries:>8} {ms:>10.1f}")
+        if size <= args.per_product_limit:
+            queries, ms = measure(lambda: [service._get_active_price(client_id, pid) for pid in ids])
+            print(f"{size:>8}  {'per product':<12} {queries:>8} {ms:>10.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
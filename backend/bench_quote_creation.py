@@ -0,0 +1,130 @@
+"""
+Time and query count of creating large quotations.
+
+Fills a scratch database (a temporary SQLite file unless --database-url
+points at an empty database) with priced products, then creates quotes of
+1k and 5k lines whose unit prices must be resolved:
+
+    python bench_quote_creation.py --lines 1000 5000
+
+"per line" replays the previous create_quotation loop (a price lookup
+and an ORM add per line, float totals); "batch" is the current
+QuoteService.create_quotation. The price cache is cleared before every run.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from functools import partial
+from datetime import date, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--lines", nargs="+", type=int, default=[1000, 5000])
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ.pop("POSTGRES_URL", None)
+os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["DEBUG"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from decimal import Decimal
+
+from sqlalchemy import event, insert
+
+from app.database import Base, SessionLocal, engine
+from app.models import BasePrice, Client, Product, Quotation, QuotationItem
+from app.schemas.quotation import QuotationCreate
+from app.services.price_cache import price_cache
+from app.services.quote_service import QuoteService
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._on_execute)
+
+
+def seed(db, n_products):
+    rng = random.Random(1)
+    client = Client(company_name="Bench client", tier="S")
+    db.add(client)
+    db.flush()
+    db.execute(insert(Product), [{"sku": f"B{idx}", "name": f"Bench {idx}"} for idx in range(n_products)])
+    product_ids = [row.id for row in db.query(Product.id).order_by(Product.id)]
+    db.execute(insert(BasePrice), [
+        {"product_id": pid, "tier": "S", "price": rng.randint(100, 10000) / 100,
+         "effective_from": date.today() - timedelta(days=30)}
+        for pid in product_ids
+    ])
+    db.commit()
+    return client.id, product_ids
+
+
+def create_per_line(service: QuoteService, quote_in: QuotationCreate, user_id=None) -> Quotation:
+    """The create_quotation loop before batching, kept here for comparison."""
+    db = service.db
+    db_quote = Quotation(
+        quotation_number=service._next_quotation_number(), client_id=quote_in.client_id, created_by=user_id, status="draft"
+    )
+    db.add(db_quote)
+    db.flush()
+    total_amount = 0.0
+    for item_in in quote_in.items:
+        unit_price = service._get_active_price(quote_in.client_id, item_in.product_id)
+        final_unit_price = float(item_in.unit_price) if item_in.unit_price > 0 else unit_price
+        db.add(QuotationItem(
+            quotation_id=db_quote.id, product_id=item_in.product_id, quantity=item_in.quantity,
+            unit_price=final_unit_price, discount_percent=item_in.discount_percent
+        ))
+        total_amount += float(item_in.quantity) * final_unit_price * (1 - float(item_in.discount_percent) / 100)
+    db_quote.total_amount = total_amount
+    db.commit()
+    db.refresh(db_quote)
+    return db_quote
+
+
+def measure(fn):
+    price_cache.clear()
+    with QueryCounter() as counter:
+        started = time.perf_counter()
+        quote = fn()
+        elapsed = time.perf_counter() - started
+    return counter.count, elapsed * 1000, quote.total_amount
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    client_id, product_ids = seed(db, max(args.lines))
+    service = QuoteService(db)
+
+    print(f"{'lines':>6}  {'mode':<10} {'queries':>8} {'ms':>10}  total")
+    for n_lines in args.lines:
+        quote_in = QuotationCreate(client_id=client_id, items=[
+            {"product_id": pid, "quantity": 3, "unit_price": 0, "discount_percent": Decimal("7.5")}
+            for pid in product_ids[:n_lines]
+        ])
+        for mode, create in (("batch", service.create_quotation), ("per line", partial(create_per_line, service))):
+            queries, ms, total = measure(lambda: create(quote_in, None))
+            print(f"{n_lines:>6}  {mode:<10} {queries:>8} {ms:>10.1f}  {total}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""add quotations created_at id index
+
+Revision ID: 8a4d2c6e1f93
+Revises: 9eed9ffec403
+Create Date: 2026-10-18 11:02:17.604512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d2c6e1f93'
+down_revision = '9eed9ffec403'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_quotations_created_at_id', 'quotations', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_quotations_created_at_id', table_name='quotations')
@@ -0,0 +1,24 @@
+"""add users token_version
+
+Revision ID: a9d17e4c3b58
+Revises: f3a6b0c9d214
+Create Date: 2026-10-18 16:02:51.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d17e4c3b58'
+down_revision = 'f3a6b0c9d214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
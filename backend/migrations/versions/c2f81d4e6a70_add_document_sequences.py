@@ -0,0 +1,30 @@
+"""add document sequences
+
+Revision ID: c2f81d4e6a70
+Revises: b7e3f90a2d15
+Create Date: 2026-10-18 12:20:06.881430
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f81d4e6a70'
+down_revision = 'b7e3f90a2d15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fallback counters for databases without native sequences.
+    # On PostgreSQL the per-year sequences are created on first use.
+    op.create_table('document_sequences',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('next_value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('document_sequences')
@@ -0,0 +1,24 @@
+"""add price_history product_id changed_at index
+
+Revision ID: f3a6b0c9d214
+Revises: d5b93a7c1e42
+Create Date: 2026-10-18 15:21:08.472930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a6b0c9d214'
+down_revision = 'd5b93a7c1e42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_price_history_product_id_changed_at', 'price_history', ['product_id', 'changed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_price_history_product_id_changed_at', table_name='price_history')
@@ -0,0 +1,91 @@
+"""
+Shared fixtures. Tests run against a throwaway SQLite database; the schema
+is recreated for every test and the per-process caches are emptied.
+"""
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.pop("POSTGRES_URL", None)
+DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["ASYNC_DATABASE"] = "false"
+os.environ["DEBUG"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, engine
+from app.models import Client, Product, Role, User
+from app.services.price_cache import price_cache
+from app.services.principal_cache import principal_cache
+from app.services.token_revocation import revocation_list
+from app.utils.security import get_password_hash
+
+PASSWORD = "secret"
+_password_hash = get_password_hash(PASSWORD)
+
+
+@pytest.fixture
+def db():
+    engine.dispose()
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(bind=engine)
+    price_cache.clear()
+    principal_cache.clear()
+    revocation_list.mark_stale()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def seed(db):
+    """Roles, two clients (Acme: tier S, Beta: tier A) and one user per role."""
+    roles = {name: Role(name=name) for name in ("super_admin", "admin", "sales", "client")}
+    db.add_all(roles.values())
+    db.flush()
+
+    sales = User(email="sales@example.com", password_hash=_password_hash, full_name="Sales", role_id=roles["sales"].id)
+    admin = User(email="admin@example.com", password_hash=_password_hash, full_name="Admin", role_id=roles["admin"].id)
+    db.add_all([sales, admin])
+    db.flush()
+
+    acme = Client(company_name="Acme", tier="S", sales_rep_id=sales.id)
+    beta = Client(company_name="Beta", tier="A")
+    db.add_all([acme, beta])
+    db.flush()
+
+    client_user = User(
+        email="client@example.com", password_hash=_password_hash, full_name="Client",
+        role_id=roles["client"].id, client_id=acme.id
+    )
+    db.add(client_user)
+    db.commit()
+    return SimpleNamespace(roles=roles, admin=admin, sales=sales, client_user=client_user, acme=acme, beta=beta)
+
+
+@pytest.fixture
+def api(db):
+    from app.main import app
+
+    return TestClient(app)
+
+
+def login(api, email: str) -> dict:
+    response = api.post("/api/auth/login", data={"username": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def make_products(db, count: int, prefix: str = "P") -> list:
+    products = [Product(sku=f"{prefix}{idx}", name=f"{prefix} {idx}") for idx in range(count)]
+    db.add_all(products)
+    db.flush()
+    return products
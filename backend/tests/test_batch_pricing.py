@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+
+from app.models import BasePrice, Client, ClientPrice, PriceHistory
+from app.services.price_cache import client_key, price_cache, tier_key
+from app.services.quote_service import QuoteService
+from conftest import login, make_products
+
+START = date.today() - timedelta(days=30)
+TOMORROW = date.today() + timedelta(days=1)
+
+
+def priced_catalog(db, seed):
+    """P: tier S 100; Acme (S) protected at 90, Gamma (S) at 95, Delta (S) at 70."""
+    product, = make_products(db, 1)
+    gamma = Client(company_name="Gamma", tier="S")
+    delta = Client(company_name="Delta", tier="S")
+    db.add_all([gamma, delta])
+    db.flush()
+    db.add_all([
+        BasePrice(product_id=product.id, tier="S", price=100, effective_from=START),
+        BasePrice(product_id=product.id, tier="A", price=120, effective_from=START),
+        ClientPrice(client_id=seed.acme.id, product_id=product.id, price=90, is_protected=True, effective_from=START),
+        ClientPrice(client_id=gamma.id, product_id=product.id, price=95, effective_from=START),
+        ClientPrice(client_id=delta.id, product_id=product.id, price=70, effective_from=START),
+    ])
+    db.commit()
+    return product, gamma, delta
+
+
+def batch_update(api, body, email="admin@example.com"):
+    return api.post("/api/pricing/batch-update", json=body, headers=login(api, email))
+
+
+def intervals(db, model, **filters):
+    return [
+        (float(row.price), row.effective_from, row.effective_to)
+        for row in db.query(model).filter_by(**filters).order_by(model.effective_from)
+    ]
+
+
+def test_batch_update_closes_intervals_and_keeps_protected_prices(db, seed, api):
+    product, gamma, delta = priced_catalog(db, seed)
+
+    response = batch_update(api, {"tiers": ["S"], "percent": "-20", "effective_from": TOMORROW.isoformat()})
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["base_prices_changed"], result["client_prices_lowered"]) == (1, 1)
+    assert (result["client_prices_protected"], result["client_prices_kept"]) == (1, 1)
+    assert (result["intervals_closed"], result["history_rows"]) == (2, 2)
+
+    db.expire_all()
+    today = date.today()
+    assert intervals(db, BasePrice, product_id=product.id, tier="S") == [(100.0, START, today), (80.0, TOMORROW, None)]
+    assert intervals(db, BasePrice, product_id=product.id, tier="A") == [(120.0, START, None)]
+    assert intervals(db, ClientPrice, client_id=gamma.id) == [(95.0, START, today), (80.0, TOMORROW, None)]
+    assert intervals(db, ClientPrice, client_id=seed.acme.id) == [(90.0, START, None)]
+    assert intervals(db, ClientPrice, client_id=delta.id) == [(70.0, START, None)]
+    assert db.query(PriceHistory).filter_by(change_type="batch_update").count() == 2
+
+
+def test_batch_update_invalidates_cached_prices(db, seed, api):
+    product, gamma, _ = priced_catalog(db, seed)
+    service = QuoteService(db)
+    assert service.resolve_prices(gamma.id, [product.id], as_of=TOMORROW) == {product.id: 95.0}
+    assert price_cache.get(client_key(gamma.id, product.id)) is not None
+    assert price_cache.get(tier_key("S", product.id)) is not None
+
+    assert batch_update(api, {"tiers": ["S"], "percent": "-20", "effective_from": TOMORROW.isoformat()}).status_code == 200
+
+    assert price_cache.get(client_key(gamma.id, product.id)) is None
+    assert price_cache.get(tier_key("S", product.id)) is None
+    db.expire_all()
+    assert service.resolve_prices(gamma.id, [product.id], as_of=TOMORROW) == {product.id: 80.0}
+    assert service.resolve_prices(gamma.id, [product.id]) == {product.id: 95.0}
+
+
+def test_dry_run_and_authorization(db, seed, api):
+    product, _, _ = priced_catalog(db, seed)
+    body = {"tiers": ["S"], "percent": "-20", "effective_from": TOMORROW.isoformat()}
+
+    assert batch_update(api, body, "sales@example.com").status_code == 403
+    response = batch_update(api, {**body, "dry_run": True})
+    assert response.status_code == 200
+    assert response.json()["base_prices_changed"] == 1
+
+    db.expire_all()
+    assert db.query(BasePrice).count() == 2
+    assert db.query(ClientPrice).count() == 3
+    assert db.query(PriceHistory).count() == 0
@@ -0,0 +1,101 @@
+import random
+from collections import Counter
+
+from sqlalchemy import event, insert
+
+from app.database import engine
+from app.models import ProductComponent
+from app.services.product_service import ProductService
+from conftest import login, make_products
+
+
+def add_components(db, edges):
+    db.execute(insert(ProductComponent), [
+        {"parent_product_id": parent.id, "child_product_id": child.id, "quantity": quantity}
+        for parent, child, quantity in edges
+    ])
+    db.commit()
+
+
+def reference_leaves(edges_by_parent, product_id, multiplier=1, totals=None):
+    """Rolled-up leaf quantities by walking the component tree in Python."""
+    totals = Counter() if totals is None else totals
+    for child_id, quantity in edges_by_parent.get(product_id, []):
+        if child_id in edges_by_parent:
+            reference_leaves(edges_by_parent, child_id, multiplier * quantity, totals)
+        else:
+            totals[child_id] += multiplier * quantity
+    return totals
+
+
+def test_deep_chain_rolls_up_quantities_and_depth(db, seed):
+    chain = make_products(db, 21)
+    add_components(db, [(parent, child, 2) for parent, child in zip(chain, chain[1:])])
+
+    lines = ProductService(db).explode_bom([chain[0].id])[chain[0].id]
+
+    assert [line["depth"] for line in lines] == list(range(1, 21))
+    assert [line["total_quantity"] for line in lines] == [2 ** depth for depth in range(1, 21)]
+    assert [line["is_leaf"] for line in lines] == [False] * 19 + [True]
+    assert lines[-1]["product_id"] == chain[-1].id
+
+
+def test_max_depth_stops_the_walk(db, seed):
+    chain = make_products(db, 10)
+    add_components(db, [(parent, child, 1) for parent, child in zip(chain, chain[1:])])
+
+    lines = ProductService(db).explode_bom([chain[0].id], max_depth=4)[chain[0].id]
+
+    assert max(line["depth"] for line in lines) == 4
+
+
+def test_thousands_of_parents_in_one_query(db, seed):
+    rng = random.Random(3)
+    leaves = make_products(db, 50, prefix="L")
+    subs = make_products(db, 30, prefix="S")
+    parents = make_products(db, 2000, prefix="B")
+    edges = []
+    for idx, sub in enumerate(subs):
+        # Sub-bundles may contain earlier sub-bundles: nested, shared subtrees
+        pool = leaves + subs[:idx]
+        edges.extend((sub, child, rng.randint(1, 3)) for child in rng.sample(pool, 3))
+    for parent in parents:
+        edges.extend((parent, child, rng.randint(1, 5)) for child in rng.sample(subs + leaves, 4))
+    add_components(db, edges)
+    parent_ids = [parent.id for parent in parents]
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        exploded = ProductService(db).explode_bom(parent_ids, max_depth=64)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    edges_by_parent = {}
+    for parent, child, quantity in edges:
+        edges_by_parent.setdefault(parent.id, []).append((child.id, quantity))
+    for parent in rng.sample(parents, 100):
+        totals = Counter()
+        for line in exploded[parent.id]:
+            if line["is_leaf"]:
+                totals[line["product_id"]] += line["total_quantity"]
+        assert totals == reference_leaves(edges_by_parent, parent.id)
+
+
+def test_bom_endpoint(db, seed, api):
+    bundle, child, leaf = make_products(db, 3)
+    add_components(db, [(bundle, child, 2), (child, leaf, 3)])
+    headers = login(api, "sales@example.com")
+
+    response = api.get(f"/api/products/bom?ids={leaf.id},{bundle.id}", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [entry["product_id"] for entry in body] == [leaf.id, bundle.id]
+    assert body[0]["lines"] == []
+    assert [(line["sku"], line["total_quantity"], line["depth"]) for line in body[1]["lines"]] == [
+        (child.sku, 2, 1), (leaf.sku, 6, 2)
+    ]
+
+    assert api.get("/api/products/bom?ids=1,x", headers=headers).status_code == 400
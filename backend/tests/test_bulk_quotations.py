@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+
+from app.models import BasePrice, Quotation, QuotationItem
+from app.schemas.quotation import QuotationCreate
+from app.services.quote_service import QuoteService
+from conftest import login, make_products
+
+
+def priced_products(db, count=2):
+    products = make_products(db, count)
+    for product in products:
+        db.add(BasePrice(product_id=product.id, tier="S", price=10, effective_from=date.today() - timedelta(days=1)))
+    db.commit()
+    return products
+
+
+def quote(client_id, products, quantity=1):
+    return {"client_id": client_id, "items": [
+        {"product_id": product.id, "quantity": quantity, "unit_price": 0} for product in products
+    ]}
+
+
+def test_bulk_endpoint_reports_failures_and_keeps_valid_quotes(db, seed, api):
+    products = priced_products(db)
+    body = {"quotes": [quote(seed.acme.id, products), quote(999999, products), quote(seed.acme.id, products[:1], 3)]}
+
+    response = api.post("/api/quotes/bulk", json=body, headers=login(api, "sales@example.com"))
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["created"], result["failed"]) == (2, 1)
+    first, missing, third = result["results"]
+    assert [entry["index"] for entry in result["results"]] == [0, 1, 2]
+    assert missing["error"] == "Client 999999 not found" and missing["quotation_id"] is None
+    assert (float(first["total_amount"]), float(third["total_amount"])) == (20.0, 30.0)
+    assert first["error"] is None and third["error"] is None
+
+    db.expire_all()
+    stored = {q.id: q for q in db.query(Quotation)}
+    assert set(stored) == {first["quotation_id"], third["quotation_id"]}
+    assert stored[third["quotation_id"]].quotation_number == third["quotation_number"]
+    assert db.query(QuotationItem).count() == 3
+
+
+def test_failing_batch_is_rolled_back_and_other_batches_commit(db, seed, monkeypatch):
+    products = priced_products(db)
+    build_item_rows = QuoteService._build_item_rows
+
+    def failing(quotation_id, items, prices):
+        if items[0].quantity == 13:
+            raise RuntimeError("boom")
+        return build_item_rows(quotation_id, items, prices)
+
+    monkeypatch.setattr(QuoteService, "_build_item_rows", staticmethod(failing))
+    quotes = [QuotationCreate(**quote(seed.acme.id, products, quantity)) for quantity in (1, 13, 2, 3)]
+
+    results = QuoteService(db).create_quotations_bulk(quotes, seed.sales.id, batch_size=2)
+
+    assert [result.get("error") for result in results] == ["boom", "boom", None, None]
+    db.expire_all()
+    assert sorted(q.id for q in db.query(Quotation)) == sorted(r["quotation_id"] for r in results[2:])
+    assert db.query(QuotationItem).count() == 4
@@ -0,0 +1,96 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.models import BasePrice, ClientPrice, ProductComponent
+from app.services.price_matrix import PriceMatrixService
+from app.services.quote_service import QuoteService
+from conftest import make_products
+
+START = date.today() - timedelta(days=30)
+
+
+def base_price(db, product, tier, price):
+    db.add(BasePrice(product_id=product.id, tier=tier, price=price, effective_from=START))
+
+
+def set_components(db, parent, components):
+    db.add_all(ProductComponent(parent_product_id=parent.id, child_product_id=child.id, quantity=quantity)
+               for child, quantity in components)
+
+
+def matrix_prices(db):
+    matrix = PriceMatrixService(db)
+    matrix.load()
+    prices = {}
+    for lo, chunk in matrix.iter_chunks(chunk_size=7):
+        for offset, row in enumerate(chunk.tolist()):
+            for client_idx, price in enumerate(row):
+                prices[(int(matrix.client_ids[client_idx]), int(matrix.product_ids[lo + offset]))] = price
+    return prices
+
+
+@pytest.fixture
+def nested(db, seed):
+    """BIG = 1 x SUB, SUB = 2 x LEAF; LEAF costs 10 for tier S."""
+    big, sub, leaf = make_products(db, 3)
+    base_price(db, leaf, "S", 10)
+    set_components(db, sub, [(leaf, 2)])
+    set_components(db, big, [(sub, 1)])
+    db.commit()
+    return big, sub, leaf
+
+
+def test_sub_bundle_without_price_expands_to_leaves(db, seed, nested):
+    big, sub, _ = nested
+    assert QuoteService(db).resolve_prices(seed.acme.id, [big.id, sub.id]) == {big.id: 20.0, sub.id: 20.0}
+
+
+def test_priced_sub_bundle_is_not_expanded(db, seed, nested):
+    big, sub, leaf = nested
+    base_price(db, sub, "S", 5)
+    db.commit()
+
+    service = QuoteService(db)
+    assert service.resolve_prices(seed.acme.id, [big.id]) == {big.id: 5.0}
+    assert service.resolve_prices_bulk({seed.acme.id: [big.id, leaf.id]})[seed.acme.id] == {big.id: 5.0, leaf.id: 10.0}
+    assert matrix_prices(db)[(seed.acme.id, big.id)] == 5.0
+
+
+def test_client_override_on_sub_bundle_reaches_parent(db, seed, nested):
+    big, sub, _ = nested
+    db.add(ClientPrice(client_id=seed.acme.id, product_id=sub.id, price=7, effective_from=START))
+    db.commit()
+
+    assert QuoteService(db).resolve_prices(seed.acme.id, [big.id]) == {big.id: 7.0}
+    prices = matrix_prices(db)
+    assert prices[(seed.acme.id, big.id)] == 7.0
+    assert prices[(seed.beta.id, big.id)] == 0.0  # Beta (tier A) has no price for LEAF
+
+
+def test_resolvers_agree_on_random_bundle_graph(db, seed):
+    rng = random.Random(7)
+    products = make_products(db, 60)
+    # Bundles only contain lower-numbered products, so the graph has no cycles
+    for idx in range(20, 60):
+        children = rng.sample(products[:idx], rng.randint(1, 4))
+        set_components(db, products[idx], [(child, rng.randint(1, 3)) for child in children])
+    for product in products:
+        for tier in ("S", "A"):
+            if rng.random() < (0.9 if product.id <= 20 else 0.3):
+                base_price(db, product, tier, rng.randint(1, 50))
+        for client in (seed.acme, seed.beta):
+            if rng.random() < 0.15:
+                db.add(ClientPrice(client_id=client.id, product_id=product.id, price=rng.randint(1, 50), effective_from=START))
+    db.commit()
+
+    product_ids = [product.id for product in products]
+    service = QuoteService(db)
+    bulk = service.resolve_prices_bulk({seed.acme.id: product_ids, seed.beta.id: product_ids})
+    matrix = matrix_prices(db)
+    for client in (seed.acme, seed.beta):
+        single = service.resolve_prices(client.id, product_ids)
+        assert bulk[client.id] == single
+        for product_id in product_ids:
+            assert matrix[(client.id, product_id)] == pytest.approx(round(single[product_id], 2))
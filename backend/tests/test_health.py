@@ -0,0 +1,20 @@
+import pytest
+
+from conftest import login
+
+INTERNAL = ["/health/db-pool", "/health/price-cache", "/health/principal-cache", "/health/password-hashing"]
+
+
+def test_public_health_checks(db, api):
+    assert api.get("/").status_code == 200
+    response = api.get("/health")
+    assert response.status_code == 200
+    assert response.json()["database"] == "connected"
+
+
+@pytest.mark.parametrize("path", INTERNAL)
+def test_operational_metrics_are_admin_only(db, seed, api, path):
+    assert api.get(path).status_code == 401
+    assert api.get(path, headers=login(api, "sales@example.com")).status_code == 403
+    assert api.get(path, headers=login(api, "client@example.com")).status_code == 403
+    assert api.get(path, headers=login(api, "admin@example.com")).status_code == 200
@@ -0,0 +1,74 @@
+import pytest
+
+from app.database import SessionLocal
+from app.models import IdempotencyKey, Quotation
+from app.services.quote_service import QuoteService
+from conftest import login, make_products
+
+
+@pytest.fixture
+def quote_body(db, seed):
+    product, = make_products(db, 1)
+    db.commit()
+    return {"client_id": seed.acme.id, "items": [{"product_id": product.id, "quantity": 2, "unit_price": "9.50"}]}
+
+
+def post_quote(api, headers, body, key):
+    return api.post("/api/quotes/", json=body, headers={**headers, "Idempotency-Key": key})
+
+
+def test_retry_replays_the_original_quotation(db, api, quote_body):
+    headers = login(api, "sales@example.com")
+
+    first = post_quote(api, headers, quote_body, "k-1")
+    second = post_quote(api, headers, quote_body, "k-1")
+
+    assert first.status_code == second.status_code == 201
+    assert second.json()["id"] == first.json()["id"]
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert db.query(Quotation).count() == 1
+
+    other_body = {**quote_body, "notes": "changed"}
+    assert post_quote(api, headers, other_body, "k-1").status_code == 422
+
+
+def test_claim_commits_with_the_quotation(db, api, quote_body, monkeypatch):
+    """The key is never visible without its quotation, so a crash leaves nothing to block retries."""
+    headers = login(api, "sales@example.com")
+    add_quotation = QuoteService.add_quotation
+    seen_from_outside = []
+
+    def checking_add(self, quote_in, user_id):
+        quote = add_quotation(self, quote_in, user_id)
+        observer = SessionLocal()
+        try:
+            seen_from_outside.append(observer.query(IdempotencyKey).count())
+        finally:
+            observer.close()
+        return quote
+
+    monkeypatch.setattr(QuoteService, "add_quotation", checking_add)
+    assert post_quote(api, headers, quote_body, "k-2").status_code == 201
+    assert seen_from_outside == [0]
+    key = db.query(IdempotencyKey).one()
+    assert key.resource_id == db.query(Quotation.id).scalar()
+
+
+def test_failed_creation_can_be_retried(db, api, quote_body, monkeypatch):
+    headers = login(api, "sales@example.com")
+    add_quotation = QuoteService.add_quotation
+
+    def failing_add(self, quote_in, user_id):
+        add_quotation(self, quote_in, user_id)
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(QuoteService, "add_quotation", failing_add)
+    with pytest.raises(RuntimeError):
+        post_quote(api, headers, quote_body, "k-3")
+    assert db.query(IdempotencyKey).count() == 0
+    assert db.query(Quotation).count() == 0
+
+    monkeypatch.setattr(QuoteService, "add_quotation", add_quotation)
+    response = post_quote(api, headers, quote_body, "k-3")
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import worker
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import Job
+from app.services import job_service
+from app.services.job_service import JobOutcome, JobService
+
+
+@pytest.fixture
+def fast_heartbeat(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_HEARTBEAT_INTERVAL_SECONDS", 0.05)
+
+
+def submit(db, seed, monkeypatch, handler):
+    monkeypatch.setitem(job_service.JOB_HANDLERS, "test", handler)
+    return JobService(db).submit("test", seed.admin.id)
+
+
+def test_heartbeat_continues_while_the_handler_reports_nothing(db, seed, monkeypatch, fast_heartbeat):
+    seen = {}
+
+    def silent_phase(work_db, job, report):
+        # Like component linking after the last progress report
+        time.sleep(0.5)
+        with SessionLocal() as other:
+            row = other.get(Job, job.id)
+            seen["heartbeat_at"], seen["started_at"] = row.heartbeat_at, row.started_at
+            seen["requeued"] = JobService(other).requeue_stale(0.3, settings.JOB_MAX_ATTEMPTS)
+        return JobOutcome(result={"ok": True})
+
+    job = submit(db, seed, monkeypatch, silent_phase)
+    service = JobService(db)
+    service.run(service.claim_next("worker-a"))
+
+    assert seen["heartbeat_at"] > seen["started_at"]
+    assert seen["requeued"] == 0
+    db.expire_all()
+    finished = db.get(Job, job.id)
+    assert (finished.status, finished.attempts, finished.result) == ("succeeded", 1, {"ok": True})
+
+
+def test_progress_is_persisted_on_sqlite(db, seed, monkeypatch, fast_heartbeat):
+    seen = {}
+
+    def reporting(work_db, job, report):
+        report(40, "Imported 400 rows")
+        time.sleep(0.2)
+        with SessionLocal() as other:
+            row = other.get(Job, job.id)
+            seen["progress"] = (row.progress, row.message)
+        return JobOutcome()
+
+    submit(db, seed, monkeypatch, reporting)
+    service = JobService(db)
+    service.run(service.claim_next("worker-a"))
+
+    assert seen["progress"] == (40, "Imported 400 rows")
+
+
+def test_outcome_of_a_job_taken_over_is_discarded(db, seed, monkeypatch, fast_heartbeat):
+    def taken_over(work_db, job, report):
+        with SessionLocal() as other:
+            other.query(Job).filter(Job.id == job.id).update({Job.worker_id: "worker-b"})
+            other.commit()
+        return JobOutcome(result={"from": "worker-a"})
+
+    job = submit(db, seed, monkeypatch, taken_over)
+    service = JobService(db)
+    service.run(service.claim_next("worker-a"))
+
+    db.expire_all()
+    row = db.get(Job, job.id)
+    assert (row.status, row.worker_id, row.result) == ("running", "worker-b", None)
+    assert not service.complete(job.id, JobOutcome(), worker_id="worker-a")
+    assert not service.fail(job.id, "late failure", worker_id="worker-a")
+    assert service.complete(job.id, JobOutcome(result={"from": "worker-b"}), worker_id="worker-b")
+
+
+def test_worker_survives_database_errors(db, seed, monkeypatch):
+    calls = []
+    requeue_stale = JobService.requeue_stale
+
+    def flaky(self, *args):
+        calls.append(args)
+        if len(calls) < 3:
+            raise OperationalError("SELECT 1", {}, Exception("server closed the connection"))
+        return requeue_stale(self, *args)
+
+    sleeps = []
+    monkeypatch.setattr(JobService, "requeue_stale", flaky)
+    monkeypatch.setattr(worker.time, "sleep", sleeps.append)
+    monkeypatch.setattr(settings, "JOB_POLL_INTERVAL_SECONDS", 2.0)
+
+    worker.run_worker(once=True)
+
+    assert len(calls) == 3
+    assert sleeps == [4.0, 8.0]
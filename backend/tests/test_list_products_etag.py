@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+from app.models import BasePrice, Client
+from conftest import login, make_products
+
+
+def test_tier_change_invalidates_the_client_etag(db, seed, api):
+    product, = make_products(db, 1)
+    start = date.today() - timedelta(days=1)
+    db.add_all([
+        BasePrice(product_id=product.id, tier="S", price=80, effective_from=start),
+        BasePrice(product_id=product.id, tier="A", price=100, effective_from=start),
+    ])
+    db.commit()
+    headers = login(api, "client@example.com")
+
+    first = api.get("/api/products/", headers=headers)
+    assert first.status_code == 200
+    assert first.json()[0]["current_price"] == 80
+    etag = first.headers["ETag"]
+    assert api.get("/api/products/", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    db.query(Client).filter(Client.id == seed.acme.id).update({Client.tier: "A"})
+    db.commit()
+
+    second = api.get("/api/products/", headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != etag
+    assert second.json()[0]["current_price"] == 100
@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.database import engine
+from app.models import BasePrice, ClientPrice, ProductComponent
+from app.services.price_cache import price_cache
+from conftest import login, make_products
+
+
+def seed_catalog(db, seed, count):
+    products = make_products(db, count)
+    start = date.today() - timedelta(days=1)
+    for idx, product in enumerate(products):
+        if idx % 5 == 0 and idx:
+            # Every fifth product is an unpriced bundle of the two before it
+            db.add_all([
+                ProductComponent(parent_product_id=product.id, child_product_id=products[idx - 1].id, quantity=2),
+                ProductComponent(parent_product_id=product.id, child_product_id=products[idx - 2].id, quantity=1),
+            ])
+            continue
+        for tier in ("X", "S", "A"):
+            db.add(BasePrice(product_id=product.id, tier=tier, price=10 + idx, effective_from=start))
+        if idx % 7 == 0:
+            db.add(ClientPrice(client_id=seed.acme.id, product_id=product.id, price=5, effective_from=start))
+    db.commit()
+
+
+def count_queries(api, headers, limit):
+    price_cache.clear()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = api.get("/api/products/", params={"limit": limit}, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    assert len(response.json()) == limit
+    return len(statements)
+
+
+@pytest.mark.parametrize("email", ["admin@example.com", "client@example.com"])
+def test_query_count_does_not_grow_with_page_size(db, seed, api, email):
+    seed_catalog(db, seed, 1000)
+    headers = login(api, email)
+    count_queries(api, headers, 10)  # warm the principal cache
+
+    counts = {limit: count_queries(api, headers, limit) for limit in (10, 100, 1000)}
+
+    assert len(set(counts.values())) == 1, counts
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.database import SessionLocal
+from app.models import Quotation
+from app.schemas.quotation import QuotationCreate
+from app.services.numbering import quotation_numbers
+from app.services.quote_service import QuoteService
+
+
+def test_numbers_are_sequential_and_rollback_returns_them(db, seed):
+    assert quotation_numbers.next_number(db, year=2031) == "PI-2031-0001"
+    db.commit()
+    assert quotation_numbers.next_number(db, year=2031) == "PI-2031-0002"
+    db.rollback()
+    assert quotation_numbers.next_number(db, year=2031) == "PI-2031-0002"
+    assert quotation_numbers.next_number(db, year=2032) == "PI-2032-0001"
+
+
+def test_concurrent_quotes_get_unique_gap_free_numbers(db, seed):
+    client_id, user_id = seed.acme.id, seed.sales.id
+
+    def create(_):
+        session = SessionLocal()
+        try:
+            quote = QuoteService(session).create_quotation(QuotationCreate(client_id=client_id, items=[]), user_id)
+            return quote.quotation_number
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        numbers = list(pool.map(create, range(20)))
+
+    assert sorted(int(number.rsplit("-", 1)[1]) for number in numbers) == list(range(1, 21))
+    assert db.query(Quotation).count() == 20
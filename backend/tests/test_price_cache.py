@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+from sqlalchemy import update
+
+from app.models import BasePrice, ClientPrice
+from app.services import price_cache as price_cache_module
+from app.services.price_cache import PriceCache, PriceSeries, invalidate_on_commit, price_cache, tier_key
+from app.services.quote_service import QuoteService
+from conftest import make_products
+
+START = date.today() - timedelta(days=10)
+
+
+def priced_product(db, price=10):
+    product, = make_products(db, 1)
+    base = BasePrice(product_id=product.id, tier="S", price=price, effective_from=START)
+    db.add(base)
+    db.commit()
+    return product, base
+
+
+def resolve(db, seed, product):
+    return QuoteService(db).resolve_prices(seed.acme.id, [product.id])[product.id]
+
+
+def test_orm_price_write_invalidates_the_cached_series(db, seed):
+    product, base = priced_product(db)
+    assert resolve(db, seed, product) == 10
+    assert price_cache.get(tier_key("S", product.id)) is not None
+
+    base.price = 12
+    db.commit()
+    assert price_cache.get(tier_key("S", product.id)) is None
+    assert resolve(db, seed, product) == 12
+
+    db.add(ClientPrice(client_id=seed.acme.id, product_id=product.id, price=7, effective_from=START))
+    db.commit()
+    assert resolve(db, seed, product) == 7
+
+
+def test_bulk_write_invalidates_on_commit_and_rollback_keeps_nothing_pending(db, seed):
+    product, base = priced_product(db)
+    key = tier_key("S", product.id)
+    assert resolve(db, seed, product) == 10
+
+    db.execute(update(BasePrice).where(BasePrice.id == base.id).values(price=15))
+    invalidate_on_commit(db, [key])
+    # A reader re-caching the pre-commit state is dropped again at commit
+    price_cache.put(key, PriceSeries([(START, None, 10.0)]))
+    db.commit()
+    assert price_cache.get(key) is None
+    assert resolve(db, seed, product) == 15
+
+    db.execute(update(BasePrice).where(BasePrice.id == base.id).values(price=20))
+    invalidate_on_commit(db, [key])
+    db.rollback()
+    assert "price_cache_keys" not in db.info
+    assert resolve(db, seed, product) == 15
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(price_cache_module.time, "monotonic", lambda: now[0])
+    cache = PriceCache(max_entries=10, ttl_seconds=300)
+    cache.put("key", PriceSeries([(START, None, 10.0)]))
+
+    now[0] += 300
+    assert cache.get("key").price_at(date.today()) == 10.0
+    now[0] += 1
+    assert cache.get("key") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PriceCache(max_entries=2, ttl_seconds=300)
+    for key in ("a", "b"):
+        cache.put(key, PriceSeries())
+    cache.get("a")
+    cache.put("c", PriceSeries())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.evictions == 1
@@ -0,0 +1,52 @@
+from sqlalchemy import insert
+
+from app.models import PriceHistory
+from conftest import login, make_products
+
+
+def add_history(db, product, seed):
+    db.execute(insert(PriceHistory), [
+        {"product_id": product.id, "tier": tier, "client_id": None, "old_price": None, "new_price": 10,
+         "change_type": "base_update"}
+        for tier in ("X", "S", "A")
+    ] + [
+        {"product_id": product.id, "tier": None, "client_id": client.id, "old_price": None, "new_price": 8,
+         "change_type": "client_override"}
+        for client in (seed.acme, seed.beta)
+    ])
+    db.commit()
+
+
+def series_keys(response):
+    assert response.status_code == 200
+    return {(series["tier"], series["client_id"]) for series in response.json()["series"]}
+
+
+def test_sales_see_every_tier_but_only_their_clients(db, seed, api):
+    product, = make_products(db, 1)
+    add_history(db, product, seed)
+    headers = login(api, "sales@example.com")
+
+    response = api.get(f"/api/products/{product.id}/price-history", headers=headers)
+    assert series_keys(response) == {("X", None), ("S", None), ("A", None), (None, seed.acme.id)}
+
+    response = api.get(f"/api/products/price-history?ids={product.id}&client_id={seed.beta.id}", headers=headers)
+    assert response.status_code == 403
+
+
+def test_clients_see_their_tier_and_own_prices(db, seed, api):
+    product, = make_products(db, 1)
+    add_history(db, product, seed)
+
+    response = api.get(f"/api/products/{product.id}/price-history", headers=login(api, "client@example.com"))
+    assert series_keys(response) == {("S", None), (None, seed.acme.id)}
+
+
+def test_admins_see_everything(db, seed, api):
+    product, = make_products(db, 1)
+    add_history(db, product, seed)
+
+    response = api.get(f"/api/products/{product.id}/price-history", headers=login(api, "admin@example.com"))
+    assert series_keys(response) == {
+        ("X", None), ("S", None), ("A", None), (None, seed.acme.id), (None, seed.beta.id)
+    }
@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+from app.models import ClientPrice
+from app.services.price_list import PriceListService
+from conftest import make_products
+
+
+def import_csv(db, seed, lines):
+    content = "\n".join(lines).encode()
+    return PriceListService(db).import_client_prices(content, "prices.csv", seed.admin.id)
+
+
+def exported(db, seed, as_of):
+    rows = PriceListService(db).iter_export_rows(client_ids=[seed.acme.id], as_of=as_of)
+    header = next(rows)
+    return [dict(zip(header, row)) for row in rows]
+
+
+def protected_price(db, seed, product, days_ago=30):
+    db.add(ClientPrice(
+        client_id=seed.acme.id, product_id=product.id, price=8, is_protected=True,
+        effective_from=date.today() - timedelta(days=days_ago)
+    ))
+    db.commit()
+
+
+def test_new_interval_keeps_protection_without_the_column(db, seed):
+    product, = make_products(db, 1)
+    protected_price(db, seed, product)
+
+    results = import_csv(db, seed, ["client_id,sku,price", f"{seed.acme.id},{product.sku},9.50"])
+
+    assert (results["created"], results["closed"], results["errors"]) == (1, 1, [])
+    rows = exported(db, seed, date.today())
+    assert [(row["price"], row["effective_from"], row["is_protected"]) for row in rows] == [
+        (9.5, date.today(), True)
+    ]
+
+
+def test_explicit_column_still_sets_protection(db, seed):
+    product, = make_products(db, 1)
+    protected_price(db, seed, product)
+
+    import_csv(db, seed, ["client_id,sku,price,is_protected", f"{seed.acme.id},{product.sku},9.50,no"])
+
+    assert [row["is_protected"] for row in exported(db, seed, date.today())] == [False]
+
+
+def test_first_interval_is_unprotected_by_default(db, seed):
+    product, = make_products(db, 1)
+
+    import_csv(db, seed, ["client_id,sku,price", f"{seed.acme.id},{product.sku},9.50"])
+
+    assert [row["is_protected"] for row in exported(db, seed, date.today())] == [False]
@@ -0,0 +1,20 @@
+import csv
+import io
+from datetime import date, timedelta
+
+from app.models import BasePrice
+from conftest import login, make_products
+
+
+def test_price_matrix_csv(db, seed, api):
+    product, = make_products(db, 1)
+    db.add(BasePrice(product_id=product.id, tier="S", price=12.5, effective_from=date.today() - timedelta(days=1)))
+    db.commit()
+
+    response = api.get("/api/products/price-matrix?format=csv", headers=login(api, "admin@example.com"))
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows == [["sku", "name", "Acme", "Beta"], [product.sku, product.name, "12.5", "0.0"]]
+
+    response = api.get("/api/products/price-matrix?format=csv", headers=login(api, "sales@example.com"))
+    assert response.status_code == 403
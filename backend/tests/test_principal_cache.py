@@ -0,0 +1,71 @@
+from app.database import SessionLocal
+from app.middleware.deps import get_current_user
+from app.models import Role
+from app.services.principal_cache import Principal, principal_cache
+from app.utils.security import create_access_token
+from conftest import login
+
+
+def authenticate(token):
+    with SessionLocal() as auth_db:
+        return get_current_user(token, auth_db)
+
+
+def test_cached_principal_is_reused(db, seed):
+    token = create_access_token(subject="sales@example.com")
+
+    first = authenticate(token)
+    hits = principal_cache.hits
+    second = authenticate(token)
+
+    assert second is first
+    assert principal_cache.hits == hits + 1
+
+
+def test_user_changes_retire_cached_principals(db, seed):
+    token = create_access_token(subject="sales@example.com")
+    assert authenticate(token).role.name == "sales"
+
+    seed.sales.role_id = seed.roles["admin"].id
+    db.commit()
+    assert authenticate(token).role.name == "admin"
+
+    seed.sales.client_id = seed.beta.id
+    db.commit()
+    assert authenticate(token).client_id == seed.beta.id
+
+    seed.sales.is_active = False
+    db.commit()
+    assert authenticate(token).is_active is False
+
+
+def test_role_rename_retires_cached_principals(db, seed):
+    token = create_access_token(subject="client@example.com")
+    assert authenticate(token).role.name == "client"
+
+    db.query(Role).filter(Role.id == seed.roles["client"].id).one().name = "customer"
+    db.commit()
+    assert authenticate(token).role.name == "customer"
+
+
+def test_fill_racing_a_user_write_is_skipped(db, seed):
+    token = create_access_token(subject="sales@example.com")
+    # A request reads the sequence and loads the user ...
+    write_sequence = principal_cache.write_sequence()
+    stale = Principal.from_user(seed.sales)
+    # ... while another request changes the user
+    seed.sales.role_id = seed.roles["admin"].id
+    db.commit()
+    principal_cache.put(token, stale, expires_at=float("inf"), write_sequence=write_sequence)
+
+    assert principal_cache.get(token) is None
+    assert authenticate(token).role.name == "admin"
+
+
+def test_promotion_applies_to_the_next_request(db, seed, api):
+    headers = login(api, "sales@example.com")
+    assert api.get("/health/db-pool", headers=headers).status_code == 403
+
+    seed.sales.role_id = seed.roles["admin"].id
+    db.commit()
+    assert api.get("/health/db-pool", headers=headers).status_code == 200
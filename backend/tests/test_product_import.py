@@ -0,0 +1,149 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy import event
+
+from app.database import engine
+from app.models import Product, ProductComponent
+from app.services import product_import
+from app.services.product_import import PRODUCT_TEMPLATE_HEADERS, ProductImportService
+from conftest import make_products
+
+
+def xlsx(rows, headers=PRODUCT_TEMPLATE_HEADERS):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(list(headers))
+    for row in rows:
+        ws.append([row.get(header) for header in headers])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture(params=["on_conflict", "generic"])
+def upsert_path(request, monkeypatch):
+    if request.param == "generic":
+        # As on a dialect without INSERT ... ON CONFLICT
+        monkeypatch.setattr(product_import, "_UPSERT_INSERTS", {})
+    return request.param
+
+
+def test_import_inserts_new_and_updates_existing_skus(db, seed, upsert_path):
+    existing, untouched = make_products(db, 2)
+    existing.is_active = False
+    db.commit()
+    content = xlsx([
+        {"sku": existing.sku, "name": "Old name", "package_weight": 1.0},
+        {"sku": "NEW-1", "name": "New one", "unit": "set", "components": f"{existing.sku}:2"},
+        {"sku": existing.sku, "name": "Renamed", "package_weight": 2.5},  # last row for a SKU wins
+    ])
+
+    results = ProductImportService(db, chunk_size=2).import_xlsx(content)
+
+    assert (results["success"], results["errors"], results["total"]) == (3, [], 3)
+    db.expire_all()
+    products = {p.sku: p for p in db.query(Product)}
+    assert set(products) == {existing.sku, untouched.sku, "NEW-1"}
+    assert (products[existing.sku].name, float(products[existing.sku].package_weight)) == ("Renamed", 2.5)
+    assert products[existing.sku].is_active is False  # not an import column
+    assert (products["NEW-1"].unit, products["NEW-1"].is_active) == ("set", True)
+    assert [(c.child_product_id, c.quantity) for c in products["NEW-1"].components] == [(existing.id, 2)]
+
+
+def test_large_import_writes_in_chunks(db, seed, upsert_path):
+    make_products(db, 2500)
+    db.commit()
+    rows = [{"sku": f"P{idx}", "name": f"Updated {idx}"} for idx in range(2500)]
+    rows += [{"sku": f"N{idx}", "name": f"New {idx}"} for idx in range(2500)]
+    content = xlsx(rows)
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        results = ProductImportService(db, chunk_size=1000).import_xlsx(content)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert (results["success"], results["errors"]) == (5000, [])
+    # A handful of statements per chunk, not one per row
+    assert len(statements) < 100
+    assert db.query(Product).count() == 5000
+    assert db.query(Product).filter(Product.name.like("Updated %")).count() == 2500
+    assert db.query(ProductComponent).count() == 0
+
+
+def snapshot(db):
+    db.expire_all()
+    return (
+        sorted((p.sku, p.name, p.unit, p.min_order_qty) for p in db.query(Product)),
+        sorted((c.parent_product_id, c.child_product_id, c.quantity) for c in db.query(ProductComponent)),
+    )
+
+
+def test_dry_run_reports_the_diff_and_writes_nothing(db, seed):
+    renamed, same, bundle, leaf, outer, inner = make_products(db, 6)
+    db.add_all([
+        ProductComponent(parent_product_id=bundle.id, child_product_id=renamed.id, quantity=1),
+        ProductComponent(parent_product_id=outer.id, child_product_id=inner.id, quantity=1),
+    ])
+    db.commit()
+    content = xlsx([
+        {"sku": renamed.sku, "name": "Renamed"},                                            # row 2: field change
+        {"sku": same.sku, "name": same.name},                                               # row 3: unchanged
+        {"sku": "NEW-1", "name": "New", "components": f"{renamed.sku}:2"},                  # row 4: new bundle
+        {"sku": bundle.sku, "name": bundle.name, "components": f"{renamed.sku};{leaf.sku}:3"},  # row 5: components only
+        {"sku": inner.sku, "name": inner.name, "components": f"{outer.sku}:1"},             # row 6: cycle
+        {"sku": "BAD", "name": "Bad", "min_order_qty": "lots"},                             # row 7: parse error
+        {"sku": "LOST", "name": "Lost", "components": "MISSING:1"},                         # row 8: unknown component
+    ])
+    before = snapshot(db)
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        preview = ProductImportService(db).preview_xlsx(content)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert all(statement.lstrip().upper().startswith(("SELECT", "WITH")) for statement in statements)
+    db.rollback()
+    assert snapshot(db) == before
+
+    assert preview["dry_run"] is True
+    assert preview["total"] == 7
+    assert preview["summary"] == {"new": 2, "changed": 2, "unchanged": 2, "components_changed": 2, "errors": 3}
+    assert preview["errors"] == [
+        "Row 7: invalid literal for int() with base 10: 'lots'",
+        "Row 8: Component SKU MISSING not found",
+        "Row 6: Components would create a bundle cycle",
+    ]
+    changes = {(line["sku"], line["field"]): line for line in preview["changes"]}
+    assert set(changes) == {
+        (renamed.sku, "name"), ("NEW-1", "name"), ("NEW-1", "components"), (bundle.sku, "components"), ("LOST", "name")
+    }
+    assert (changes[(renamed.sku, "name")]["current"], changes[(renamed.sku, "name")]["new"]) == (renamed.name, "Renamed")
+    assert (changes[("NEW-1", "components")]["change"], changes[("NEW-1", "components")]["new"]) == ("new", f"{renamed.sku}:2")
+    bundle_change = changes[(bundle.sku, "components")]
+    assert (bundle_change["row"], bundle_change["change"]) == (5, "changed")
+    assert (bundle_change["current"], bundle_change["new"]) == (f"{renamed.sku}:1", f"{renamed.sku}:1;{leaf.sku}:3")
+
+    rows = list(ProductImportService.diff_sheet_rows(preview))
+    assert rows[0] == ["row", "sku", "change", "field", "current", "new"]
+    assert len(rows) == 1 + len(preview["changes"]) + len(preview["errors"])
+
+
+def test_dry_run_matches_the_import(db, seed):
+    existing, = make_products(db, 1)
+    db.commit()
+    content = xlsx([{"sku": existing.sku, "name": "Changed"}, {"sku": "NEW-1", "name": "New"}])
+
+    preview = ProductImportService(db).preview_xlsx(content)
+    results = ProductImportService(db).import_xlsx(content)
+
+    assert (preview["summary"]["new"], preview["summary"]["changed"]) == (1, 1)
+    assert results["success"] == preview["summary"]["new"] + preview["summary"]["changed"]
+    assert ProductImportService(db).preview_xlsx(content)["summary"]["unchanged"] == 2
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.models import Quotation
+from app.services.quote_service import QuoteService, encode_quotation_cursor
+from conftest import login
+
+
+@pytest.fixture
+def quotations(db, seed):
+    """17 quotations: 10 sharing the server-default timestamp, 7 with explicit ones."""
+    db.execute(insert(Quotation), [
+        {"quotation_number": f"PI-T-{idx:04d}", "client_id": seed.acme.id, "status": "draft", "created_by": seed.admin.id} for idx in range(10)
+    ])
+    now = datetime.utcnow().replace(microsecond=0)
+    db.execute(insert(Quotation), [
+        {"quotation_number": f"PI-T-{idx:04d}", "client_id": seed.beta.id, "status": "draft", "created_by": seed.admin.id,
+         "created_at": now - timedelta(hours=idx, microseconds=idx * 1000)}
+        for idx in range(10, 17)
+    ])
+    db.commit()
+    return [row.id for row in db.query(Quotation.id)]
+
+
+def expected_order(db):
+    rows = db.query(Quotation.id, Quotation.created_at).all()
+    return [quotation_id for quotation_id, _ in sorted(rows, key=lambda row: (row[1], row[0]), reverse=True)]
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7, 17, 50])
+def test_cursor_walk_returns_every_row_once(db, quotations, limit):
+    service = QuoteService(db)
+    seen, cursor = [], None
+    for _ in range(len(quotations) + 1):
+        page = service.get_quotations(limit=limit, cursor=cursor)
+        seen.extend(quote.id for quote in page)
+        if len(page) < limit:
+            break
+        cursor = encode_quotation_cursor(page[-1])
+    assert seen == expected_order(db)
+
+
+def test_cursor_walk_through_the_api(db, seed, api, quotations):
+    headers = login(api, "admin@example.com")
+    seen, params = [], {"limit": 4}
+    for _ in range(len(quotations) + 1):
+        response = api.get("/api/quotes/", params=params, headers=headers)
+        assert response.status_code == 200
+        seen.extend(quote["id"] for quote in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params = {"limit": 4, "cursor": response.headers["X-Next-Cursor"]}
+    assert seen == expected_order(db)
+
+    assert api.get("/api/quotes/", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
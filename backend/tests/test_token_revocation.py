@@ -0,0 +1,86 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+
+from app.config import settings
+from app.database import SessionLocal
+from app.middleware.deps import get_current_user
+from app.models import User
+from app.services.token_revocation import revocation_list, revoke_user_tokens
+from app.utils.security import create_access_token, user_token_claims
+
+
+@pytest.fixture(autouse=True)
+def claims_tokens(monkeypatch):
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_CLAIMS", True)
+
+
+def claims_token(user):
+    return create_access_token(subject=user.email, claims=user_token_claims(user))
+
+
+def authenticate(token):
+    with SessionLocal() as auth_db:
+        return get_current_user(token, auth_db)
+
+
+def assert_revoked(token):
+    with pytest.raises(HTTPException) as raised:
+        authenticate(token)
+    assert raised.value.status_code == 401
+
+
+def new_user(db, seed, email="temp@example.com"):
+    user = User(email=email, password_hash="x", full_name="Temp", role_id=seed.roles["sales"].id)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_claims_token_is_valid_until_revoked(db, seed):
+    token = claims_token(seed.sales)
+    assert authenticate(token).role.name == "sales"
+
+    revoke_user_tokens(db, seed.sales.id)
+    assert_revoked(token)
+    db.refresh(seed.sales)
+    assert authenticate(claims_token(seed.sales)).id == seed.sales.id
+
+
+def test_deactivation_revokes_claims_tokens(db, seed):
+    token = claims_token(seed.sales)
+    authenticate(token)
+
+    seed.sales.is_active = False
+    db.commit()
+    assert_revoked(token)
+
+
+def test_deleted_user_tokens_are_revoked(db, seed):
+    user = new_user(db, seed)
+    token = claims_token(user)
+    assert authenticate(token).id == user.id
+
+    db.delete(user)
+    db.commit()
+    assert_revoked(token)
+
+
+def test_user_deleted_by_another_worker_is_revoked_after_refresh(db, seed):
+    user = new_user(db, seed)
+    token = claims_token(user)
+    authenticate(token)
+
+    db.execute(delete(User).where(User.id == user.id))
+    db.commit()
+    revocation_list.mark_stale()  # the refresh interval passing
+    assert_revoked(token)
+
+
+def test_user_created_after_the_refresh_is_looked_up(db, seed):
+    authenticate(claims_token(seed.sales))  # loads the list
+    user = new_user(db, seed)
+
+    assert authenticate(claims_token(user)).id == user.id
+    forged = create_access_token(subject="ghost@example.com", claims={**user_token_claims(user), "uid": user.id + 100})
+    assert_revoked(forged)